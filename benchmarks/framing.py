@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+stdio 帧解析微基准
+
+分别以按行 JSON 与 Content-Length 分帧生成小消息（一次 tools/call）和 1 MB 消息，
+经管道送入 src/framing.FrameReader，给出每秒解析的消息数与吞吐量。
+``--baseline`` 同时测量原先基于 readline() 的解析方式，便于对比。
+
+用法:
+    python benchmarks/framing.py
+    python benchmarks/framing.py --small 50000 --large 50 --baseline --output framing.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.framing import FrameReader  # noqa: E402
+
+
+def small_message(index: int) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": index,
+        "method": "tools/call",
+        "params": {"name": "notify_send", "arguments": {"title": "构建完成", "content": "全部测试通过"}},
+    }
+
+
+def large_message(index: int, size: int) -> dict:
+    message = small_message(index)
+    message["params"]["arguments"]["content"] = "x" * size
+    return message
+
+
+def encode(messages: List[dict], framed: bool) -> bytes:
+    parts = []
+    for message in messages:
+        body = json.dumps(message, ensure_ascii=False).encode("utf-8")
+        if framed:
+            parts.append(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+        else:
+            parts.append(body + b"\n")
+    return b"".join(parts)
+
+
+def readline_parser(stream) -> Callable[[], Optional[tuple]]:
+    """原 server.py 中基于 readline() 的解析方式（空行改为循环，避免递归过深）"""
+
+    def read():
+        while True:
+            line = stream.readline()
+            if not line:
+                return None
+            if line not in (b"\n", b"\r\n"):
+                break
+        if line.lower().startswith(b"content-length:"):
+            headers = {}
+            header_line = line
+            while header_line not in (b"\n", b"\r\n"):
+                name, value = header_line.decode("ascii").split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+                header_line = stream.readline()
+            body = stream.read(int(headers["content-length"]))
+            return json.loads(body.decode("utf-8")), True
+        return json.loads(line.decode("utf-8").strip()), False
+
+    return read
+
+
+def framereader_parser(stream) -> Callable[[], Optional[tuple]]:
+    return FrameReader(stream).read
+
+
+def measure(payload: bytes, count: int, parser: Callable) -> Dict[str, float]:
+    """通过 os.pipe 送入数据，写端在独立线程中，与真实的 stdin 管道一致"""
+    read_fd, write_fd = os.pipe()
+
+    def feed():
+        with os.fdopen(write_fd, "wb") as writer:
+            writer.write(payload)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    with os.fdopen(read_fd, "rb") as stream:
+        read = parser(stream)
+        started = time.perf_counter()
+        feeder.start()
+        parsed = 0
+        while read() is not None:
+            parsed += 1
+        elapsed = time.perf_counter() - started
+    feeder.join()
+    if parsed != count:
+        raise RuntimeError(f"parsed {parsed} messages, expected {count}")
+    return {
+        "messages": count,
+        "seconds": round(elapsed, 4),
+        "msgs_per_sec": round(count / elapsed, 1),
+        "mb_per_sec": round(len(payload) / elapsed / (1024 * 1024), 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="mcp-push stdio framing benchmark")
+    parser.add_argument("--small", type=int, default=20000, help="小消息条数（默认 20000）")
+    parser.add_argument("--large", type=int, default=20, help="1 MB 消息条数（默认 20）")
+    parser.add_argument("--large-size", type=int, default=1024 * 1024, help="大消息内容字节数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快一次（默认 3）")
+    parser.add_argument("--baseline", action="store_true", help="同时测量基于 readline() 的解析方式")
+    parser.add_argument("--output", help="结果 JSON 写入该文件（默认输出到 stdout）")
+    args = parser.parse_args(argv)
+
+    parsers = {"framereader": framereader_parser}
+    if args.baseline:
+        parsers["readline"] = readline_parser
+    cases = {
+        "small": [small_message(i) for i in range(args.small)],
+        "1mb": [large_message(i, args.large_size) for i in range(args.large)],
+    }
+
+    results = []
+    for case, messages in cases.items():
+        for framed in (False, True):
+            payload = encode(messages, framed)
+            for name, factory in parsers.items():
+                best = min(
+                    (measure(payload, len(messages), factory) for _ in range(args.repeat)),
+                    key=lambda row: row["seconds"],
+                )
+                row = {"parser": name, "payload": case, "framing": "content-length" if framed else "ndjson", **best}
+                results.append(row)
+                print(
+                    f"{row['parser']:<12} {row['payload']:<6} {row['framing']:<15} "
+                    f"{row['msgs_per_sec']:>12.1f} msg/s {row['mb_per_sec']:>8.1f} MB/s",
+                    file=sys.stderr,
+                )
+
+    text = json.dumps({
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
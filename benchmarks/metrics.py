@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+指标热路径微基准
+
+测量 src/metrics 中计数器 inc、仪表 inc + dec 与直方图 observe 每次调用的耗时（微秒），
+分别在单线程与多线程（各线程同时写同一指标）下运行。
+
+用法:
+    python benchmarks/metrics.py
+    python benchmarks/metrics.py --ops 500000 --threads 8 --budget-us 5 --output metrics.json
+
+任一项超过 --budget-us 时以退出码 1 结束。
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.metrics import Registry  # noqa: E402
+
+
+def operations(registry: Registry) -> Dict[str, Callable[[int], None]]:
+    counter = registry.counter("bench_total", "bench")
+    labeled = registry.counter("bench_channel_total", "bench", ("channel",))
+    gauge = registry.gauge("bench_inflight", "bench")
+    histogram = registry.histogram("bench_latency_ms", "bench", ("channel",))
+    key = ("gotify",)
+
+    def counter_inc(ops: int) -> None:
+        inc = counter.inc
+        for _ in range(ops):
+            inc()
+
+    def labeled_inc(ops: int) -> None:
+        inc = labeled.inc
+        for _ in range(ops):
+            inc(key)
+
+    def gauge_inc_dec(ops: int) -> None:
+        for _ in range(ops):
+            gauge.inc()
+            gauge.dec()
+
+    def histogram_observe(ops: int) -> None:
+        observe = histogram.observe
+        for i in range(ops):
+            observe(i % 400, key)
+
+    return {
+        "counter.inc": counter_inc,
+        "counter.inc(label)": labeled_inc,
+        "gauge.inc+dec": gauge_inc_dec,
+        "histogram.observe": histogram_observe,
+    }
+
+
+def empty_loop(ops: int) -> None:
+    for _ in range(ops):
+        pass
+
+
+def measure(fn: Callable[[int], None], ops: int, threads: int) -> float:
+    """返回所有线程合计的每次调用耗时（微秒，已扣除空循环开销）"""
+
+    def timed(body: Callable[[int], None]) -> float:
+        barrier = threading.Barrier(threads + 1)
+
+        def run() -> None:
+            barrier.wait()
+            body(ops)
+
+        workers = [threading.Thread(target=run) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        return time.perf_counter() - started
+
+    elapsed = timed(fn) - timed(empty_loop)
+    return max(0.0, elapsed) / (ops * threads) * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="mcp-push metrics hot-path benchmark")
+    parser.add_argument("--ops", type=int, default=200000, help="每个线程的调用次数（默认 200000）")
+    parser.add_argument("--threads", type=int, default=4, help="多线程场景的线程数（默认 4）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快一次（默认 3）")
+    parser.add_argument("--budget-us", type=float, help="每次调用耗时上限（微秒）")
+    parser.add_argument("--output", help="结果 JSON 写入该文件（默认输出到 stdout）")
+    args = parser.parse_args(argv)
+
+    results = []
+    over_budget = False
+    for threads in sorted({1, max(1, args.threads)}):
+        for name, fn in operations(Registry()).items():
+            best = min(measure(fn, args.ops, threads) for _ in range(args.repeat))
+            row = {"operation": name, "threads": threads, "us_per_op": round(best, 3)}
+            results.append(row)
+            flag = ""
+            if args.budget_us is not None and best > args.budget_us:
+                over_budget = True
+                flag = f"  > budget {args.budget_us:g} us"
+            print(f"{name:<20} threads={threads:<3} {best:>8.3f} us/op{flag}", file=sys.stderr)
+
+    text = json.dumps({
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+notify.send 端到端基准
+
+在本进程内启动 benchmarks/stubs.py 中的服务商桩，把前 N 个渠道指向这些桩，再由 C 个线程
+并发调用 notify.send，覆盖配置读取、分发线程池、连接池、重试 / 熔断、服务商响应解析的完整路径。
+每个 (渠道数, 并发数) 组合报告：
+- msgs_per_s：每秒完成的 send 调用数；deliveries_per_s：每秒完成的渠道投递数
+- p50_ms / p95_ms / p99_ms / max_ms：单次 send 调用的耗时
+- failures / failure_rate：失败（含超时）的渠道投递数与比例
+渠道按 stubs.CHANNELS 的顺序取前 N 个；运行期间不读取登录 shell 环境，且清空所有真实渠道配置、
+关闭渠道限速，不会有消息发往外部服务。调用方启用了发件箱（NOTIFY_OUTBOX_DIR）时改用临时目录，
+仍计入落盘开销，但不会写入或恢复真实的发件箱日志。
+
+用法:
+    python benchmarks/send_e2e.py
+    python benchmarks/send_e2e.py --channels 1,4,11 --concurrency 1,8,32 --messages 400 \\
+        --latency lognormal:40,0.6 --error-rate 0.01 --throttle-rate 0.02 --output e2e.json
+    python benchmarks/send_e2e.py --budget p99_ms=500 --budget 11ch-c8:msgs_per_s=50
+    python benchmarks/send_e2e.py --baseline e2e.json --max-regression 0.2
+
+预算写作 metric=value 或 场景:metric=value（场景名如 11ch-c8）；msgs_per_s 与 deliveries_per_s
+为下限，其余为上限。指定 --baseline 时，与基线中同名场景相比吞吐下降或 p95 上升超过
+--max-regression（比例）视为回归。超出预算或出现回归时以退出码 1 结束。
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("MCP_PUSH_SHELL_ENV", "0")
+
+from src import notify  # noqa: E402
+from stubs import CHANNELS, Behavior, StubProviders  # noqa: E402
+
+# 这些配置项不属于推送渠道，保留调用方环境中的值
+_KEEP_PREFIXES = ("NOTIFY_",)
+# 越大越好的指标，预算为下限
+_FLOORS = ("msgs_per_s", "deliveries_per_s")
+
+
+def parse_list(text: str) -> List[int]:
+    try:
+        values = [int(part) for part in text.split(",") if part.strip()]
+    except ValueError:
+        raise SystemExit(f"invalid list {text!r}, expected comma-separated integers")
+    if not values or min(values) < 1:
+        raise SystemExit(f"invalid list {text!r}, values must be >= 1")
+    return values
+
+
+def parse_budgets(items: List[str]) -> Dict[str, float]:
+    budgets = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        try:
+            budgets[key.strip()] = float(value)
+        except ValueError:
+            raise SystemExit(f"invalid budget {item!r}, expected metric=value")
+    return budgets
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def base_config(outbox_dir: str = "") -> Dict[str, str]:
+    """清空真实渠道配置后的 push_config；发件箱只使用 outbox_dir（为空时不启用）"""
+    config = {key: "" for key in notify.push_config if not key.startswith(_KEEP_PREFIXES)}
+    config["HITOKOTO"] = "false"
+    config["NOTIFY_RATE_LIMITS"] = ",".join(f"{channel}=off" for channel in CHANNELS)
+    config["NOTIFY_OUTBOX_DIR"] = outbox_dir
+    return config
+
+
+def _close_outbox() -> None:
+    """关闭基准期间打开的发件箱（在临时目录删除之前）"""
+    if notify._outbox_instance is not None:
+        notify._outbox_instance.close()
+    notify._outbox_instance, notify._outbox_checked = None, False
+
+
+def run_scenario(
+    stubs: StubProviders,
+    channels: int,
+    concurrency: int,
+    messages: int,
+    warmup: int,
+    deadline: float,
+    outbox_dir: str = "",
+) -> Dict[str, object]:
+    notify.push_config.update(base_config(outbox_dir))
+    notify.push_config.update(stubs.config(CHANNELS[:channels]))
+    # 每个场景重新创建熔断器，上一场景的失败不影响本场景
+    notify._breakers_instance = None
+
+    latencies: List[float] = []
+    failures = [0]
+    deliveries = [0]
+    lock = threading.Lock()
+
+    def drive(count: int, record: bool) -> float:
+        """concurrency 个线程共同完成 count 次 send，返回总耗时（秒）"""
+        remaining = iter(range(count))
+
+        def worker() -> None:
+            while True:
+                with lock:
+                    index = next(remaining, None)
+                if index is None:
+                    return
+                started = time.perf_counter()
+                result = notify.send(f"bench {index}", "end-to-end benchmark message", timeout=deadline)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if record:
+                    results = result.get("results") or {}
+                    with lock:
+                        latencies.append(elapsed_ms)
+                        deliveries[0] += len(results)
+                        failures[0] += sum(1 for entry in results.values() if not entry.get("success"))
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    # 预热：建立连接、取得企业微信 token，不计入结果
+    if warmup:
+        drive(warmup, record=False)
+    elapsed = drive(messages, record=True)
+
+    ordered = sorted(latencies)
+    return {
+        "scenario": f"{channels}ch-c{concurrency}",
+        "channels": channels,
+        "concurrency": concurrency,
+        "messages": messages,
+        "msgs_per_s": round(messages / elapsed, 2),
+        "deliveries_per_s": round(deliveries[0] / elapsed, 2),
+        "p50_ms": round(percentile(ordered, 0.50), 2),
+        "p95_ms": round(percentile(ordered, 0.95), 2),
+        "p99_ms": round(percentile(ordered, 0.99), 2),
+        "max_ms": round(ordered[-1], 2),
+        "failures": failures[0],
+        "failure_rate": round(failures[0] / float(deliveries[0] or 1), 4),
+    }
+
+
+def check_budgets(rows: List[Dict[str, object]], budgets: Dict[str, float]) -> List[Dict[str, object]]:
+    violations = []
+    for key, limit in budgets.items():
+        scope, _, metric = key.rpartition(":")
+        matched = [row for row in rows if not scope or row["scenario"] == scope]
+        if not matched or metric not in matched[0]:
+            raise SystemExit(f"unknown budget {key!r}")
+        for row in matched:
+            value = row[metric]
+            if (value < limit) if metric in _FLOORS else (value > limit):
+                violations.append({"scenario": row["scenario"], "metric": metric, "value": value, "budget": limit})
+    return violations
+
+
+def check_baseline(rows: List[Dict[str, object]], path: str, max_regression: float) -> List[Dict[str, object]]:
+    """与基线中同名场景比较吞吐（下降）与 p95（上升）"""
+    with open(path, "r", encoding="utf-8") as handle:
+        baseline = {row["scenario"]: row for row in json.load(handle)["results"]}
+    regressions = []
+    for row in rows:
+        old = baseline.get(row["scenario"])
+        if old is None:
+            continue
+        if row["msgs_per_s"] < old["msgs_per_s"] * (1 - max_regression):
+            regressions.append({"scenario": row["scenario"], "metric": "msgs_per_s", "value": row["msgs_per_s"], "baseline": old["msgs_per_s"]})
+        if row["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            regressions.append({"scenario": row["scenario"], "metric": "p95_ms", "value": row["p95_ms"], "baseline": old["p95_ms"]})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="mcp-push end-to-end notify.send benchmark")
+    parser.add_argument("--channels", default="1,4,11", help=f"渠道数列表（默认 1,4,11，最多 {len(CHANNELS)}）")
+    parser.add_argument("--concurrency", default="1,8", help="并发调用 send 的线程数列表（默认 1,8）")
+    parser.add_argument("--messages", type=int, default=200, help="每个场景计时的 send 次数（默认 200）")
+    parser.add_argument("--warmup", type=int, default=20, help="每个场景不计入结果的 send 次数（默认 20）")
+    parser.add_argument("--latency", default="const:0", help="桩的响应延迟分布（毫秒），如 lognormal:40,0.6")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="桩返回服务商业务错误的比例")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="桩返回 429 的比例")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="429 响应的 Retry-After（秒）")
+    parser.add_argument("--seed", type=int, default=1, help="桩的随机数种子（默认 1）")
+    parser.add_argument("--deadline", type=float, default=30.0, help="单次 send 的截止时间（秒）")
+    parser.add_argument("--max-workers", type=int, help="覆盖 NOTIFY_MAX_WORKERS")
+    parser.add_argument("--channel-concurrency", type=int, help="覆盖 NOTIFY_CHANNEL_CONCURRENCY")
+    parser.add_argument("--retry-max", type=int, help="覆盖 NOTIFY_RETRY_MAX")
+    parser.add_argument("--retry-base-ms", type=float, help="覆盖 NOTIFY_RETRY_BASE_MS")
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="[SCENARIO:]METRIC=VALUE",
+        help="预算，如 p99_ms=500、11ch-c8:msgs_per_s=50；可重复",
+    )
+    parser.add_argument("--baseline", help="基线结果 JSON（本脚本先前的 --output）")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="相对基线允许的退化比例（默认 0.2）")
+    parser.add_argument("--output", help="结果 JSON 写入该文件（默认输出到 stdout）")
+    args = parser.parse_args(argv)
+    channel_counts = [min(count, len(CHANNELS)) for count in parse_list(args.channels)]
+    concurrency_levels = parse_list(args.concurrency)
+    budgets = parse_budgets(args.budget)
+
+    # 分发线程池与重试策略在首次 send 时按配置创建，需在此之前设置
+    overrides = {
+        "NOTIFY_MAX_WORKERS": args.max_workers,
+        "NOTIFY_CHANNEL_CONCURRENCY": args.channel_concurrency,
+        "NOTIFY_RETRY_MAX": args.retry_max,
+        "NOTIFY_RETRY_BASE_MS": args.retry_base_ms,
+    }
+    notify.push_config.update({key: str(value) for key, value in overrides.items() if value is not None})
+
+    behavior = Behavior(args.latency, args.error_rate, args.throttle_rate, args.retry_after, args.seed)
+    rows: List[Dict[str, object]] = []
+    with contextlib.ExitStack() as stack:
+        outbox_dir = ""
+        if notify.push_config.get("NOTIFY_OUTBOX_DIR"):
+            outbox_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="mcp-push-bench-"))
+            stack.callback(_close_outbox)
+        # 发件箱按本次运行的配置重新创建
+        notify._outbox_instance, notify._outbox_checked = None, False
+        stubs = stack.enter_context(StubProviders(behavior))
+        devnull = stack.enter_context(open(os.devnull, "w"))
+        for channels in sorted(set(channel_counts)):
+            for concurrency in concurrency_levels:
+                # 渠道函数的输出写入 stdout，测量期间丢弃
+                with contextlib.redirect_stdout(devnull):
+                    row = run_scenario(
+                        stubs, channels, concurrency, args.messages, args.warmup, args.deadline, outbox_dir
+                    )
+                rows.append(row)
+                print(
+                    f"{row['scenario']:<10} {row['msgs_per_s']:>9.1f} msg/s {row['deliveries_per_s']:>9.1f} deliveries/s "
+                    f"p50={row['p50_ms']:.1f} p95={row['p95_ms']:.1f} p99={row['p99_ms']:.1f} max={row['max_ms']:.1f} ms "
+                    f"failures={row['failures']}",
+                    file=sys.stderr,
+                )
+        requests = {f"{provider}.{outcome}": count for (provider, outcome), count in sorted(stubs.counts.items())}
+
+    violations = check_budgets(rows, budgets)
+    regressions = check_baseline(rows, args.baseline, args.max_regression) if args.baseline else []
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stub": {
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "throttle_rate": args.throttle_rate,
+            "retry_after": args.retry_after,
+            "seed": args.seed,
+        },
+        "config": {key: notify.push_config.get(key) for key in (
+            "NOTIFY_MAX_WORKERS", "NOTIFY_CHANNEL_CONCURRENCY", "NOTIFY_RETRY_MAX", "NOTIFY_RETRY_BASE_MS",
+        )},
+        "results": rows,
+        "stub_requests": requests,
+        "budgets": budgets,
+        "violations": violations,
+        "regressions": regressions,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    for violation in violations:
+        print(
+            f"BUDGET EXCEEDED: {violation['scenario']} {violation['metric']}={violation['value']} vs {violation['budget']}",
+            file=sys.stderr,
+        )
+    for regression in regressions:
+        print(
+            f"REGRESSION: {regression['scenario']} {regression['metric']}={regression['value']} (baseline {regression['baseline']})",
+            file=sys.stderr,
+        )
+    return 1 if violations or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
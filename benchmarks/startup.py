@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+冷启动基准测试
+
+每次迭代启动一个新的 src/server.py 进程，测量：
+- initialize_ms：从启动进程到收到 initialize 响应
+- first_call_ms：从启动进程到收到第一个 tools/call（console 渠道）响应
+- peak_rss_mb：进程退出时的峰值常驻内存
+另外分别以 ``-X importtime`` 导入 src.server 与 src.notify，给出导入耗时与最慢的模块。
+
+子进程只启用 console 渠道：其余渠道的环境变量被置空，工作目录为临时目录（不读取当前目录的 config.sh）。
+src/config.sh 中配置的渠道仍会收到推送。
+
+用法:
+    python benchmarks/startup.py --iterations 10 --output startup.json
+    python benchmarks/startup.py --budget first_call_ms=800 --budget peak_rss_mb=60
+
+超出预算（默认比较中位数，--budget-stat 可改为 p95 / max）时以退出码 1 结束。
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, "src", "server.py")
+NOTIFY = os.path.join(ROOT, "src", "notify.py")
+
+# 这些配置项不属于推送渠道，保留调用方环境中的值
+_KEEP_PREFIXES = ("NOTIFY_", "HITOKOTO", "CONSOLE")
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def _channel_keys() -> List[str]:
+    """从 notify.py 源码读取 push_config 的键名（不导入 notify，避免触发其加载逻辑）"""
+    with open(NOTIFY, "r", encoding="utf-8") as handle:
+        source = handle.read()
+    block = source[source.index("push_config = {"):source.index("# fmt: on")]
+    return re.findall(r"^\s*'([A-Z0-9_]+)'\s*:", block, re.MULTILINE)
+
+
+def child_env(shell_env: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    for key in _channel_keys():
+        if not key.startswith(_KEEP_PREFIXES):
+            # 置为空串而不是删除：登录 shell 环境只补充 os.environ 中不存在的键
+            env[key] = ""
+    env["CONSOLE"] = "true"
+    env["HITOKOTO"] = "false"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    if not shell_env:
+        env["MCP_PUSH_SHELL_ENV"] = "0"
+    return env
+
+
+def _rpc(request_id: int, method: str, params: Optional[dict] = None) -> bytes:
+    message = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+def measure_once(env: Dict[str, str], cwd: str, timeout: float) -> Dict[str, float]:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, SERVER],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        cwd=cwd,
+    )
+    try:
+        proc.stdin.write(_rpc(1, "initialize"))
+        proc.stdin.flush()
+        if not proc.stdout.readline():
+            raise RuntimeError("server exited before answering initialize")
+        initialized = time.perf_counter()
+
+        arguments = {"title": "startup benchmark", "content": "cold start"}
+        proc.stdin.write(_rpc(2, "tools/call", {"name": "notify_send", "arguments": arguments}))
+        proc.stdin.flush()
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError("server exited before answering tools/call")
+        called = time.perf_counter()
+        result = json.loads(line).get("result") or {}
+        if result.get("isError"):
+            raise RuntimeError(f"tools/call failed: {result.get('content')}")
+        proc.stdin.close()
+    except BaseException:
+        proc.kill()
+        raise
+
+    deadline = time.monotonic() + timeout
+    while True:
+        pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.monotonic() > deadline:
+            proc.kill()
+            pid, status, usage = os.wait4(proc.pid, 0)
+            break
+        time.sleep(0.005)
+    proc.returncode = os.waitstatus_to_exitcode(status) if hasattr(os, "waitstatus_to_exitcode") else status
+    proc.stdout.close()
+    # Linux 上 ru_maxrss 单位为 KiB，macOS 上为字节
+    rss_bytes = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return {
+        "initialize_ms": (initialized - started) * 1000,
+        "first_call_ms": (called - started) * 1000,
+        "peak_rss_mb": rss_bytes / (1024 * 1024),
+    }
+
+
+def importtime(module: str, env: Dict[str, str]) -> List[Dict[str, object]]:
+    """以 -X importtime 导入模块，返回各模块的 self / cumulative 耗时（微秒）"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=ROOT,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.strip().splitlines()[-1:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": len(match.group(3)) // 2,
+            })
+    return rows
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "min": round(ordered[0], 2),
+        "median": round(statistics.median(ordered), 2),
+        "p95": round(p95, 2),
+        "max": round(ordered[-1], 2),
+        "mean": round(statistics.fmean(ordered), 2),
+    }
+
+
+def parse_budgets(items: List[str]) -> Dict[str, float]:
+    budgets = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        try:
+            budgets[key.strip()] = float(value)
+        except ValueError:
+            raise SystemExit(f"invalid budget {item!r}, expected metric=value")
+    return budgets
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="mcp-push cold-start benchmark")
+    parser.add_argument("--iterations", type=int, default=5, help="测量次数（默认 5）")
+    parser.add_argument("--warmup", type=int, default=1, help="不计入结果的预热次数（默认 1）")
+    parser.add_argument("--top", type=int, default=15, help="importtime 中列出的最慢模块数")
+    parser.add_argument("--no-shell-env", action="store_true", help="设置 MCP_PUSH_SHELL_ENV=0，不读取登录 shell 环境")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单次进程退出的等待上限（秒）")
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="METRIC=VALUE",
+        help="预算，如 first_call_ms=800、peak_rss_mb=60、import_ms.src.notify=300；可重复",
+    )
+    parser.add_argument("--budget-stat", choices=("median", "p95", "max", "mean"), default="median")
+    parser.add_argument("--output", help="结果 JSON 写入该文件（默认输出到 stdout）")
+    args = parser.parse_args(argv)
+    budgets = parse_budgets(args.budget)
+
+    env = child_env(shell_env=not args.no_shell_env)
+    runs: List[Dict[str, float]] = []
+    imports: Dict[str, List[List[Dict[str, object]]]] = {"src.server": [], "src.notify": []}
+    with tempfile.TemporaryDirectory(prefix="mcp-push-bench-") as cwd:
+        for index in range(args.warmup + args.iterations):
+            sample = measure_once(env, cwd, args.timeout)
+            if index >= args.warmup:
+                runs.append(sample)
+                for module in imports:
+                    imports[module].append(importtime(module, env))
+            print(
+                f"[{index + 1}/{args.warmup + args.iterations}] "
+                + " ".join(f"{key}={value:.1f}" for key, value in sample.items())
+                + (" (warmup)" if index < args.warmup else ""),
+                file=sys.stderr,
+            )
+
+    metrics = {key: summarize([run[key] for run in runs]) for key in runs[0]}
+    import_ms = {}
+    slowest = {}
+    for module, samples in imports.items():
+        totals = [next((row["cumulative_us"] for row in rows if row["module"] == module), 0) / 1000 for rows in samples]
+        import_ms[module] = summarize(totals)
+        per_module: Dict[str, List[Dict[str, object]]] = {}
+        for rows in samples:
+            for row in rows:
+                per_module.setdefault(row["module"], []).append(row)
+        breakdown = [
+            {
+                "module": name,
+                "self_ms": round(statistics.median(r["self_us"] for r in rows) / 1000, 3),
+                "cumulative_ms": round(statistics.median(r["cumulative_us"] for r in rows) / 1000, 3),
+            }
+            for name, rows in per_module.items()
+        ]
+        breakdown.sort(key=lambda row: row["self_ms"], reverse=True)
+        slowest[module] = breakdown[: args.top]
+
+    flat = {key: value[args.budget_stat] for key, value in metrics.items()}
+    flat.update({f"import_ms.{module}": value[args.budget_stat] for module, value in import_ms.items()})
+    violations = []
+    for key, limit in budgets.items():
+        if key not in flat:
+            raise SystemExit(f"unknown budget metric {key!r}, choose from: {', '.join(sorted(flat))}")
+        if flat[key] > limit:
+            violations.append({"metric": key, "stat": args.budget_stat, "value": flat[key], "budget": limit})
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "shell_env": not args.no_shell_env,
+        "metrics": metrics,
+        "import_ms": import_ms,
+        "importtime": slowest,
+        "budget_stat": args.budget_stat,
+        "budgets": budgets,
+        "violations": violations,
+        "runs": [{key: round(value, 2) for key, value in run.items()} for run in runs],
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    for violation in violations:
+        print(
+            f"BUDGET EXCEEDED: {violation['metric']} {violation['stat']}={violation['value']} > {violation['budget']}",
+            file=sys.stderr,
+        )
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+本地推送服务商测试桩
+
+每个服务商一个 HTTP 服务（各自的端口，等同于真实环境中的不同主机），按真实接口的路径与
+响应格式应答：钉钉、飞书、Telegram、企业微信（gettoken + 应用消息 / 机器人）、Bark、ntfy、
+Gotify、pushplus 与自定义 Webhook；另有一个支持 AUTH 的 SMTP 服务。
+钉钉、飞书、pushplus 的地址写死在 notify.py 中，config() 通过 NOTIFY_HTTP_ROUTES 改写到桩上。
+
+每个请求按 Behavior 先等待随机延迟，再按比例返回服务商业务错误或 429（带 Retry-After）。
+延迟分布写法（毫秒）：
+    const:5  uniform:2,20  normal:20,5  lognormal:20,0.5（中位数, sigma）  exp:20（均值）
+
+用法（独立运行，打印可直接 export 的配置）:
+    python benchmarks/stubs.py --latency lognormal:40,0.6 --error-rate 0.01 --throttle-rate 0.02
+"""
+import argparse
+import json
+import random
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# notify.add_notify_function 中的渠道名，按 benchmark 取前 N 个的顺序排列
+CHANNELS = (
+    "dingding_bot",
+    "feishu_bot",
+    "telegram_bot",
+    "wecom_bot",
+    "wecom_app",
+    "bark",
+    "ntfy",
+    "gotify",
+    "pushplus_bot",
+    "custom_notify",
+    "smtp",
+)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """把延迟分布写法解析为采样函数，返回毫秒"""
+    name, _, args = str(spec).strip().partition(":")
+    try:
+        values = [float(part) for part in args.split(",")] if args else []
+    except ValueError:
+        raise ValueError(f"invalid latency spec {spec!r}")
+    name = name.lower()
+    if name == "const" and len(values) == 1:
+        return lambda rng: values[0]
+    if name == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if name == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if name == "lognormal" and len(values) == 2 and values[0] > 0:
+        import math
+
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    if name == "exp" and len(values) == 1 and values[0] > 0:
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    raise ValueError(f"invalid latency spec {spec!r}")
+
+
+class Behavior:
+    """每个请求的延迟与结果：ok / error（服务商业务错误）/ throttle（429）"""
+
+    def __init__(
+        self,
+        latency: str = "const:0",
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._sample = parse_latency(latency)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next(self) -> Tuple[float, str]:
+        with self._lock:
+            delay = self._sample(self._rng) / 1000
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return delay, "throttle"
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, "error"
+        return delay, "ok"
+
+
+def _json(status: int, body: dict) -> Tuple[int, Dict[str, str], bytes]:
+    return status, {"Content-Type": "application/json"}, json.dumps(body).encode("utf-8")
+
+
+def _text(status: int, body: str) -> Tuple[int, Dict[str, str], bytes]:
+    return status, {"Content-Type": "text/plain; charset=utf-8"}, body.encode("utf-8")
+
+
+def _respond_dingtalk(method, path, ok):
+    return _json(200, {"errcode": 0, "errmsg": "ok"} if ok else {"errcode": 310000, "errmsg": "sign not match"})
+
+
+def _respond_feishu(method, path, ok):
+    if ok:
+        return _json(200, {"StatusCode": 0, "StatusMessage": "success", "code": 0, "msg": "success", "data": {}})
+    return _json(200, {"code": 19021, "msg": "sign match fail or timestamp is not within one hour from current time"})
+
+
+def _respond_telegram(method, path, ok):
+    if not ok:
+        return _json(400, {"ok": False, "error_code": 400, "description": "Bad Request: chat not found"})
+    message_id = random.randint(1, 1 << 30)
+    return _json(200, {"ok": True, "result": {"message_id": message_id, "date": int(time.time()), "text": ""}})
+
+
+def _respond_wecom(method, path, ok):
+    if path.startswith("/cgi-bin/gettoken"):
+        return _json(200, {"errcode": 0, "errmsg": "ok", "access_token": "stub-token", "expires_in": 7200})
+    if ok:
+        return _json(200, {"errcode": 0, "errmsg": "ok", "msgid": "stub"})
+    return _json(200, {"errcode": 81013, "errmsg": "user & party & tag all invalid"})
+
+
+def _respond_bark(method, path, ok):
+    if ok:
+        return _json(200, {"code": 200, "message": "success", "timestamp": int(time.time())})
+    return _json(400, {"code": 400, "message": "failed to get device token", "timestamp": int(time.time())})
+
+
+def _respond_ntfy(method, path, ok):
+    if ok:
+        return _json(200, {"id": "stub", "time": int(time.time()), "event": "message", "topic": path.strip("/")})
+    return _json(500, {"code": 50001, "http": 500, "error": "internal server error"})
+
+
+def _respond_gotify(method, path, ok):
+    if ok:
+        return _json(200, {"id": random.randint(1, 1 << 30), "appid": 1, "message": "", "priority": 0})
+    return _json(401, {"error": "Unauthorized", "errorCode": 401, "errorDescription": "you need to provide a valid access token"})
+
+
+def _respond_pushplus(method, path, ok):
+    if ok:
+        return _json(200, {"code": 200, "msg": "请求成功", "data": "stub-message-id"})
+    return _json(200, {"code": 903, "msg": "无效的用户令牌", "data": None})
+
+
+def _respond_webhook(method, path, ok):
+    return _text(200, "ok") if ok else _text(500, "webhook failed")
+
+
+_RESPONDERS = {
+    "dingtalk": _respond_dingtalk,
+    "feishu": _respond_feishu,
+    "telegram": _respond_telegram,
+    "wecom": _respond_wecom,
+    "bark": _respond_bark,
+    "ntfy": _respond_ntfy,
+    "gotify": _respond_gotify,
+    "pushplus": _respond_pushplus,
+    "webhook": _respond_webhook,
+}
+
+
+class _ProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体分两次写出，不关闭 Nagle 时每个请求会多出约 40 毫秒的延迟确认等待
+    disable_nagle_algorithm = True
+    provider = ""
+    stubs: "StubProviders" = None  # type: ignore[assignment]
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        delay, outcome = self.stubs.behavior.next()
+        if delay:
+            time.sleep(delay)
+        self.stubs.record(self.provider, outcome)
+        if outcome == "throttle":
+            status, headers, body = _json(429, {"error": "Too Many Requests"})
+            headers["Retry-After"] = f"{self.stubs.behavior.retry_after:g}"
+        else:
+            status, headers, body = _RESPONDERS[self.provider](self.command, self.path, outcome == "ok")
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = _handle
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """最小 SMTP 服务：EHLO / AUTH PLAIN|LOGIN / MAIL / RCPT / DATA / RSET / NOOP / QUIT"""
+
+    stubs: "StubProviders" = None  # type: ignore[assignment]
+    disable_nagle_algorithm = True
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self) -> None:
+        self._reply("220 stub ESMTP ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self._reply("250-stub")
+                self._reply("250-AUTH PLAIN LOGIN")
+                self._reply("250 8BITMIME")
+            elif verb == "HELO":
+                self._reply("250 stub")
+            elif verb == "AUTH":
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].upper() == "LOGIN":
+                    for prompt in ("VXNlcm5hbWU6", "UGFzc3dvcmQ6"):
+                        self._reply(f"334 {prompt}")
+                        self.rfile.readline()
+                elif len(parts) == 2:
+                    self._reply("334 ")
+                    self.rfile.readline()
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                delay, outcome = self.stubs.behavior.next()
+                if delay:
+                    time.sleep(delay)
+                self.stubs.record("smtp", outcome)
+                if outcome == "ok":
+                    self._reply("250 OK queued")
+                elif outcome == "throttle":
+                    self._reply("451 4.7.1 Too many messages, slow down")
+                else:
+                    self._reply("554 5.7.1 Message rejected")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class StubProviders:
+    """在本机随机端口上启动全部服务商桩；config() 生成让 notify 指向这些桩的 push_config"""
+
+    def __init__(self, behavior: Optional[Behavior] = None, host: str = "127.0.0.1"):
+        self.behavior = behavior or Behavior()
+        self.host = host
+        self.urls: Dict[str, str] = {}
+        self.smtp_address = ""
+        self.counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self._servers: List[socketserver.BaseServer] = []
+
+    def record(self, provider: str, outcome: str) -> None:
+        with self._counts_lock:
+            self.counts[(provider, outcome)] += 1
+
+    def start(self) -> "StubProviders":
+        for provider in _RESPONDERS:
+            handler = type(f"{provider}Handler", (_ProviderHandler,), {"provider": provider, "stubs": self})
+            server = ThreadingHTTPServer((self.host, 0), handler)
+            server.daemon_threads = True
+            self._serve(server)
+            self.urls[provider] = f"http://{self.host}:{server.server_address[1]}"
+        smtp = _ThreadingTCPServer((self.host, 0), type("SMTPHandler", (_SMTPHandler,), {"stubs": self}))
+        self._serve(smtp)
+        self.smtp_address = f"{self.host}:{smtp.server_address[1]}"
+        return self
+
+    def _serve(self, server: socketserver.BaseServer) -> None:
+        self._servers.append(server)
+        threading.Thread(target=server.serve_forever, name="stub-provider", daemon=True).start()
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+
+    def __enter__(self) -> "StubProviders":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def config(self, channels: Iterable[str] = CHANNELS) -> Dict[str, str]:
+        """指定渠道的 push_config（含 NOTIFY_HTTP_ROUTES），未列出的渠道不配置"""
+        urls = self.urls
+        per_channel = {
+            "dingding_bot": {"DD_BOT_TOKEN": "stub-token", "DD_BOT_SECRET": "SECstub"},
+            "feishu_bot": {"FSKEY": "stub-hook"},
+            "telegram_bot": {"TG_BOT_TOKEN": "1:stub", "TG_USER_ID": "1", "TG_API_HOST": urls["telegram"]},
+            "wecom_bot": {"QYWX_KEY": "stub-key", "QYWX_ORIGIN": urls["wecom"]},
+            "wecom_app": {"QYWX_AM": "corp,secret,@all,1000002", "QYWX_ORIGIN": urls["wecom"]},
+            "bark": {"BARK_PUSH": f"{urls['bark']}/stub-device"},
+            "ntfy": {"NTFY_URL": urls["ntfy"], "NTFY_TOPIC": "stub"},
+            "gotify": {"GOTIFY_URL": urls["gotify"], "GOTIFY_TOKEN": "stub"},
+            "pushplus_bot": {"PUSH_PLUS_TOKEN": "stub"},
+            "custom_notify": {"WEBHOOK_URL": f"{urls['webhook']}/hook?title=$title", "WEBHOOK_METHOD": "POST"},
+            "smtp": {
+                "SMTP_SERVER": self.smtp_address,
+                "SMTP_SSL": "false",
+                "SMTP_EMAIL": "bench@example.com",
+                "SMTP_PASSWORD": "stub",
+                "SMTP_NAME": "bench",
+            },
+        }
+        config: Dict[str, str] = {}
+        for channel in channels:
+            config.update(per_channel[channel])
+        config["NOTIFY_HTTP_ROUTES"] = ",".join([
+            f"https://oapi.dingtalk.com={urls['dingtalk']}",
+            f"https://open.feishu.cn={urls['feishu']}",
+            f"https://www.pushplus.plus={urls['pushplus']}",
+        ])
+        return config
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="mcp-push local provider stubs")
+    parser.add_argument("--latency", default="const:0", help="延迟分布（毫秒），如 lognormal:40,0.6")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回服务商业务错误的比例")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="返回 429 的比例")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="429 响应的 Retry-After（秒）")
+    parser.add_argument("--seed", type=int, help="随机数种子")
+    args = parser.parse_args(argv)
+
+    behavior = Behavior(args.latency, args.error_rate, args.throttle_rate, args.retry_after, args.seed)
+    with StubProviders(behavior) as stubs:
+        for key, value in stubs.config().items():
+            print(f"export {key}={json.dumps(value)}")
+        print("# Ctrl-C 退出", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
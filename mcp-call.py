@@ -2,16 +2,149 @@
 """
 MCP 工具调用包装器
 用法: mcp-call.py <server> <tool> <args...>
+
+通过 Unix 域套接字把请求交给常驻的 mcp-push 守护进程（未运行时自动启动），
+避免每次调用都冷启动 server.py。守护进程不可用时退回为直接启动 server.py。
+
+环境变量:
+  MCP_PUSH_SOCKET   守护进程套接字路径
+  MCP_PUSH_SERVER   server.py 路径（自动启动守护进程、回退时使用）
+  MCP_PUSH_DAEMON   设为 0 时不使用守护进程，每次直接启动 server.py
+  MCP_CALL_TIMING   设为 1 时在 stderr 输出调用耗时（毫秒）
 """
+import os
+import shutil
+import socket
 import subprocess
 import sys
 import json
+import tempfile
+import time
+
+# 旧版安装位置，找不到其它 server.py 时使用
+LEGACY_SERVER = "/home/sun/mcp-push/src/server.py"
+CALL_TIMEOUT = 30
+# 等待守护进程应答的时间，需长于推送截止时间（NOTIFY_DEADLINE，默认 30 秒）
+REPLY_TIMEOUT = 60
+START_TIMEOUT = 10
+
+
+def socket_path():
+    """与 src/daemon.py 的 default_socket_path() 保持一致"""
+    path = os.environ.get("MCP_PUSH_SOCKET")
+    if path:
+        return os.path.expanduser(path)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "mcp-push.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return os.path.join(tempfile.gettempdir(), f"mcp-push-{uid}.sock")
+
+
+def server_command():
+    """返回启动 server 的命令前缀"""
+    configured = os.environ.get("MCP_PUSH_SERVER")
+    if configured:
+        return [sys.executable, os.path.expanduser(configured)]
+    sibling = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "server.py")
+    if os.path.exists(sibling):
+        return [sys.executable, sibling]
+    installed = shutil.which("mcp-push")
+    if installed:
+        return [installed]
+    return ["python3", LEGACY_SERVER]
+
+
+def connect(path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CALL_TIMEOUT)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+    return client
+
+
+def start_daemon(path):
+    """在后台启动守护进程并等待套接字可连接"""
+    command = server_command()
+    if command[-1].endswith(".py") and not os.path.exists(command[-1]):
+        return None
+    try:
+        subprocess.Popen(
+            command + ["--daemon", "--socket", path],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        return None
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        client = connect(path)
+        if client is not None:
+            return client
+        time.sleep(0.02)
+    return None
+
+
+def _error_response(request, message):
+    return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": message}}
+
+
+def call_daemon(request):
+    """
+    经守护进程调用。连接或发送失败时返回 None（由调用方改为直接启动 server.py）；
+    请求发出后出错时返回错误响应而不是 None：守护进程可能已经推送，重新发送会造成重复推送。
+    """
+    if not hasattr(socket, "AF_UNIX") or os.environ.get("MCP_PUSH_DAEMON") == "0":
+        return None
+    path = socket_path()
+    client = connect(path) or start_daemon(path)
+    if client is None:
+        return None
+    with client, client.makefile("rwb") as stream:
+        try:
+            stream.write(json.dumps(request).encode("utf-8") + b"\n")
+            stream.flush()
+        except OSError:
+            return None
+        try:
+            client.settimeout(REPLY_TIMEOUT)
+            line = stream.readline()
+        except OSError as exc:
+            return _error_response(request, f"守护进程应答失败（请求可能已处理，未重新发送）：{exc}")
+    if not line:
+        return _error_response(request, "守护进程未应答即关闭连接（请求可能已处理，未重新发送）")
+    return json.loads(line)
+
+
+def call_stdio(request):
+    """直接启动 server.py 处理单个请求"""
+    result = subprocess.run(
+        server_command(),
+        input=json.dumps(request),
+        capture_output=True,
+        text=True,
+        timeout=CALL_TIMEOUT
+    )
+    if result.returncode == 0:
+        try:
+            return json.loads(result.stdout)
+        except ValueError:
+            pass
+    print(f"MCP 调用失败: {result.stderr}", file=sys.stderr)
+    return None
+
 
 def main():
     if len(sys.argv) < 3:
         print("用法: mcp-call.py <server> <tool> <args...>", file=sys.stderr)
         sys.exit(1)
 
+    started = time.monotonic()
     server = sys.argv[1]
     tool = sys.argv[2]
     args = sys.argv[3:]
@@ -49,27 +182,21 @@ def main():
 
     # 调用 MCP 服务器
     try:
-        result = subprocess.run(
-            ["python3", f"/home/sun/mcp-push/src/server.py"],
-            input=json.dumps(request),
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        response = call_daemon(request)
+        if response is None:
+            response = call_stdio(request)
+
+        if os.environ.get("MCP_CALL_TIMING") == "1":
+            print(f"{(time.monotonic() - started) * 1000:.1f} ms", file=sys.stderr)
+
+        if response is not None and "result" in response:
+            content = response["result"].get("content", [])
+            if content and isinstance(content, list):
+                print(content[0].get("text", ""))
+            sys.exit(0)
 
-        if result.returncode == 0:
-            # 解析响应
-            try:
-                response = json.loads(result.stdout)
-                if "result" in response:
-                    content = response["result"].get("content", [])
-                    if content and isinstance(content, list):
-                        print(content[0].get("text", ""))
-                    sys.exit(0)
-            except:
-                pass
-
-        print(f"MCP 调用失败: {result.stderr}", file=sys.stderr)
+        if response is not None:
+            print(f"MCP 调用失败: {response.get('error')}", file=sys.stderr)
         sys.exit(1)
 
     except Exception as e:
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+notify_event 进度更新的合并（按 run_id 节流）
+
+同一 run_id 的第一条 update 立即推送并开启一个时间窗口；窗口内到达的 update 只缓存最新一条并计数，
+窗口结束时合并为一条摘要推送（最新进度 + 被合并的条数），有摘要推送时窗口顺延。
+start / end / error 到达时先立即推送缓存的摘要并关闭窗口。
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _RunWindow:
+    __slots__ = ("pending", "collapsed", "timer", "send_lock")
+
+    def __init__(self):
+        self.pending: Optional[Dict[str, Any]] = None
+        self.collapsed = 0
+        self.timer: Optional[threading.Timer] = None
+        self.send_lock = threading.Lock()
+
+
+class EventCoalescer:
+    """按 run_id 合并 update 事件；deliver(envelope) 负责实际推送"""
+
+    def __init__(self, window: float, deliver: Callable[[Dict[str, Any]], Any]):
+        self.window = window
+        self._deliver = deliver
+        self._runs: Dict[str, _RunWindow] = {}
+        self._lock = threading.Lock()
+
+    def offer(self, envelope: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        提交一条 update 事件。
+        窗口未开启时返回 None，调用方应立即推送；否则缓存该事件并返回合并信息。
+        """
+        run_id = envelope["run_id"]
+        with self._lock:
+            state = self._runs.get(run_id)
+            if state is None:
+                state = _RunWindow()
+                self._runs[run_id] = state
+                self._start_timer_locked(run_id, state)
+                return None
+            state.pending = envelope
+            state.collapsed += 1
+            return {"pending_updates": state.collapsed}
+
+    def flush(self, run_id: str) -> None:
+        """立即推送 run_id 缓存的摘要并关闭窗口"""
+        with self._lock:
+            state = self._runs.pop(run_id, None)
+        if state is None:
+            return
+        if state.timer is not None:
+            state.timer.cancel()
+        with state.send_lock:
+            if state.pending is not None:
+                self._deliver(self._digest(state))
+
+    def flush_all(self) -> None:
+        with self._lock:
+            run_ids = list(self._runs)
+        for run_id in run_ids:
+            self.flush(run_id)
+
+    def _start_timer_locked(self, run_id: str, state: _RunWindow) -> None:
+        state.timer = threading.Timer(self.window, self._expire, args=(run_id, state))
+        state.timer.daemon = True
+        state.timer.start()
+
+    def _expire(self, run_id: str, state: _RunWindow) -> None:
+        with state.send_lock:
+            with self._lock:
+                if self._runs.get(run_id) is not state:
+                    return  # 已被 flush 接管
+                if state.pending is None:
+                    del self._runs[run_id]
+                    return
+                digest = self._digest(state)
+                self._start_timer_locked(run_id, state)
+            self._deliver(digest)
+
+    @staticmethod
+    def _digest(state: _RunWindow) -> Dict[str, Any]:
+        """由最新一条缓存事件生成摘要，并清空缓存"""
+        latest = dict(state.pending or {})
+        collapsed = state.collapsed
+        state.pending = None
+        state.collapsed = 0
+        data = dict(latest.get("data") or {})
+        data["coalesced_updates"] = collapsed
+        latest["data"] = data
+        latest["message"] = f"{latest.get('message', '')}\n\n（合并了 {collapsed} 条进度更新）"
+        return latest
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+常驻守护进程：在 Unix 域套接字上提供 MCP 服务。
+
+钩子脚本每次调用都冷启动一个 server.py 进程，连接池、线程池、令牌缓存等都随进程丢弃。
+守护进程只保留一个预热过的 MCPServer，客户端（mcp-call.py）连接套接字，
+按行发送 JSON-RPC 请求、按行读取响应。
+
+- 每个连接一个线程，一个连接上可以发送多条请求
+- 套接字权限为 0600；启动时清理上次异常退出遗留的套接字文件
+- 同一套接字只允许一个守护进程（文件锁），并发自动启动时后来者直接退出
+- 空闲超过 idle_timeout 秒（0 表示不限）或收到 SIGTERM/SIGINT 时退出，退出前推送缓存的进度摘要并等待后台投递
+- 配置与代码在启动时加载一次：config.sh（src/ 与工作目录下）或 src/*.py 变化后，守护进程在空闲时退出，
+  下一次调用由客户端启动新的守护进程，使修改与升级生效
+"""
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 不支持 Unix 域套接字守护模式
+    fcntl = None
+
+try:
+    from .debug import debug_log
+    from .jsoncodec import dumps, loads
+except ImportError:  # 直接以脚本运行
+    from debug import debug_log
+    from jsoncodec import dumps, loads
+
+
+def default_socket_path() -> str:
+    """MCP_PUSH_SOCKET，或 $XDG_RUNTIME_DIR/mcp-push.sock，或 /tmp/mcp-push-<uid>.sock"""
+    path = os.environ.get("MCP_PUSH_SOCKET")
+    if path:
+        return os.path.expanduser(path)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "mcp-push.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return os.path.join(tempfile.gettempdir(), f"mcp-push-{uid}.sock")
+
+
+def _watched_files() -> list:
+    """守护进程启动后修改即需重启才能生效的文件：config.sh 与 src/*.py"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    files = [os.path.join(here, "config.sh"), os.path.join(os.getcwd(), "config.sh")]
+    try:
+        files += sorted(os.path.join(here, name) for name in os.listdir(here) if name.endswith(".py"))
+    except OSError:
+        pass
+    return files
+
+
+def _fingerprint(files: list) -> tuple:
+    stamps = []
+    for path in files:
+        try:
+            stamps.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamps.append(-1)
+    return tuple(stamps)
+
+
+def _socket_alive(path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(1.0)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        daemon: "_DaemonServer" = self.server  # type: ignore[assignment]
+        daemon.touch(+1)
+        try:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = loads(line)
+                except ValueError as exc:
+                    payload = dumps({
+                        "jsonrpc": "2.0",
+                        "id": None,
+                        "error": {"code": -32700, "message": f"Parse error: {exc}"},
+                    })
+                else:
+                    payload = daemon.mcp.handle_message(request)
+                if payload is not None:
+                    self.wfile.write(payload + b"\n")
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            daemon.touch(-1)
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, mcp):
+        self.mcp = mcp
+        self.active = 0
+        self.last_activity = time.monotonic()
+        self._activity_lock = threading.Lock()
+        super().__init__(path, _Handler)
+
+    def touch(self, delta: int) -> None:
+        with self._activity_lock:
+            self.active += delta
+            self.last_activity = time.monotonic()
+
+    def idle_for(self) -> float:
+        with self._activity_lock:
+            return 0.0 if self.active else time.monotonic() - self.last_activity
+
+
+def serve(mcp, path: Optional[str] = None, idle_timeout: float = 0.0, watch: bool = True) -> int:
+    """
+    在 path 上运行守护进程，直到空闲超时、收到终止信号或（watch 为 True 时）config.sh / 代码变化；
+    已有守护进程在运行时返回 0
+    """
+    if fcntl is None:
+        print("mcp-push: daemon mode requires Unix domain sockets", file=sys.stderr)
+        return 1
+    path = path or default_socket_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lock_handle = open(path + ".lock", "a")
+    try:
+        fcntl.flock(lock_handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        debug_log(f"mcp-push: daemon already running on {path}")
+        lock_handle.close()
+        return 0
+    if os.path.exists(path):
+        if _socket_alive(path):
+            lock_handle.close()
+            return 0
+        os.unlink(path)  # 上次异常退出遗留的套接字
+
+    old_umask = os.umask(0o177)
+    try:
+        server = _DaemonServer(path, mcp)
+    finally:
+        os.umask(old_umask)
+
+    stop = threading.Event()
+
+    def request_stop(*_):
+        stop.set()
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, request_stop)
+
+    watched = _watched_files() if watch else []
+    loaded = _fingerprint(watched)
+    threading.Thread(target=server.serve_forever, name="mcp-daemon", daemon=True).start()
+    mcp.preload_notify()
+    debug_log(f"mcp-push: daemon listening on {path} pid={os.getpid()} idle_timeout={idle_timeout}")
+    try:
+        while not stop.wait(1.0):
+            idle = server.idle_for()
+            if idle_timeout and idle >= idle_timeout:
+                debug_log(f"mcp-push: daemon idle for {idle_timeout:.0f} s, exiting")
+                break
+            if watched and idle > 0 and _fingerprint(watched) != loaded:
+                debug_log("mcp-push: config.sh or code changed, exiting so the next call starts a fresh daemon")
+                break
+    finally:
+        server.shutdown()
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        if mcp.coalescer is not None:
+            mcp.coalescer.flush_all()
+        mcp.drain_deliveries()
+        lock_handle.close()
+    return 0
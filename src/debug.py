@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+调试日志：设置 MCP_PUSH_DEBUG=1 后追加写入 MCP_PUSH_DEBUG_PATH（默认 /tmp/mcp-push.debug.log）。
+stdout 被 MCP 协议占用，诊断信息统一写到这里。
+"""
+import os
+
+DEBUG_PATH = os.environ.get("MCP_PUSH_DEBUG_PATH", "/tmp/mcp-push.debug.log")
+DEBUG_ENABLED = os.environ.get("MCP_PUSH_DEBUG") not in (None, "", "0", "false", "False")
+
+
+def debug_log(message: str) -> None:
+    if not DEBUG_ENABLED:
+        return
+    try:
+        with open(DEBUG_PATH, "a", encoding="utf-8") as handle:
+            handle.write(message + "\n")
+    except Exception:
+        pass
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+后台投递记录
+
+async 模式下 notify_send / notify_event 立即返回 delivery_id，投递在后台继续；
+DeliveryStore 记录每次投递的整体状态与各渠道状态、耗时，供 notify_status 查询。
+已完成的记录按存活时间与数量上限淘汰，进行中的记录不会被淘汰。
+"""
+
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def _utc_now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class DeliveryStore:
+    """线程安全、有界的投递记录表"""
+
+    def __init__(self, max_records: int = 1000, max_age: float = 3600.0):
+        self.max_records = max(1, int(max_records))
+        self.max_age = max(0.0, float(max_age))
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # delivery_id -> 完成时刻（monotonic），按完成先后排列
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, tool: str, meta: Optional[Dict[str, Any]] = None) -> str:
+        delivery_id = f"dlv-{uuid.uuid4().hex[:12]}"
+        record = {
+            "delivery_id": delivery_id,
+            "tool": tool,
+            "status": "pending",
+            "created_at": _utc_now(),
+            "finished_at": None,
+            "channels": {},
+        }
+        if meta:
+            record.update(meta)
+        with self._lock:
+            self._evict_locked()
+            self._records[delivery_id] = record
+        return delivery_id
+
+    def update_channel(
+        self, delivery_id: str, channel: str, state: str, info: Optional[Dict[str, Any]] = None
+    ) -> None:
+        with self._lock:
+            record = self._records.get(delivery_id)
+            if record is None:
+                return
+            if record["status"] == "pending":
+                record["status"] = "running"
+            entry = record["channels"].setdefault(channel, {})
+            entry["state"] = state
+            if info:
+                entry.update(info)
+
+    def complete(self, delivery_id: str, status: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            record = self._records.get(delivery_id)
+            if record is None:
+                return
+            record["status"] = status
+            record["finished_at"] = _utc_now()
+            record["result"] = result
+            self._finished[delivery_id] = time.monotonic()
+            self._evict_locked()
+
+    def get(self, delivery_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._evict_locked()
+            record = self._records.get(delivery_id)
+            return copy.deepcopy(record) if record is not None else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def _evict_locked(self) -> None:
+        if self.max_age:
+            deadline = time.monotonic() - self.max_age
+            while self._finished:
+                delivery_id, finished = next(iter(self._finished.items()))
+                if finished > deadline:
+                    break
+                self._drop_locked(delivery_id)
+        while len(self._records) > self.max_records and self._finished:
+            self._drop_locked(next(iter(self._finished)))
+
+    def _drop_locked(self, delivery_id: str) -> None:
+        self._finished.pop(delivery_id, None)
+        self._records.pop(delivery_id, None)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+常驻的渠道分发线程池。
+
+工作线程跨 send() 调用复用，全局并发受 max_workers 限制；每个渠道最多同时占用
+channel_concurrency 个线程（舱壁隔离），同一渠道多出的任务在该渠道自己的队列中等待，
+因此某个卡死的渠道（如 smtp 登录挂起）不会占满其它渠道的线程。
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Set, Tuple
+
+
+class ChannelDispatcher:
+    """带全局并发上限与渠道舱壁的持久工作线程池"""
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        channel_concurrency: int = 2,
+        idle_timeout: float = 60.0,
+        name: str = "notify-worker",
+    ):
+        self.max_workers = max(1, int(max_workers))
+        self.channel_concurrency = max(1, int(channel_concurrency))
+        self.idle_timeout = idle_timeout
+        self.name = name
+        self._cond = threading.Condition()
+        # 已获得渠道配额、等待空闲线程的任务
+        self._ready: Deque[Tuple[str, tuple]] = deque()
+        # 渠道配额已满、在渠道队列中等待的任务
+        self._pending: Dict[str, Deque[tuple]] = {}
+        self._active: Dict[str, int] = {}
+        self._threads: Set[threading.Thread] = set()
+        self._idle = 0
+        self._busy = 0
+        self._spawned = 0
+        self._submitted = 0
+        self._completed = 0
+        self._shutdown = False
+
+    def submit(self, channel: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        future: Future = Future()
+        task = (future, fn, args, kwargs)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("dispatcher has been shut down")
+            self._submitted += 1
+            if self._active.get(channel, 0) < self.channel_concurrency:
+                self._active[channel] = self._active.get(channel, 0) + 1
+                self._ready.append((channel, task))
+                self._wake_locked()
+            else:
+                self._pending.setdefault(channel, deque()).append(task)
+        return future
+
+    def _wake_locked(self) -> None:
+        if len(self._ready) > self._idle and len(self._threads) < self.max_workers:
+            self._spawned += 1
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"{self.name}-{self._spawned}",
+                daemon=True,
+            )
+            self._threads.add(thread)
+            thread.start()
+        else:
+            self._cond.notify()
+
+    def _worker(self) -> None:
+        current = threading.current_thread()
+        while True:
+            with self._cond:
+                while not self._ready:
+                    if self._shutdown:
+                        self._threads.discard(current)
+                        return
+                    self._idle += 1
+                    notified = self._cond.wait(self.idle_timeout)
+                    self._idle -= 1
+                    if not notified and not self._ready:
+                        self._threads.discard(current)
+                        return
+                channel, task = self._ready.popleft()
+                self._busy += 1
+
+            future, fn, args, kwargs = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as exc:
+                    future.set_exception(exc)
+
+            with self._cond:
+                self._busy -= 1
+                self._completed += 1
+                queue = self._pending.get(channel)
+                if queue:
+                    # 渠道配额直接转交给该渠道排队中的下一个任务
+                    self._ready.append((channel, queue.popleft()))
+                    if not queue:
+                        del self._pending[channel]
+                else:
+                    self._active[channel] -= 1
+                    if not self._active[channel]:
+                        del self._active[channel]
+
+    def stats(self) -> Dict[str, Any]:
+        """队列深度与线程利用率"""
+        with self._cond:
+            pending = {name: len(queue) for name, queue in self._pending.items()}
+            return {
+                "workers": len(self._threads),
+                "max_workers": self.max_workers,
+                "busy": self._busy,
+                "idle": self._idle,
+                "utilization": round(self._busy / self.max_workers, 3),
+                "queue_depth": len(self._ready) + sum(pending.values()),
+                "channels": {
+                    name: {"active": active, "pending": pending.get(name, 0)}
+                    for name, active in self._active.items()
+                },
+                "submitted": self._submitted,
+                "completed": self._completed,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._cond:
+            self._shutdown = True
+            threads = list(self._threads)
+            self._cond.notify_all()
+        if wait:
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+stdio 传输的增量帧解析器。
+
+同时支持两种分帧方式，按消息首行自动识别：
+- ``Content-Length: N\\r\\n\\r\\n<body>``（LSP 风格，首行形如 ``Name: value``）
+- 按行分隔的 JSON（其余情况）
+
+- 以大块（默认 64 KiB）读取到一个缓冲区，循环解析，不递归；连续空行只是被跳过
+- 消息体直接以缓冲区切片交给 JSON 解码器（见 jsoncodec），不经过额外的 bytes/str 转换
+- 格式错误的帧抛出 FrameError，解析位置已越过该帧，下次调用从下一帧继续（不失去同步）
+"""
+import re
+from typing import Any, Optional, Tuple
+
+try:
+    from .jsoncodec import loads
+except ImportError:  # 直接以脚本运行
+    from jsoncodec import loads
+
+_MAX_HEADER_BYTES = 8 * 1024
+_VIEW_THRESHOLD = 64 * 1024
+_JSON_START = b"{["
+_FAST_FRAME = re.compile(rb"[ \t\r\n]*((?:content-length:[ \t]*(\d{1,10})\r?\n\r?\n)?)", re.IGNORECASE)
+_HEADER_START = re.compile(rb"[A-Za-z0-9-]+[ \t]*:")
+_HEADER_END = re.compile(rb"\r?\n\r?\n")
+_CONTENT_LENGTH = re.compile(rb"(?<![A-Za-z0-9-])content-length[ \t]*:[ \t]*([^\s;]*)", re.IGNORECASE)
+
+
+class FrameError(ValueError):
+    """格式错误的帧；framed 表示该帧是否为 Content-Length 分帧"""
+
+    def __init__(self, message: str, framed: bool):
+        super().__init__(message)
+        self.framed = framed
+
+
+class FrameReader:
+    """从二进制流中逐条读取 JSON-RPC 消息"""
+
+    def __init__(self, stream, chunk_size: int = 64 * 1024, max_frame: int = 10 * 1024 * 1024):
+        self._stream = stream
+        # read1 在有数据时立即返回，不会为了凑满 chunk_size 而阻塞
+        self._read = getattr(stream, "read1", stream.read)
+        self.chunk_size = chunk_size
+        self.max_frame = max_frame
+        self._buf = bytearray()
+        self._pos = 0
+        self._scan = 0          # 按行分帧时，已确认不含换行符的位置，避免重复扫描
+        self._skip = 0          # 丢弃超长 Content-Length 帧剩余的字节数
+        self._skip_line = False  # 丢弃超长行直到下一个换行符
+        self._want = 0          # 当前 Content-Length 帧还缺少的字节数
+        self._eof = False
+
+    def read(self) -> Optional[Tuple[Any, bool]]:
+        """
+        返回 (消息, 是否为 Content-Length 分帧)；输入结束时返回 None。
+        格式错误的帧抛出 FrameError，之后可继续调用。
+        """
+        while True:
+            frame = self._parse()
+            if frame is not None:
+                return frame
+            if self._eof:
+                return self._finish()
+            self._fill(self._want)
+            self._want = 0
+
+    # ------------------------------------------------------------------ 缓冲区
+
+    def _fill(self, size: int) -> None:
+        if self._pos and self._pos >= len(self._buf) // 2:
+            # 已解析的部分超过一半时再整体前移，摊销拷贝成本
+            del self._buf[:self._pos]
+            self._scan = max(0, self._scan - self._pos)
+            self._pos = 0
+        if size > self.chunk_size:
+            # Content-Length 帧剩余的消息体：长度已知，一次读满，不必按块往返
+            data = self._stream.read(size)
+        else:
+            data = self._read(self.chunk_size)
+        if not data:
+            self._eof = True
+        else:
+            self._buf += data
+
+    # ------------------------------------------------------------------ 解析
+
+    def _parse(self) -> Optional[Tuple[Any, bool]]:
+        if self._skip or self._skip_line:
+            if not self._discard():
+                return None
+        buf = self._buf
+        # 一次匹配跳过帧之间的空白（含连续空行），并识别最常见的只有 Content-Length 的头部
+        match = _FAST_FRAME.match(buf, self._pos)
+        length = match.group(2)
+        if length is not None:
+            body_start = match.end()
+            body_end = body_start + int(length)
+            if body_end <= len(buf) and body_end - body_start <= self.max_frame:
+                self._pos = self._scan = body_end
+                return self._decode(body_start, body_end, framed=True), True
+        pos = self._pos = match.start(1)
+        if pos >= len(buf):
+            return None
+        if buf[pos] not in _JSON_START and _HEADER_START.match(buf, pos):
+            return self._parse_framed(pos)
+        # 其余内容（包括无法识别的行）按行处理，出错时丢弃到行尾
+        newline = buf.find(b"\n", max(pos, self._scan))
+        if newline < 0:
+            self._scan = len(buf)
+            if len(buf) - pos > self.max_frame:
+                self._pos = len(buf)
+                self._skip_line = True
+                raise FrameError(f"Line exceeds {self.max_frame} bytes", framed=False)
+            return None
+        self._pos = self._scan = newline + 1
+        return self._decode(pos, newline, framed=False), False
+
+    def _discard(self) -> bool:
+        """丢弃出错帧的剩余部分；丢弃完毕返回 True"""
+        buf = self._buf
+        if self._skip:
+            dropped = min(self._skip, len(buf) - self._pos)
+            self._pos += dropped
+            self._skip -= dropped
+            if self._skip:
+                return False
+        if self._skip_line:
+            newline = buf.find(b"\n", self._pos)
+            if newline < 0:
+                self._pos = len(buf)
+                return False
+            self._pos = newline + 1
+            self._skip_line = False
+        return True
+
+    def _parse_framed(self, start: int) -> Optional[Tuple[Any, bool]]:
+        buf = self._buf
+        header = _HEADER_END.search(buf, start)
+        if header is None:
+            if len(buf) - start > _MAX_HEADER_BYTES:
+                self._pos = len(buf)
+                self._skip_line = True
+                raise FrameError("Header block too large or not terminated", framed=True)
+            return None
+
+        body_start = header.end()
+        length = _CONTENT_LENGTH.search(buf, start, header.start())
+        if length is None or not length.group(1).isdigit():
+            self._pos = body_start
+            raise FrameError("Missing or invalid Content-Length header", framed=True)
+        length = int(length.group(1))
+        if length > self.max_frame:
+            self._pos = body_start
+            self._skip = length
+            raise FrameError(f"Invalid Content-Length: {length}", framed=True)
+
+        body_end = body_start + length
+        if body_end > len(buf):
+            if self._eof:
+                self._pos = len(buf)
+                raise FrameError("Connection closed before reading full frame", framed=True)
+            # 下次一次读够剩余部分，而不是按块多次读取
+            self._want = body_end - len(buf)
+            return None
+        self._pos = self._scan = body_end
+        return self._decode(body_start, body_end, framed=True), True
+
+    def _finish(self) -> Optional[Tuple[Any, bool]]:
+        """输入结束：最后一行没有换行符时仍按一条消息处理"""
+        if self._skip or self._skip_line or self._pos >= len(self._buf):
+            return None
+        buf = self._buf
+        start = self._pos
+        self._pos = len(buf)
+        remainder = buf[start:]
+        if remainder.strip() == b"":
+            return None
+        if not _HEADER_START.match(remainder):
+            return self._decode(start, len(buf), framed=False), False
+        raise FrameError("Connection closed before headers complete", framed=True)
+
+    def _decode(self, start: int, end: int, framed: bool) -> Any:
+        try:
+            if end - start < _VIEW_THRESHOLD:
+                return loads(self._buf[start:end])
+            # 大消息直接从缓冲区的 memoryview 切片解码，不产生中间 bytes 副本；
+            # 视图用完立即释放，之后缓冲区才能继续扩展或前移
+            view = memoryview(self._buf)
+            try:
+                return loads(view[start:end])
+            finally:
+                view.release()
+        except ValueError as exc:
+            raise FrameError(str(exc), framed=framed) from None
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+按主机复用的 HTTP 连接池。
+
+每个主机（scheme + host + port）对应一个 keep-alive 的 requests.Session，
+同一主机上的所有渠道（如 wecom_app 与 wecom_bot）共用同一个连接池。
+新建连接的耗时（TCP + TLS 握手）按线程记录，见 last_connect_ms()。
+"""
+import http.cookiejar
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# 当前线程最近一次请求新建连接的耗时；复用已有连接时为 None
+_connect_timing = threading.local()
+
+
+def last_connect_ms() -> Optional[float]:
+    """当前线程最近一次请求的建连耗时（毫秒），复用长连接时返回 None"""
+    return getattr(_connect_timing, "value", None)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self) -> None:
+        started = time.perf_counter()
+        super().connect()
+        _connect_timing.value = (time.perf_counter() - started) * 1000
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self) -> None:
+        started = time.perf_counter()
+        super().connect()
+        _connect_timing.value = (time.perf_counter() - started) * 1000
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """新建的连接记录建连耗时（经代理的连接不记录）"""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class HostSessionPool:
+    """按主机划分的会话池。
+
+    - ``pool_maxsize``: 单主机最大连接数，超出时请求排队等待空闲连接
+    - ``idle_timeout``: 会话空闲超过该秒数后被关闭回收
+    - ``keep_alive``: 为 False 时每个请求带 ``Connection: close``
+    - ``max_hosts``: 同时保留的主机会话上限，超出时淘汰最久未使用的
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 4,
+        idle_timeout: float = 90.0,
+        keep_alive: bool = True,
+        max_hosts: int = 32,
+    ):
+        self.pool_maxsize = max(1, int(pool_maxsize))
+        self.idle_timeout = max(0.0, float(idle_timeout))
+        self.keep_alive = keep_alive
+        self.max_hosts = max(1, int(max_hosts))
+        self._sessions: Dict[Tuple[str, str], Any] = {}
+        self._last_used: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._created = 0
+        self._evicted = 0
+
+    @staticmethod
+    def host_key(url: str) -> Tuple[str, str]:
+        parts = urllib.parse.urlsplit(url)
+        return parts.scheme.lower(), parts.netloc.lower()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        # 渠道之间不共享 cookie
+        session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _TimedAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=True,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        key = self.host_key(url)
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            if self.idle_timeout and now - self._last_sweep >= self.idle_timeout / 2:
+                stale.extend(self._pop_idle_locked(now))
+                self._last_sweep = now
+            session = self._sessions.get(key)
+            if session is None:
+                if len(self._sessions) >= self.max_hosts:
+                    oldest = min(self._last_used, key=self._last_used.get)
+                    stale.append(self._pop_locked(oldest))
+                session = self._new_session()
+                self._sessions[key] = session
+                self._created += 1
+            self._last_used[key] = now
+        for old in stale:
+            old.close()
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        _connect_timing.value = None
+        return self.session_for(url).request(method, url, **kwargs)
+
+    def _pop_locked(self, key: Tuple[str, str]) -> requests.Session:
+        self._last_used.pop(key, None)
+        self._evicted += 1
+        return self._sessions.pop(key)
+
+    def _pop_idle_locked(self, now: float) -> list:
+        idle = [k for k, used in self._last_used.items() if now - used >= self.idle_timeout]
+        return [self._pop_locked(k) for k in idle]
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """关闭空闲超时的会话，返回回收数量"""
+        with self._lock:
+            stale = self._pop_idle_locked(time.monotonic() if now is None else now)
+        for session in stale:
+            session.close()
+        return len(stale)
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._last_used.clear()
+        for session in sessions:
+            session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "hosts": {
+                    f"{scheme}://{netloc}": round(now - self._last_used[(scheme, netloc)], 3)
+                    for scheme, netloc in self._sessions
+                },
+                "pool_maxsize": self.pool_maxsize,
+                "created": self._created,
+                "evicted": self._evicted,
+            }
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+MCP Streamable HTTP 传输。
+
+一个进程通过 HTTP 同时为多个客户端提供服务，所有客户端共享同一个预热的推送引擎
+（连接池、限速状态、令牌缓存等）。
+
+- ``POST /mcp``：请求体为一条 JSON-RPC 消息或批量请求数组。请求返回 ``application/json`` 响应；
+  通知或响应类消息返回 ``202 Accepted``
+- 客户端 Accept 中包含 ``text/event-stream``，且 ``tools/call`` 带有 ``_meta.progressToken`` 时，
+  以 SSE 流式返回各渠道的 ``notifications/progress``，最后一个事件为调用结果
+- ``initialize`` 的响应头中返回 ``Mcp-Session-Id``；``DELETE /mcp`` 结束会话。会话空闲超过
+  ``session_ttl`` 秒后过期，数量超过 ``max_sessions`` 时淘汰最久未使用的
+- ``GET /mcp`` 返回 405（不提供服务端主动推送的流）
+- 请求由固定数量的工作线程处理，超出的连接在队列中等待；工作线程全部被占用时，响应后关闭长连接
+- 默认只监听 127.0.0.1，并校验 Origin 防止 DNS 重绑定；可选 Bearer 令牌认证
+"""
+import hmac
+import os
+import signal
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    from .debug import debug_log
+    from .jsoncodec import dumps, loads
+except ImportError:  # 直接以脚本运行
+    from debug import debug_log
+    from jsoncodec import dumps, loads
+
+MCP_PATH = "/mcp"
+MAX_BODY_BYTES = 1024 * 1024
+_LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "[::1]"}
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """解析 "PORT"、"HOST:PORT" 或 "[IPv6]:PORT"，缺省主机为 127.0.0.1"""
+    value = str(value).strip()
+    host, sep, port = value.rpartition(":")
+    if not sep:
+        host, port = "", value
+    host = host.strip("[]") or "127.0.0.1"
+    return host, int(port)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "mcp-push"
+    # 保持连接的空闲超时，避免空闲连接长期占用工作线程
+    timeout = 5
+
+    def log_message(self, format: str, *args: Any) -> None:
+        debug_log("mcp-push: http " + (format % args))
+
+    # ------------------------------------------------------------------ 校验
+
+    def _check_request(self) -> bool:
+        server: "MCPHTTPServer" = self.server  # type: ignore[assignment]
+        if urlsplit(self.path).path.rstrip("/") not in (MCP_PATH, ""):
+            self._send_json(404, {"error": "not found"})
+            return False
+        origin = self.headers.get("Origin")
+        if origin and not server.origin_allowed(origin):
+            self._send_json(403, {"error": "origin not allowed"})
+            return False
+        if server.token:
+            supplied = self.headers.get("Authorization", "")
+            if not hmac.compare_digest(supplied, f"Bearer {server.token}"):
+                self._send_json(401, {"error": "unauthorized"}, {"WWW-Authenticate": "Bearer"})
+                return False
+        session_id = self.headers.get("Mcp-Session-Id")
+        if session_id and not server.session_known(session_id):
+            self._send_json(404, {"error": "unknown session"})
+            return False
+        return True
+
+    # ------------------------------------------------------------------ 方法
+
+    def do_POST(self) -> None:
+        if not self._check_request():
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": "request body too large"})
+            return
+        body = self.rfile.read(length)
+        try:
+            message = loads(body)
+        except ValueError as exc:
+            self._send_json(400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": f"Parse error: {exc}"}})
+            return
+        if isinstance(message, list):
+            # 批量请求：一次返回响应数组；全部为通知时返回 202
+            payload = self.server.mcp.handle_message(message)  # type: ignore[attr-defined]
+            if payload is None:
+                self._send_empty(202)
+            else:
+                self._send_bytes(200, payload, "application/json")
+            return
+        if not isinstance(message, dict):
+            self._send_json(400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}})
+            return
+        if "method" not in message or message.get("id") is None:
+            # 通知或客户端发回的响应：处理后不返回内容
+            if "method" in message:
+                self.server.mcp.process(message)  # type: ignore[attr-defined]
+            self._send_empty(202)
+            return
+
+        # params / _meta 可能不是对象（如数组），此时按普通请求处理，由 process() 返回 JSON-RPC 错误
+        params = message.get("params")
+        meta = params.get("_meta") if isinstance(params, dict) else None
+        token = meta.get("progressToken") if isinstance(meta, dict) else None
+        if (
+            message.get("method") == "tools/call"
+            and token is not None
+            and "text/event-stream" in self.headers.get("Accept", "")
+        ):
+            self._stream_call(message, token)
+            return
+
+        payload = self.server.mcp.process(message)  # type: ignore[attr-defined]
+        if payload is None:
+            # 带 id 的请求没有结果（如以请求形式发送的通知方法）：返回 JSON-RPC 错误，只有真正的通知返回 202
+            error = {"code": -32600, "message": f"Invalid Request: method {message.get('method')} produces no result"}
+            self._send_json(200, {"jsonrpc": "2.0", "id": message.get("id"), "error": error})
+            return
+        headers = {}
+        if message.get("method") == "initialize":
+            headers["Mcp-Session-Id"] = self.server.new_session()  # type: ignore[attr-defined]
+        self._send_bytes(200, payload, "application/json", headers)
+
+    def do_DELETE(self) -> None:
+        if not self._check_request():
+            return
+        session_id = self.headers.get("Mcp-Session-Id")
+        if not session_id:
+            self._send_json(400, {"error": "missing Mcp-Session-Id"})
+            return
+        self.server.end_session(session_id)  # type: ignore[attr-defined]
+        self._send_empty(200)
+
+    def do_GET(self) -> None:
+        if not self._check_request():
+            return
+        self._send_empty(405, {"Allow": "POST, DELETE"})
+
+    # ------------------------------------------------------------------ SSE
+
+    def _stream_call(self, message: Dict[str, Any], token: Any) -> None:
+        """以 SSE 返回渠道进度与最终结果"""
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        lock = threading.Lock()
+        state = {"total": 0, "done": 0, "open": True}
+
+        def emit(data: bytes) -> None:
+            with lock:
+                if not state["open"]:
+                    return
+                try:
+                    self.wfile.write(b"event: message\ndata: " + data + b"\n\n")
+                    self.wfile.flush()
+                except OSError:
+                    state["open"] = False
+
+        def progress(channel: str, status: str, info: Optional[Dict[str, Any]] = None) -> None:
+            with lock:
+                if status == "queued":
+                    state["total"] += 1
+                elif status in ("success", "error"):
+                    state["done"] += 1
+                done, total = state["done"], state["total"]
+            params: Dict[str, Any] = {
+                "progressToken": token,
+                "progress": done,
+                "message": f"{channel}: {status}",
+            }
+            if total:
+                params["total"] = total
+            note = {"jsonrpc": "2.0", "method": "notifications/progress", "params": params}
+            emit(dumps(note))
+
+        payload = self.server.mcp.process(message, progress=progress)  # type: ignore[attr-defined]
+        if payload is not None:
+            emit(payload)
+        with lock:
+            state["open"] = False
+
+    # ------------------------------------------------------------------ 输出
+
+    def end_headers(self) -> None:
+        # 工作线程已全部被占用：本次响应后关闭连接，把线程让给排队的连接
+        if not self.close_connection and self.server.saturated():  # type: ignore[attr-defined]
+            self.send_header("Connection", "close")
+        super().end_headers()
+
+    def _send_bytes(self, status: int, payload: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_bytes(status, dumps(body), "application/json", headers)
+
+    def _send_empty(self, status: int, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+
+class MCPHTTPServer(HTTPServer):
+    """固定工作线程数的 HTTP 服务器，连接交给线程池处理"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        mcp,
+        workers: int = 32,
+        token: Optional[str] = None,
+        allowed_origins: Optional[set] = None,
+        max_sessions: int = 1024,
+        session_ttl: float = 3600.0,
+    ):
+        self.mcp = mcp
+        self.token = token or None
+        self.allowed_origins = set(allowed_origins or ())
+        self.workers = max(1, int(workers))
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mcp-http")
+        # 已接受、尚未关闭的连接数（含排队中的）
+        self._connections = 0
+        self._connections_lock = threading.Lock()
+        self.max_sessions = max(1, int(max_sessions))
+        self.session_ttl = max(0.0, float(session_ttl))
+        # session_id -> 最近一次使用的时刻（monotonic），按使用先后排列
+        self._sessions: "OrderedDict[str, float]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        if ":" in address[0]:
+            import socket
+
+            self.address_family = socket.AF_INET6
+        super().__init__(address, _Handler)
+
+    def process_request(self, request, client_address) -> None:
+        with self._connections_lock:
+            self._connections += 1
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._connections_lock:
+                self._connections -= 1
+
+    def saturated(self) -> bool:
+        """连接数已达到工作线程数，新连接需要排队"""
+        with self._connections_lock:
+            return self._connections >= self.workers
+
+    def handle_error(self, request, client_address) -> None:
+        debug_log(f"mcp-push: http connection error from {client_address}")
+
+    def origin_allowed(self, origin: str) -> bool:
+        if origin in self.allowed_origins:
+            return True
+        return (urlsplit(origin).hostname or "") in _LOCAL_HOSTS
+
+    def new_session(self) -> str:
+        session_id = uuid.uuid4().hex
+        with self._sessions_lock:
+            self._expire_sessions_locked(time.monotonic())
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+            self._sessions[session_id] = time.monotonic()
+        return session_id
+
+    def session_known(self, session_id: str) -> bool:
+        """会话是否有效；有效时刷新其最近使用时刻"""
+        now = time.monotonic()
+        with self._sessions_lock:
+            self._expire_sessions_locked(now)
+            if session_id not in self._sessions:
+                return False
+            self._sessions[session_id] = now
+            self._sessions.move_to_end(session_id)
+            return True
+
+    def end_session(self, session_id: str) -> None:
+        with self._sessions_lock:
+            self._sessions.pop(session_id, None)
+
+    def _expire_sessions_locked(self, now: float) -> None:
+        if not self.session_ttl:
+            return
+        while self._sessions:
+            session_id, used = next(iter(self._sessions.items()))
+            if now - used < self.session_ttl:
+                break
+            del self._sessions[session_id]
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+def serve(mcp, address: str, workers: int = 32) -> int:
+    """运行 HTTP 传输直到收到 SIGTERM / SIGINT"""
+    host, port = parse_address(address)
+    origins = {o.strip() for o in os.environ.get("MCP_PUSH_HTTP_ALLOWED_ORIGINS", "").split(",") if o.strip()}
+    server = MCPHTTPServer(
+        (host, port),
+        mcp,
+        workers=workers,
+        token=os.environ.get("MCP_PUSH_HTTP_TOKEN"),
+        allowed_origins=origins,
+    )
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    threading.Thread(target=server.serve_forever, name="mcp-http-accept", daemon=True).start()
+    mcp.preload_notify()
+    debug_log(f"mcp-push: http listening on {host}:{server.server_address[1]}{MCP_PATH} workers={server.workers}")
+    try:
+        while not stop.wait(1.0):
+            pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        if mcp.coalescer is not None:
+            mcp.coalescer.flush_all()
+        mcp.drain_deliveries()
+    return 0
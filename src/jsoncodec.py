@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+JSON 编解码后端。
+
+安装了 orjson（``pip install mcp-push[fast]``）时使用 orjson，否则使用标准库 json；
+``MCP_PUSH_JSON_BACKEND=stdlib`` 可强制使用标准库。两种后端的输出都是 UTF-8 bytes，
+非 ASCII 字符不转义（等价于 ``ensure_ascii=False``）。
+"""
+import json
+import os
+from typing import Any, Union
+
+_stdlib_decoder = json.JSONDecoder()
+_stdlib_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_stdlib_default = json.JSONEncoder(ensure_ascii=False)
+_stdlib_indent = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+orjson = None
+if os.environ.get("MCP_PUSH_JSON_BACKEND", "auto").strip().lower() not in ("stdlib", "json"):
+    try:
+        import orjson  # type: ignore[no-redef]
+    except ImportError:
+        orjson = None
+
+BACKEND = "orjson" if orjson is not None else "stdlib"
+
+
+def dumps(obj: Any, indent: bool = False, compact: bool = False) -> bytes:
+    """
+    序列化为 UTF-8 bytes。indent=True 时缩进 2 格；compact=True 时不加分隔空格。
+    orjson 的输出本身就是紧凑格式。
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        encoder = _stdlib_indent
+    elif compact:
+        encoder = _stdlib_compact
+    else:
+        encoder = _stdlib_default
+    return encoder.encode(obj).encode("utf-8")
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """反序列化 str 或 UTF-8 字节（bytes / bytearray / memoryview）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if not isinstance(data, str):
+        data = str(data, "utf-8")
+    return _stdlib_decoder.decode(data)
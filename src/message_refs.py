@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+已发送消息的 ID 表：线索（如 run_id）-> {渠道名: 消息 ID}。
+
+支持编辑消息的渠道在线索的第一条消息发出后记下消息 ID，后续进度更新改为编辑这条消息，
+而不是再发一条新消息。表的大小有上限，条目超过存活时间后淘汰。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class MessageRefs:
+    """有容量上限和存活时间的线索 -> 渠道消息 ID 映射，线程安全"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = max(0.0, float(ttl))
+        self._refs: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, thread: str, channel: str) -> Optional[Any]:
+        with self._lock:
+            item = self._refs.get(thread)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._refs[thread]
+                self.evicted += 1
+                return None
+            return item[1].get(channel)
+
+    def put(self, thread: str, channel: str, message_id: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            item = self._refs.pop(thread, None)
+            channels = item[1] if item is not None and item[0] > now else {}
+            channels[channel] = message_id
+            self._refs[thread] = (now + self.ttl, channels)
+            self._evict_locked(now)
+
+    def discard(self, thread: str, channel: Optional[str] = None) -> None:
+        """删除线索的全部记录；指定 channel 时只删除该渠道的消息 ID"""
+        with self._lock:
+            if channel is None:
+                self._refs.pop(thread, None)
+                return
+            item = self._refs.get(thread)
+            if item is not None:
+                item[1].pop(channel, None)
+
+    def _evict_locked(self, now: float) -> None:
+        # 按写入顺序排列（put 会把线索移到末尾），过期条目总在前部
+        while self._refs:
+            thread, (expires, _) = next(iter(self._refs.items()))
+            if expires > now and len(self._refs) <= self.max_entries:
+                break
+            del self._refs[thread]
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._refs)
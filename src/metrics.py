@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+进程内指标。
+
+计数器、增减型仪表与直方图按线程分片：每个线程只写自己的分片，写入无锁、互不竞争；
+读取时汇总全部分片；已退出线程的分片在新线程登记分片或读取时并入汇总值后释放，
+线程频繁创建（每连接一个线程）时分片数也不会随之增长。直方图使用固定的毫秒桶，
+百分位数按桶内线性插值估算。
+
+snapshot() 供 notify_metrics 工具返回，render_prometheus() 输出 Prometheus 文本格式；
+设置 MCP_PUSH_METRICS_ADDR 时由 serve() 在本机端口提供 ``GET /metrics``。
+"""
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# 延迟直方图的桶上界（毫秒）
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# snapshot() 中直方图给出的百分位数
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+class _Sharded:
+    """按线程分片的指标；cell 为数值列表，相同标签的 cell 按元素相加即可合并"""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, Dict[tuple, list]]] = []
+        # 已退出线程的分片合并到这里
+        self._retired: Dict[tuple, list] = {}
+
+    def _shard(self) -> Dict[tuple, list]:
+        shard: Dict[tuple, list] = {}
+        with self._lock:
+            self._retire_locked()
+            self._shards.append((threading.current_thread(), shard))
+        self._local.shard = shard
+        return shard
+
+    def _retire_locked(self) -> None:
+        """把已退出线程的分片并入 _retired"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _merge(self._retired, dict(shard))
+        self._shards = live
+
+    def collect(self) -> Dict[tuple, list]:
+        """汇总所有分片，返回 {标签值元组: cell}"""
+        with self._lock:
+            self._retire_locked()
+            live = list(self._shards)
+            totals = {key: list(cell) for key, cell in self._retired.items()}
+        for _, shard in live:
+            # dict() 在持有 GIL 时一次复制完成，不会与分片所属线程的写入交错
+            _merge(totals, dict(shard))
+        return totals
+
+
+def _merge(into: Dict[tuple, list], cells: Dict[tuple, list]) -> None:
+    for key, cell in cells.items():
+        target = into.get(key)
+        if target is None:
+            into[key] = list(cell)
+        else:
+            for index, value in enumerate(cell):
+                target[index] += value
+
+
+class Counter(_Sharded):
+    """单调递增的计数器"""
+
+    kind = "counter"
+
+    def inc(self, key: tuple = (), amount: float = 1) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        cell = shard.get(key)
+        if cell is None:
+            shard[key] = [amount]
+        else:
+            cell[0] += amount
+
+    def values(self) -> Dict[tuple, float]:
+        return {key: cell[0] for key, cell in self.collect().items()}
+
+
+class Gauge(Counter):
+    """
+    可增可减的仪表（如在途投递数）；inc 与 dec 可以在不同线程，汇总时相互抵消。
+    传入 fn 时改为读取时调用 fn() 取值（如队列深度）。
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def dec(self, key: tuple = (), amount: float = 1) -> None:
+        self.inc(key, -amount)
+
+    def values(self) -> Dict[tuple, float]:
+        if self.fn is not None:
+            try:
+                return {(): self.fn()}
+            except Exception:
+                return {}
+        return super().values()
+
+
+class Histogram(_Sharded):
+    """固定桶直方图；cell 为各桶计数（最后一个桶为 +Inf）加上观测值之和"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        super().__init__(name, help, labels)
+        self.bounds = tuple(sorted(buckets))
+        self._width = len(self.bounds) + 2
+
+    def observe(self, value: float, key: tuple = ()) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        cell = shard.get(key)
+        if cell is None:
+            cell = shard[key] = [0] * self._width
+        cell[bisect.bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    def percentile(self, cell: list, q: float) -> Optional[float]:
+        """按桶内线性插值估算百分位数；落在 +Inf 桶时返回最大的有限上界"""
+        counts = cell[:-1]
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                if index >= len(self.bounds):
+                    return float(self.bounds[-1])
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return float(self.bounds[-1])
+
+    def summary(self, cell: list) -> Dict[str, Any]:
+        count = sum(cell[:-1])
+        data: Dict[str, Any] = {"count": count, "sum_ms": round(cell[-1], 3)}
+        if count:
+            data["mean_ms"] = round(cell[-1] / count, 3)
+            for q in PERCENTILES:
+                data[f"p{int(q * 100)}_ms"] = round(self.percentile(cell, q), 3)
+        return data
+
+
+class Registry:
+    """指标注册表；同名指标重复注册时返回已有的实例"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Sharded] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(
+        self, name: str, help: str, labels: Sequence[str] = (), fn: Optional[Callable[[], float]] = None
+    ) -> Gauge:
+        return self._register(Gauge, name, help, labels, fn)
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS_MS
+    ) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets)
+
+    def _items(self) -> List[_Sharded]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        当前指标值。带标签的指标按 "值1,值2" 分组，无标签的直接给出 value；
+        直方图给出 count、sum_ms、mean_ms 与 p50 / p95 / p99（毫秒）。
+        """
+        metrics: Dict[str, Any] = {}
+        for metric in self._items():
+            entry: Dict[str, Any] = {"type": metric.kind, "help": metric.help}
+            if isinstance(metric, Histogram):
+                values = {key: metric.summary(cell) for key, cell in sorted(metric.collect().items())}
+            else:
+                values = dict(sorted(metric.values().items()))
+            if metric.labels:
+                entry["labels"] = list(metric.labels)
+                entry["values"] = {",".join(str(part) for part in key): value for key, value in values.items()}
+            else:
+                entry["value"] = values.get(())
+            metrics[metric.name] = entry
+        return {"uptime_s": round(time.time() - self.started, 1), "metrics": metrics}
+
+    def render_prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines: List[str] = []
+        for metric in self._items():
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                for key, cell in sorted(metric.collect().items()):
+                    cumulative = 0
+                    for index, count in enumerate(cell[:-1]):
+                        cumulative += count
+                        le = _format(metric.bounds[index]) if index < len(metric.bounds) else "+Inf"
+                        lines.append(f"{metric.name}_bucket{_labels(metric.labels + ('le',), key + (le,))} {cumulative}")
+                    lines.append(f"{metric.name}_sum{_labels(metric.labels, key)} {_format(cell[-1])}")
+                    lines.append(f"{metric.name}_count{_labels(metric.labels, key)} {cumulative}")
+            else:
+                for key, value in sorted(metric.values().items()):
+                    lines.append(f"{metric.name}{_labels(metric.labels, key)} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+# 进程级默认注册表
+REGISTRY = Registry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def serve(address: str, registry: Optional[Registry] = None) -> ThreadingHTTPServer:
+    """在 address（"PORT" 或 "HOST:PORT"，缺省主机 127.0.0.1）上提供 /metrics，后台线程运行"""
+    try:
+        from .http_transport import parse_address
+    except ImportError:  # 直接以脚本运行
+        from http_transport import parse_address
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or REGISTRY})
+    server = ThreadingHTTPServer(parse_address(address), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mcp-metrics", daemon=True).start()
+    return server
@@ -6,17 +6,47 @@ import hmac
 import json
 import os
 import re
-import shutil
-import subprocess
 import threading
 import time
 import urllib.parse
 import smtplib
+from concurrent.futures import wait
 from email.mime.text import MIMEText
 from email.header import Header
 from email.utils import formataddr
+from typing import Optional
 
 import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+try:
+    from .dispatcher import ChannelDispatcher
+    from .http_pool import HostSessionPool, last_connect_ms
+    from .message_refs import MessageRefs
+    from .metrics import REGISTRY as _metrics
+    from .outbox import Outbox
+    from .quote_pool import QuotePool
+    from .ratelimit import RateLimiters
+    from .resilience import BreakerRegistry, DeadlineExceeded, RetryableError, RetryPolicy, parse_retry_after
+    from .results import ChannelResult
+    from .shell_env import default_cache_path as default_shell_env_cache
+    from .shell_env import snapshot as shell_env_snapshot
+    from .token_cache import TokenCache, token_key
+    from . import tracing
+except ImportError:  # 直接以脚本运行
+    from dispatcher import ChannelDispatcher
+    from http_pool import HostSessionPool, last_connect_ms
+    from message_refs import MessageRefs
+    from metrics import REGISTRY as _metrics
+    from outbox import Outbox
+    from quote_pool import QuotePool
+    from ratelimit import RateLimiters
+    from resilience import BreakerRegistry, DeadlineExceeded, RetryableError, RetryPolicy, parse_retry_after
+    from results import ChannelResult
+    from shell_env import default_cache_path as default_shell_env_cache
+    from shell_env import snapshot as shell_env_snapshot
+    from token_cache import TokenCache, token_key
+    import tracing
 
 # 原先的 print 函数和主线程的锁
 _print = print
@@ -36,6 +66,9 @@ def print(text, *args, **kw):
 # fmt: off
 push_config = {
     'HITOKOTO': False,                 # 启用一言（随机句子）
+    'HITOKOTO_POOL_SIZE': '8',          # 后台预取的一言条数
+    'HITOKOTO_REFILL_AT': '2',          # 池中剩余条数不超过该值时后台补充
+    'HITOKOTO_TIMEOUT': '5',            # 获取一言的超时时间（秒）
 
     'BARK_PUSH': '',                    # bark IP 或设备码，例：https://api.day.app/DxHcxxxxxRxxxxxxcm/
     'BARK_ARCHIVE': '',                 # bark 推送是否存档
@@ -92,6 +125,7 @@ push_config = {
     'QYWX_ORIGIN': '',                  # 企业微信代理地址
 
     'QYWX_AM': '',                      # 企业微信应用
+    'QYWX_TOKEN_CACHE': '',             # 企业微信应用 access_token 缓存文件，留空则只缓存在内存中
 
     'QYWX_KEY': '',                     # 企业微信机器人
 
@@ -136,32 +170,66 @@ push_config = {
     'WXPUSHER_APP_TOKEN': '',           # wxpusher 的 appToken 官方文档: https://wxpusher.zjiecode.com/docs/ 管理后台: https://wxpusher.zjiecode.com/admin/
     'WXPUSHER_TOPIC_IDS': '',           # wxpusher 的 主题ID，多个用英文分号;分隔 topic_ids 与 uids 至少配置一个才行
     'WXPUSHER_UIDS': '',                # wxpusher 的 用户ID，多个用英文分号;分隔 topic_ids 与 uids 至少配置一个才行
+
+    'NOTIFY_HTTP_POOL_SIZE': '4',       # 单主机最大连接数（同主机渠道共享连接池）
+    'NOTIFY_HTTP_IDLE_TIMEOUT': '90',   # 空闲连接回收时间（秒）
+    'NOTIFY_HTTP_KEEPALIVE': 'true',    # 是否保持长连接
+    'NOTIFY_HTTP_ROUTES': '',           # 请求地址改写（测试桩 / 内网代理），如 https://oapi.dingtalk.com=http://127.0.0.1:9001，多个用逗号分隔
+    'NOTIFY_CONNECT_TIMEOUT': '5',      # 建立连接的超时时间（秒）
+    'NOTIFY_READ_TIMEOUT': '15',        # 等待响应的超时时间（秒），SMTP 也使用该值
+    'NOTIFY_DEADLINE': '30',            # 同步推送的截止时间（秒），到时返回已完成渠道的结果，0 表示不限
+
+    'NOTIFY_MAX_WORKERS': '8',          # 推送工作线程上限（跨 send 调用复用）
+    'NOTIFY_CHANNEL_CONCURRENCY': '2',  # 单个渠道最多同时占用的工作线程数
+
+    'NOTIFY_OUTBOX_DIR': '',            # 持久化发件箱目录，留空则不启用
+    'NOTIFY_OUTBOX_COMMIT_MS': '2',     # 发件箱批量落盘的等待时间（毫秒）
+    'NOTIFY_OUTBOX_COMPACT_BYTES': '1048576',  # 发件箱日志超过该大小时压缩
+
+    'NOTIFY_RETRY_MAX': '3',            # 每个渠道的最大尝试次数（含首次）
+    'NOTIFY_RETRY_BASE_MS': '500',      # 指数退避的初始等待（毫秒）
+    'NOTIFY_RETRY_MAX_DELAY': '30',     # 单次等待上限（秒），Retry-After 超过该值时放弃重试
+    'NOTIFY_BREAKER_THRESHOLD': '5',    # 连续失败多少次后熔断该渠道
+    'NOTIFY_BREAKER_RESET': '60',       # 熔断后多久（秒）放行一次探测请求
+
+    'NOTIFY_RATE_LIMITS': '',           # 渠道限速，覆盖内置默认值，如 dingding_bot=20/min,telegram_bot=off
+    'NOTIFY_RATE_LIMIT_MAX_WAIT': '120',  # 排队等待令牌的最长时间（秒），超过则放弃推送
+
+    'NOTIFY_EDIT_MESSAGES': 'true',     # 同一线索（run_id）的进度更新编辑已发出的消息，而不是发新消息
+    'NOTIFY_MESSAGE_REF_MAX': '1024',   # 最多记住多少条线索的消息 ID
+    'NOTIFY_MESSAGE_REF_TTL': '86400',  # 线索消息 ID 的保留时间（秒）
 }
 # fmt: on
 
 
+# requests 读取的代理与 CA 证书变量（大小写两种写法），在 rc 文件中导出时同样需要生效
+_NETWORK_ENV_KEYS = frozenset(
+    name
+    for key in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "NO_PROXY")
+    for name in (key, key.lower())
+) | {"REQUESTS_CA_BUNDLE", "CURL_CA_BUNDLE", "SSL_CERT_FILE", "SSL_CERT_DIR"}
+
+# 从登录 shell 读取的变量：各配置项、SKIP_PUSH_TITLE 与代理 / CA 证书变量
+_SHELL_ENV_KEYS = frozenset(push_config) | {"SKIP_PUSH_TITLE"} | _NETWORK_ENV_KEYS
+
+
 def _load_shell_env() -> None:
+    """
+    把登录 shell 中设置的配置项补充到 os.environ（不覆盖已有值），只读取 _SHELL_ENV_KEYS 中的键。
+    捕获结果缓存在 MCP_PUSH_SHELL_ENV_CACHE（off 表示不缓存），rc 文件变化或超过
+    MCP_PUSH_SHELL_ENV_TTL 秒后在后台刷新。
+    """
     if os.environ.get("MCP_PUSH_SHELL_ENV", "1") in ("0", "false", "False", "no"):
         return
+    cache_path = os.environ.get("MCP_PUSH_SHELL_ENV_CACHE") or default_shell_env_cache()
+    if cache_path.lower() in ("0", "off", "false", "no"):
+        cache_path = None
     try:
-        if os.name == "nt":
-            shell = "pwsh" if shutil.which("pwsh") else "powershell"
-            if not shell:
-                return
-            cmd = [shell, "-Command", "Get-ChildItem Env: | ForEach-Object {\"$($_.Name)=$($_.Value)\"}"]
-        else:
-            shell = os.environ.get("SHELL", "")
-            if shell.endswith("zsh"):
-                cmd = [shell, "-lic", "printenv"]
-            elif shell.endswith("bash"):
-                cmd = [shell, "-lc", "printenv"]
-            else:
-                cmd = ["/bin/sh", "-lc", "printenv"]
-        proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        for line in proc.stdout.splitlines():
-            if "=" not in line:
-                continue
-            key, value = line.split("=", 1)
+        max_age = float(os.environ.get("MCP_PUSH_SHELL_ENV_TTL") or 86400)
+    except ValueError:
+        max_age = 86400.0
+    try:
+        for key, value in shell_env_snapshot(cache_path, max_age, _SHELL_ENV_KEYS).items():
             if key and key not in os.environ:
                 os.environ[key] = value
     except Exception:
@@ -200,14 +268,435 @@ def _load_config_sh(path: str) -> None:
 _load_config_sh(os.path.join(os.path.dirname(__file__), "config.sh"))
 _load_config_sh(os.path.join(os.getcwd(), "config.sh"))
 
-_load_shell_env()
+with tracing.span("notify.shell_env"):
+    _load_shell_env()
 for k in push_config:
     if os.getenv(k):
         v = os.getenv(k)
         push_config[k] = v
 
 
-def bark(title: str, content: str) -> None:
+def _config_int(key: str, default: int) -> int:
+    try:
+        return int(push_config.get(key) or default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _config_float(key: str, default: float) -> float:
+    try:
+        return float(push_config.get(key) or default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _config_bool(key: str, default: bool) -> bool:
+    value = push_config.get(key)
+    if value in (None, ""):
+        return default
+    return str(value).lower() not in ("0", "false", "no", "off")
+
+
+_http_pool_lock = threading.Lock()
+_http_pool_instance = None
+
+
+def _http_pool() -> HostSessionPool:
+    """返回进程级共享的连接池，首次调用时按 push_config 创建。"""
+    global _http_pool_instance
+    if _http_pool_instance is None:
+        with _http_pool_lock:
+            if _http_pool_instance is None:
+                _http_pool_instance = HostSessionPool(
+                    pool_maxsize=_config_int("NOTIFY_HTTP_POOL_SIZE", 4),
+                    idle_timeout=_config_float("NOTIFY_HTTP_IDLE_TIMEOUT", 90.0),
+                    keep_alive=_config_bool("NOTIFY_HTTP_KEEPALIVE", True),
+                )
+    return _http_pool_instance
+
+
+# 各渠道表示“请求过于频繁”的业务错误码：渠道名 -> (响应 JSON 字段, 错误码)
+_THROTTLE_CODES = {
+    "dingding_bot": ("errcode", {130101}),
+    "feishu_bot": ("code", {9499, 11232, 11233}),
+    "telegram_bot": ("error_code", {429}),
+    "wecom_app": ("errcode", {45009, 45033}),
+    "wecom_bot": ("errcode", {45009, 45033}),
+}
+
+# 可重试的 HTTP 状态码
+_RETRYABLE_STATUS = {429, 502, 503, 504}
+
+# 当前工作线程正在执行的渠道
+_channel_context = threading.local()
+
+
+def _check_throttled(response: requests.Response) -> None:
+    """遇到限流或网关错误时抛出 RetryableError，交给重试层处理。"""
+    channel = getattr(_channel_context, "channel", None)
+    spec = _THROTTLE_CODES.get(channel)
+    if response.status_code not in _RETRYABLE_STATUS and spec is None:
+        return
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        body = {}
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if retry_after is None and isinstance(body.get("parameters"), dict):
+        # telegram 在响应体中给出 retry_after
+        retry_after = parse_retry_after(body["parameters"].get("retry_after"))
+    if response.status_code in _RETRYABLE_STATUS:
+        raise RetryableError(f"HTTP {response.status_code}", retry_after)
+    field, codes = spec
+    if body.get(field) in codes:
+        raise RetryableError(f"{channel} 请求过于频繁（{field}={body.get(field)}）", retry_after)
+
+
+_IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+def _safe_to_retry(exc: requests.RequestException) -> bool:
+    """
+    请求异常是否可以重试而不会重复推送：GET 等幂等请求总是可以；其它请求只在发出之前失败时
+    （建连超时、连接被拒、DNS 失败）可以。读取超时或发出后连接断开时服务商可能已经收到消息。
+    """
+    request = getattr(exc, "request", None)
+    if request is not None and str(getattr(request, "method", "")).upper() in _IDEMPOTENT_METHODS:
+        return True
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.ConnectionError) and not isinstance(exc, requests.exceptions.SSLError):
+        reason = exc.args[0] if exc.args else None
+        reason = getattr(reason, "reason", reason)  # urllib3 MaxRetryError 包装的原因
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+    return False
+
+
+def _remaining():
+    """当前渠道距离截止时间的剩余秒数；未设置截止时间时返回 None"""
+    deadline = getattr(_channel_context, "deadline", None)
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def _timeouts(timeout=None) -> tuple:
+    """
+    返回 (连接超时, 读取超时)：取配置值、调用方给出的 timeout 与截止时间剩余中的最小值。
+    截止时间已到时抛出 DeadlineExceeded。
+    """
+    connect = _config_float("NOTIFY_CONNECT_TIMEOUT", 5.0)
+    read = _config_float("NOTIFY_READ_TIMEOUT", 15.0)
+    if timeout is not None:
+        limit_connect, limit_read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        connect, read = min(connect, limit_connect), min(read, limit_read)
+    remaining = _remaining()
+    if remaining is not None:
+        if remaining <= 0:
+            raise DeadlineExceeded("已到截止时间，未发出请求")
+        connect, read = min(connect, remaining), min(read, remaining)
+    return connect, read
+
+
+_routes_cache = ("", ())
+
+
+def _routes() -> tuple:
+    """解析 NOTIFY_HTTP_ROUTES 为 (原地址前缀, 替换前缀) 列表，较长的前缀优先匹配。"""
+    global _routes_cache
+    raw = push_config.get("NOTIFY_HTTP_ROUTES") or ""
+    cached_raw, routes = _routes_cache
+    if raw != cached_raw:
+        pairs = []
+        for item in re.split(r"[,\n]", raw):
+            source, sep, target = item.partition("=")
+            if sep and source.strip() and target.strip():
+                pairs.append((source.strip().rstrip("/"), target.strip().rstrip("/")))
+        routes = tuple(sorted(pairs, key=lambda pair: -len(pair[0])))
+        _routes_cache = (raw, routes)
+    return routes
+
+
+def _rewrite_url(url: str) -> str:
+    for source, target in _routes():
+        if url.startswith(source) and url[len(source):len(source) + 1] in ("", "/", "?"):
+            return target + url[len(source):]
+    return url
+
+
+def _http_request(method: str, url: str, **kwargs) -> requests.Response:
+    """所有渠道的 HTTP 请求统一经过此处，复用按主机划分的长连接，并统一设置超时。"""
+    kwargs["timeout"] = _timeouts(kwargs.get("timeout"))
+    url = _rewrite_url(url)
+    # 只记录主机名：部分渠道把密钥放在 URL 路径或查询参数中
+    attributes = {"http.request.method": method, "server.address": urllib.parse.urlsplit(url).hostname}
+    with tracing.span("http.request", attributes, kind="client") as span:
+        try:
+            response = _http_pool().request(method, url, **kwargs)
+        except requests.RequestException as exc:
+            span.fail(type(exc).__name__)
+            raise
+        span.set("http.response.status_code", response.status_code)
+    # 记录最后一次请求的状态码、建连耗时与首字节耗时，汇总到渠道结果中
+    _channel_context.http = (
+        response.status_code,
+        last_connect_ms(),
+        response.elapsed.total_seconds() * 1000,
+    )
+    _check_throttled(response)
+    return response
+
+
+def _provider_result(success: bool, code=None, message=None) -> ChannelResult:
+    """渠道函数的返回值：服务商的处理结果，附带最后一次 HTTP 请求的状态码"""
+    http = getattr(_channel_context, "http", None)
+    return ChannelResult(
+        success,
+        provider_code=code,
+        provider_msg=None if message in (None, "") else str(message),
+        http_status=http[0] if http else None,
+    )
+
+
+_dispatcher_lock = threading.Lock()
+_dispatcher_instance = None
+
+
+def _dispatcher() -> ChannelDispatcher:
+    """返回进程级共享的渠道分发线程池，首次调用时按 push_config 创建。"""
+    global _dispatcher_instance
+    if _dispatcher_instance is None:
+        with _dispatcher_lock:
+            if _dispatcher_instance is None:
+                _dispatcher_instance = ChannelDispatcher(
+                    max_workers=_config_int("NOTIFY_MAX_WORKERS", 8),
+                    channel_concurrency=_config_int("NOTIFY_CHANNEL_CONCURRENCY", 2),
+                )
+    return _dispatcher_instance
+
+
+def dispatcher_stats() -> dict:
+    """分发线程池的队列深度与线程利用率"""
+    return _dispatcher().stats()
+
+
+_CHANNEL_SENDS = _metrics.counter("mcp_push_channel_sends_total", "渠道投递次数（含跳过）", ("channel",))
+_CHANNEL_FAILURES = _metrics.counter("mcp_push_channel_failures_total", "渠道投递失败次数", ("channel",))
+_CHANNEL_LATENCY = _metrics.histogram(
+    "mcp_push_channel_latency_ms", "渠道投递耗时（毫秒，含限速排队与重试）", ("channel",)
+)
+_INFLIGHT_DELIVERIES = _metrics.gauge("mcp_push_inflight_deliveries", "正在执行的 send() 调用数")
+_metrics.gauge(
+    "mcp_push_dispatch_queue_depth",
+    "分发线程池中等待线程的渠道任务数",
+    fn=lambda: _dispatcher_instance.stats()["queue_depth"] if _dispatcher_instance is not None else 0,
+)
+
+
+_breakers_lock = threading.Lock()
+_breakers_instance = None
+
+
+def _breakers() -> BreakerRegistry:
+    """返回进程级共享的渠道熔断器表。"""
+    global _breakers_instance
+    if _breakers_instance is None:
+        with _breakers_lock:
+            if _breakers_instance is None:
+                _breakers_instance = BreakerRegistry(
+                    failure_threshold=_config_int("NOTIFY_BREAKER_THRESHOLD", 5),
+                    reset_timeout=_config_float("NOTIFY_BREAKER_RESET", 60.0),
+                )
+    return _breakers_instance
+
+
+def _retry_policy() -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=_config_int("NOTIFY_RETRY_MAX", 3),
+        base_delay=_config_float("NOTIFY_RETRY_BASE_MS", 500.0) / 1000,
+        max_delay=_config_float("NOTIFY_RETRY_MAX_DELAY", 30.0),
+    )
+
+
+# 各渠道的内置限速（次数/时间单位:突发容量），略低于服务商上限以留出余量
+_DEFAULT_RATE_LIMITS = {
+    "dingding_bot": "19/min:1",     # 钉钉机器人每分钟最多 20 条
+    "wecom_bot": "19/min:1",        # 企业微信机器人每分钟最多 20 条
+    "feishu_bot": "95/min:4",       # 飞书机器人每分钟 100 条、每秒 5 条
+    "telegram_bot": "1/s:1",        # 同一会话每秒约 1 条（全局 30 条/秒）
+}
+
+_rate_limiters_lock = threading.Lock()
+_rate_limiters_instance = None
+
+
+def _rate_limiters() -> RateLimiters:
+    """返回进程级共享的渠道令牌桶，NOTIFY_RATE_LIMITS 中的配置覆盖内置默认值。"""
+    global _rate_limiters_instance
+    if _rate_limiters_instance is None:
+        with _rate_limiters_lock:
+            if _rate_limiters_instance is None:
+                specs = dict(_DEFAULT_RATE_LIMITS)
+                for item in re.split(r"[,\n]", push_config.get("NOTIFY_RATE_LIMITS") or ""):
+                    if "=" in item:
+                        name, spec = item.split("=", 1)
+                        specs[name.strip()] = spec.strip()
+                try:
+                    _rate_limiters_instance = RateLimiters(specs)
+                except ValueError as exc:
+                    print(f"NOTIFY_RATE_LIMITS 配置错误，使用内置默认值：{exc}")
+                    _rate_limiters_instance = RateLimiters(_DEFAULT_RATE_LIMITS)
+    return _rate_limiters_instance
+
+
+_outbox_lock = threading.Lock()
+_outbox_instance = None
+_outbox_checked = False
+
+
+def _outbox():
+    """返回持久化发件箱；未配置 NOTIFY_OUTBOX_DIR 时返回 None。"""
+    global _outbox_instance, _outbox_checked
+    if not _outbox_checked:
+        with _outbox_lock:
+            if not _outbox_checked:
+                directory = push_config.get("NOTIFY_OUTBOX_DIR")
+                if directory:
+                    try:
+                        _outbox_instance = Outbox(
+                            directory,
+                            commit_interval=_config_float("NOTIFY_OUTBOX_COMMIT_MS", 2.0) / 1000,
+                            compact_bytes=_config_int("NOTIFY_OUTBOX_COMPACT_BYTES", 1024 * 1024),
+                        )
+                    except OSError as exc:
+                        print(f"发件箱目录不可用，已禁用持久化：{exc}")
+                _outbox_checked = True
+    return _outbox_instance
+
+
+class _ListenerGate:
+    """转发渠道进度给调用方的 listener；渠道被记为超时后丢弃它迟到的进度"""
+
+    def __init__(self, listener):
+        self.listener = listener
+        self._expired = set()
+        self._finished = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, name, state, info=None):
+        with self._lock:
+            if name in self._expired:
+                return
+            if state in ("success", "error"):
+                self._finished.add(name)
+        self.listener(name, state, info)
+
+    def expire(self, name) -> bool:
+        """把渠道记为超时；渠道已上报最终状态时返回 False"""
+        with self._lock:
+            if name in self._finished:
+                return False
+            self._expired.add(name)
+            return True
+
+
+def _outbox_listener(outbox, entry_id, listener=None):
+    """渠道完成时在发件箱中 ack，并继续转发给调用方的 listener。"""
+
+    def report(name, state, info=None):
+        if state in ("success", "error"):
+            outbox.ack(entry_id, name, state)
+        if listener:
+            listener(name, state, info)
+
+    return report
+
+
+_message_refs_lock = threading.Lock()
+_message_refs_instance = None
+
+
+def _message_refs() -> MessageRefs:
+    """返回进程级共享的线索消息 ID 表。"""
+    global _message_refs_instance
+    if _message_refs_instance is None:
+        with _message_refs_lock:
+            if _message_refs_instance is None:
+                _message_refs_instance = MessageRefs(
+                    max_entries=_config_int("NOTIFY_MESSAGE_REF_MAX", 1024),
+                    ttl=_config_float("NOTIFY_MESSAGE_REF_TTL", 86400.0),
+                )
+    return _message_refs_instance
+
+
+def _editable_message_id():
+    """当前渠道本次推送应当编辑的消息 ID；不需要编辑或没有记录时返回 None。"""
+    thread = getattr(_channel_context, "thread", None)
+    if not thread or not thread[1] or not _config_bool("NOTIFY_EDIT_MESSAGES", True):
+        return None
+    return _message_refs().get(thread[0], _channel_context.channel)
+
+
+def _remember_message_id(message_id) -> None:
+    """记下当前渠道在本线索中发出的消息 ID，供后续更新编辑。"""
+    thread = getattr(_channel_context, "thread", None)
+    if thread and message_id is not None:
+        _message_refs().put(thread[0], _channel_context.channel, message_id)
+
+
+def forget_thread(thread: str) -> None:
+    """线索结束后丢弃其消息 ID，之后的消息重新发送新消息。"""
+    _message_refs().discard(thread)
+
+
+def journal(title: str, content: str) -> Optional[str]:
+    """
+    在发件箱中登记一条待推送消息，落盘后返回条目 ID，交给 send(outbox_entry=...) 投递。
+    async 推送在返回受理结果之前调用：受理后进程崩溃，消息也会在下次启动时重新投递。
+    未启用发件箱、内容为空、标题在 SKIP_PUSH_TITLE 中或没有渠道时返回 None。
+    """
+    outbox = _outbox()
+    if outbox is None or not content:
+        return None
+    skip_title = os.getenv("SKIP_PUSH_TITLE")
+    if skip_title and title in re.split("\n", skip_title):
+        return None
+    channels = [mode.__name__ for mode in add_notify_function()]
+    if not channels:
+        return None
+    return outbox.add(title, content, channels)
+
+
+def recover_outbox() -> int:
+    """
+    重新投递上次进程退出时未完成的发件箱条目，返回条目数。
+    只投递仍未 ack 的渠道；已不再配置的渠道直接 ack 为 dropped。
+    """
+    outbox = _outbox()
+    if outbox is None:
+        return 0
+    entries = outbox.recover()
+    if not entries:
+        return 0
+    configured = {mode.__name__: mode for mode in add_notify_function()}
+    for entry in entries:
+        modes = []
+        for name in entry["channels"]:
+            if name in configured:
+                modes.append(configured[name])
+            else:
+                outbox.ack(entry["id"], name, "dropped")
+        if modes:
+            print(f"发件箱：重新投递 {entry['title']} -> {', '.join(m.__name__ for m in modes)}")
+            _dispatch_channels(
+                modes, entry["title"], entry["content"], _outbox_listener(outbox, entry["id"])
+            )
+    return len(entries)
+
+
+def bark(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 bark 推送消息。
     """
@@ -241,14 +730,15 @@ def bark(title: str, content: str) -> None:
     ):
         data[bark_params.get(pair[0])] = pair[1]
     headers = {"Content-Type": "application/json;charset=utf-8"}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = _http_request(
+        "POST", url, data=json.dumps(data), headers=headers, timeout=15
     ).json()
 
     if response["code"] == 200:
         print("bark 推送成功！")
     else:
         print("bark 推送失败！")
+    return _provider_result(response["code"] == 200, response["code"], response.get("message"))
 
 
 def console(title: str, content: str) -> None:
@@ -258,7 +748,7 @@ def console(title: str, content: str) -> None:
     print(f"{title}\n\n{content}")
 
 
-def dingding_bot(title: str, content: str) -> None:
+def dingding_bot(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 钉钉机器人 推送消息。
     """
@@ -277,17 +767,18 @@ def dingding_bot(title: str, content: str) -> None:
     url = f'https://oapi.dingtalk.com/robot/send?access_token={push_config.get("DD_BOT_TOKEN")}&timestamp={timestamp}&sign={sign}'
     headers = {"Content-Type": "application/json;charset=utf-8"}
     data = {"msgtype": "text", "text": {"content": f"{title}\n\n{content}"}}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = _http_request(
+        "POST", url, data=json.dumps(data), headers=headers, timeout=15
     ).json()
 
     if not response["errcode"]:
         print("钉钉机器人 推送成功！")
     else:
         print("钉钉机器人 推送失败！")
+    return _provider_result(not response["errcode"], response["errcode"], response.get("errmsg"))
 
 
-def feishu_bot(title: str, content: str) -> None:
+def feishu_bot(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 飞书机器人 推送消息。
     """
@@ -297,15 +788,20 @@ def feishu_bot(title: str, content: str) -> None:
 
     url = f'https://open.feishu.cn/open-apis/bot/v2/hook/{push_config.get("FSKEY")}'
     data = {"msg_type": "text", "content": {"text": f"{title}\n\n{content}"}}
-    response = requests.post(url, data=json.dumps(data)).json()
+    response = _http_request("POST", url, data=json.dumps(data)).json()
 
     if response.get("StatusCode") == 0 or response.get("code") == 0:
         print("飞书 推送成功！")
     else:
         print("飞书 推送失败！错误信息如下：\n", response)
+    return _provider_result(
+        response.get("StatusCode") == 0 or response.get("code") == 0,
+        response.get("code", response.get("StatusCode")),
+        response.get("msg") or response.get("StatusMessage"),
+    )
 
 
-def go_cqhttp(title: str, content: str) -> None:
+def go_cqhttp(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 go_cqhttp 推送消息。
     """
@@ -314,15 +810,18 @@ def go_cqhttp(title: str, content: str) -> None:
     print("go-cqhttp 服务启动")
 
     url = f'{push_config.get("GOBOT_URL")}?access_token={push_config.get("GOBOT_TOKEN")}&{push_config.get("GOBOT_QQ")}&message=标题:{title}\n内容:{content}'
-    response = requests.get(url).json()
+    response = _http_request("GET", url).json()
 
     if response["status"] == "ok":
         print("go-cqhttp 推送成功！")
     else:
         print("go-cqhttp 推送失败！")
+    return _provider_result(
+        response["status"] == "ok", response.get("retcode"), response.get("wording") or response.get("msg")
+    )
 
 
-def gotify(title: str, content: str) -> None:
+def gotify(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 gotify 推送消息。
     """
@@ -336,15 +835,18 @@ def gotify(title: str, content: str) -> None:
         "message": content,
         "priority": push_config.get("GOTIFY_PRIORITY"),
     }
-    response = requests.post(url, data=data).json()
+    response = _http_request("POST", url, data=data).json()
 
     if response.get("id"):
         print("gotify 推送成功！")
     else:
         print("gotify 推送失败！")
+    return _provider_result(
+        bool(response.get("id")), response.get("errorCode"), response.get("errorDescription") or response.get("error")
+    )
 
 
-def iGot(title: str, content: str) -> None:
+def iGot(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 iGot 推送消息。
     """
@@ -355,15 +857,16 @@ def iGot(title: str, content: str) -> None:
     url = f'https://push.hellyw.com/{push_config.get("IGOT_PUSH_KEY")}'
     data = {"title": title, "content": content}
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    response = requests.post(url, data=data, headers=headers).json()
+    response = _http_request("POST", url, data=data, headers=headers).json()
 
     if response["ret"] == 0:
         print("iGot 推送成功！")
     else:
         print(f'iGot 推送失败！{response["errMsg"]}')
+    return _provider_result(response["ret"] == 0, response["ret"], response.get("errMsg"))
 
 
-def serverJ(title: str, content: str) -> None:
+def serverJ(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过 serverJ 推送消息。
     """
@@ -380,15 +883,20 @@ def serverJ(title: str, content: str) -> None:
     else:
         url = f'https://sctapi.ftqq.com/{push_config.get("PUSH_KEY")}.send'
 
-    response = requests.post(url, data=data).json()
+    response = _http_request("POST", url, data=data).json()
 
     if response.get("errno") == 0 or response.get("code") == 0:
         print("serverJ 推送成功！")
     else:
         print(f'serverJ 推送失败！错误码：{response["message"]}')
+    return _provider_result(
+        response.get("errno") == 0 or response.get("code") == 0,
+        response.get("errno", response.get("code")),
+        response.get("message"),
+    )
 
 
-def pushdeer(title: str, content: str) -> None:
+def pushdeer(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过PushDeer 推送消息
     """
@@ -405,15 +913,18 @@ def pushdeer(title: str, content: str) -> None:
     if push_config.get("DEER_URL"):
         url = push_config.get("DEER_URL")
 
-    response = requests.post(url, data=data).json()
+    response = _http_request("POST", url, data=data).json()
 
     if len(response.get("content").get("result")) > 0:
         print("PushDeer 推送成功！")
     else:
         print("PushDeer 推送失败！错误信息：", response)
+    return _provider_result(
+        len(response.get("content").get("result")) > 0, response.get("code"), response.get("error")
+    )
 
 
-def chat(title: str, content: str) -> None:
+def chat(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过Chat 推送消息
     """
@@ -422,15 +933,16 @@ def chat(title: str, content: str) -> None:
     print("chat 服务启动")
     data = "payload=" + json.dumps({"text": title + "\n" + content})
     url = push_config.get("CHAT_URL") + push_config.get("CHAT_TOKEN")
-    response = requests.post(url, data=data)
+    response = _http_request("POST", url, data=data)
 
     if response.status_code == 200:
         print("Chat 推送成功！")
     else:
         print("Chat 推送失败！错误信息：", response)
+    return _provider_result(response.status_code == 200, None, None if response.status_code == 200 else response.text[:200])
 
 
-def pushplus_bot(title: str, content: str) -> None:
+def pushplus_bot(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过 pushplus 推送消息。
     """
@@ -452,7 +964,7 @@ def pushplus_bot(title: str, content: str) -> None:
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = _http_request("POST", url, data=body, headers=headers).json()
 
     code = response["code"]
     if code == 200:
@@ -460,22 +972,25 @@ def pushplus_bot(title: str, content: str) -> None:
         print(
             "注意：请求成功并不代表推送成功，如未收到消息，请到pushplus官网使用流水号查询推送最终结果"
         )
+        return _provider_result(True, code, response.get("data"))
     elif code == 900 or code == 903 or code == 905 or code == 999:
         print(response["msg"])
+        return _provider_result(False, code, response["msg"])
 
     else:
         url_old = "http://pushplus.hxtrip.com/send"
         headers["Accept"] = "application/json"
-        response = requests.post(url=url_old, data=body, headers=headers).json()
+        response = _http_request("POST", url_old, data=body, headers=headers).json()
 
         if response["code"] == 200:
             print("PUSHPLUS(hxtrip) 推送成功！")
 
         else:
             print("PUSHPLUS 推送失败！")
+        return _provider_result(response["code"] == 200, response["code"], response.get("msg"))
 
 
-def weplus_bot(title: str, content: str) -> None:
+def weplus_bot(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过 微加机器人 推送消息。
     """
@@ -498,15 +1013,16 @@ def weplus_bot(title: str, content: str) -> None:
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = _http_request("POST", url, data=body, headers=headers).json()
 
     if response["code"] == 200:
         print("微加机器人 推送成功！")
     else:
         print("微加机器人 推送失败！")
+    return _provider_result(response["code"] == 200, response["code"], response.get("msg"))
 
 
-def qmsg_bot(title: str, content: str) -> None:
+def qmsg_bot(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 qmsg 推送消息。
     """
@@ -516,15 +1032,16 @@ def qmsg_bot(title: str, content: str) -> None:
 
     url = f'https://qmsg.zendee.cn/{push_config.get("QMSG_TYPE")}/{push_config.get("QMSG_KEY")}'
     payload = {"msg": f'{title}\n\n{content.replace("----", "-")}'.encode("utf-8")}
-    response = requests.post(url=url, params=payload).json()
+    response = _http_request("POST", url, params=payload).json()
 
     if response["code"] == 0:
         print("qmsg 推送成功！")
     else:
         print(f'qmsg 推送失败！{response["reason"]}')
+    return _provider_result(response["code"] == 0, response["code"], response.get("reason"))
 
 
-def wecom_app(title: str, content: str) -> None:
+def wecom_app(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过 企业微信 APP 推送消息。
     """
@@ -533,7 +1050,7 @@ def wecom_app(title: str, content: str) -> None:
     QYWX_AM_AY = re.split(",", push_config.get("QYWX_AM"))
     if 4 < len(QYWX_AM_AY) > 5:
         print("QYWX_AM 设置错误!!")
-        return
+        return ChannelResult(False, error="QYWX_AM 设置错误")
     print("企业微信 APP 服务启动")
 
     corpid = QYWX_AM_AY[0]
@@ -552,10 +1069,28 @@ def wecom_app(title: str, content: str) -> None:
     else:
         response = wx.send_mpnews(title, content, media_id, touser)
 
-    if response == "ok":
+    if response.get("errcode") == 0:
         print("企业微信推送成功！")
     else:
-        print("企业微信推送失败！错误信息如下：\n", response)
+        print("企业微信推送失败！错误信息如下：\n", response.get("errmsg"))
+    return _provider_result(response.get("errcode") == 0, response.get("errcode"), response.get("errmsg"))
+
+
+# access_token 失效（40014 不合法、42001 已过期）时刷新令牌并重试一次
+_WECOM_TOKEN_ERRCODES = {40014, 42001}
+
+_wecom_tokens_lock = threading.Lock()
+_wecom_tokens_instance = None
+
+
+def _wecom_tokens() -> TokenCache:
+    """返回进程级共享的企业微信 access_token 缓存。"""
+    global _wecom_tokens_instance
+    if _wecom_tokens_instance is None:
+        with _wecom_tokens_lock:
+            if _wecom_tokens_instance is None:
+                _wecom_tokens_instance = TokenCache(push_config.get("QYWX_TOKEN_CACHE") or None)
+    return _wecom_tokens_instance
 
 
 class WeCom:
@@ -566,21 +1101,37 @@ class WeCom:
         self.ORIGIN = "https://qyapi.weixin.qq.com"
         if push_config.get("QYWX_ORIGIN"):
             self.ORIGIN = push_config.get("QYWX_ORIGIN")
+        self._token_key = token_key(self.ORIGIN, self.CORPID, self.CORPSECRET)
 
-    def get_access_token(self):
+    def _fetch_access_token(self):
         url = f"{self.ORIGIN}/cgi-bin/gettoken"
         values = {
             "corpid": self.CORPID,
             "corpsecret": self.CORPSECRET,
         }
-        req = requests.post(url, params=values)
+        req = _http_request("POST", url, params=values)
         data = json.loads(req.text)
-        return data["access_token"]
+        if not data.get("access_token"):
+            raise ValueError(f"获取 access_token 失败：{data.get('errcode')} {data.get('errmsg')}")
+        return data["access_token"], data.get("expires_in") or 7200
+
+    def get_access_token(self):
+        """返回缓存的 access_token，过期前自动刷新"""
+        return _wecom_tokens().get(self._token_key, self._fetch_access_token)
+
+    def _send(self, send_values):
+        """发送应用消息，返回服务端的响应（含 errcode 与 errmsg）"""
+        send_msges = bytes(json.dumps(send_values), "utf-8")
+        for attempt in range(2):
+            token = self.get_access_token()
+            send_url = f"{self.ORIGIN}/cgi-bin/message/send?access_token={token}"
+            respone = _http_request("POST", send_url, data=send_msges).json()
+            if respone.get("errcode") not in _WECOM_TOKEN_ERRCODES or attempt:
+                break
+            _wecom_tokens().invalidate(self._token_key, token)
+        return respone
 
     def send_text(self, message, touser="@all"):
-        send_url = (
-            f"{self.ORIGIN}/cgi-bin/message/send?access_token={self.get_access_token()}"
-        )
         send_values = {
             "touser": touser,
             "msgtype": "text",
@@ -588,15 +1139,9 @@ class WeCom:
             "text": {"content": message},
             "safe": "0",
         }
-        send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
-        respone = respone.json()
-        return respone["errmsg"]
+        return self._send(send_values)
 
     def send_mpnews(self, title, message, media_id, touser="@all"):
-        send_url = (
-            f"{self.ORIGIN}/cgi-bin/message/send?access_token={self.get_access_token()}"
-        )
         send_values = {
             "touser": touser,
             "msgtype": "mpnews",
@@ -614,13 +1159,10 @@ class WeCom:
                 ]
             },
         }
-        send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
-        respone = respone.json()
-        return respone["errmsg"]
+        return self._send(send_values)
 
 
-def wecom_bot(title: str, content: str) -> None:
+def wecom_bot(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过 企业微信机器人 推送消息。
     """
@@ -635,30 +1177,30 @@ def wecom_bot(title: str, content: str) -> None:
     url = f"{origin}/cgi-bin/webhook/send?key={push_config.get('QYWX_KEY')}"
     headers = {"Content-Type": "application/json;charset=utf-8"}
     data = {"msgtype": "text", "text": {"content": f"{title}\n\n{content}"}}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = _http_request(
+        "POST", url, data=json.dumps(data), headers=headers, timeout=15
     ).json()
 
     if response["errcode"] == 0:
         print("企业微信机器人推送成功！")
     else:
         print("企业微信机器人推送失败！")
+    return _provider_result(response["errcode"] == 0, response["errcode"], response.get("errmsg"))
 
 
-def telegram_bot(title: str, content: str) -> None:
+def telegram_bot(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 telegram 机器人 推送消息。
+    同一线索的进度更新通过 editMessageText 编辑已发出的消息，编辑失败时发送新消息。
     """
     if not push_config.get("TG_BOT_TOKEN") or not push_config.get("TG_USER_ID"):
         return
     print("tg 服务启动")
 
     if push_config.get("TG_API_HOST"):
-        url = f"{push_config.get('TG_API_HOST')}/bot{push_config.get('TG_BOT_TOKEN')}/sendMessage"
+        api = f"{push_config.get('TG_API_HOST')}/bot{push_config.get('TG_BOT_TOKEN')}"
     else:
-        url = (
-            f"https://api.telegram.org/bot{push_config.get('TG_BOT_TOKEN')}/sendMessage"
-        )
+        api = f"https://api.telegram.org/bot{push_config.get('TG_BOT_TOKEN')}"
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
     payload = {
         "chat_id": str(push_config.get("TG_USER_ID")),
@@ -679,17 +1221,35 @@ def telegram_bot(title: str, content: str) -> None:
             push_config.get("TG_PROXY_HOST"), push_config.get("TG_PROXY_PORT")
         )
         proxies = {"http": proxyStr, "https": proxyStr}
-    response = requests.post(
-        url=url, headers=headers, params=payload, proxies=proxies
+
+    message_id = _editable_message_id()
+    if message_id is not None:
+        response = _http_request(
+            "POST",
+            f"{api}/editMessageText",
+            headers=headers,
+            params=dict(payload, message_id=message_id),
+            proxies=proxies,
+        ).json()
+        # 内容未变化时 telegram 返回 "message is not modified"，视为成功
+        if response.get("ok") or "not modified" in str(response.get("description", "")):
+            print("tg 消息已更新！")
+            return _provider_result(True, None, response.get("description"))
+        print(f"tg 消息编辑失败（{response.get('description')}），改为发送新消息")
+
+    response = _http_request(
+        "POST", f"{api}/sendMessage", headers=headers, params=payload, proxies=proxies
     ).json()
 
     if response["ok"]:
+        _remember_message_id((response.get("result") or {}).get("message_id"))
         print("tg 推送成功！")
     else:
         print("tg 推送失败！")
+    return _provider_result(bool(response["ok"]), response.get("error_code"), response.get("description"))
 
 
-def aibotk(title: str, content: str) -> None:
+def aibotk(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 智能微秘书 推送消息。
     """
@@ -717,15 +1277,16 @@ def aibotk(title: str, content: str) -> None:
         }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = _http_request("POST", url, data=body, headers=headers).json()
     print(response)
     if response["code"] == 0:
         print("智能微秘书 推送成功！")
     else:
         print(f'智能微秘书 推送失败！{response["error"]}')
+    return _provider_result(response["code"] == 0, response["code"], response.get("error"))
 
 
-def smtp(title: str, content: str) -> None:
+def smtp(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 SMTP 邮件 推送消息。
     """
@@ -754,11 +1315,13 @@ def smtp(title: str, content: str) -> None:
     )
     message["Subject"] = Header(title, "utf-8")
 
+    # 连接、登录与发送的每次套接字操作都受超时（含截止时间）限制
+    timeout = max(_timeouts())
     try:
         smtp_server = (
-            smtplib.SMTP_SSL(push_config.get("SMTP_SERVER"))
+            smtplib.SMTP_SSL(push_config.get("SMTP_SERVER"), timeout=timeout)
             if push_config.get("SMTP_SSL") == "true"
-            else smtplib.SMTP(push_config.get("SMTP_SERVER"))
+            else smtplib.SMTP(push_config.get("SMTP_SERVER"), timeout=timeout)
         )
         smtp_server.login(
             push_config.get("SMTP_EMAIL"), push_config.get("SMTP_PASSWORD")
@@ -770,11 +1333,14 @@ def smtp(title: str, content: str) -> None:
         )
         smtp_server.close()
         print("SMTP 邮件 推送成功！")
+        return ChannelResult(True)
     except Exception as e:
         print(f"SMTP 邮件 推送失败！{e}")
+        code = getattr(e, "smtp_code", None)
+        return ChannelResult(False, provider_code=code, error=f"SMTP 推送失败：{e}")
 
 
-def pushme(title: str, content: str) -> None:
+def pushme(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 PushMe 推送消息。
     """
@@ -794,15 +1360,16 @@ def pushme(title: str, content: str) -> None:
         "date": push_config.get("date") if push_config.get("date") else "",
         "type": push_config.get("type") if push_config.get("type") else "",
     }
-    response = requests.post(url, data=data)
+    response = _http_request("POST", url, data=data)
 
     if response.status_code == 200 and response.text == "success":
         print("PushMe 推送成功！")
     else:
         print(f"PushMe 推送失败！{response.status_code} {response.text}")
+    return _provider_result(response.status_code == 200 and response.text == "success", None, response.text[:200])
 
 
-def chronocat(title: str, content: str) -> None:
+def chronocat(title: str, content: str) -> Optional[ChannelResult]:
     """
     使用 CHRONOCAT 推送消息。
     """
@@ -824,6 +1391,7 @@ def chronocat(title: str, content: str) -> None:
         "Authorization": f'Bearer {push_config.get("CHRONOCAT_TOKEN")}',
     }
 
+    failed = []
     for chat_type, ids in [(1, user_ids), (2, group_ids)]:
         if not ids:
             continue
@@ -837,20 +1405,22 @@ def chronocat(title: str, content: str) -> None:
                     }
                 ],
             }
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = _http_request("POST", url, headers=headers, data=json.dumps(data))
             if response.status_code == 200:
                 if chat_type == 1:
                     print(f"QQ个人消息:{ids}推送成功！")
                 else:
                     print(f"QQ群消息:{ids}推送成功！")
             else:
+                failed.append(chat_id)
                 if chat_type == 1:
                     print(f"QQ个人消息:{ids}推送失败！")
                 else:
                     print(f"QQ群消息:{ids}推送失败！")
+    return _provider_result(not failed, None, f"推送失败：{','.join(failed)}" if failed else None)
 
 
-def ntfy(title: str, content: str) -> None:
+def ntfy(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过 Ntfy 推送消息
     """
@@ -884,14 +1454,15 @@ def ntfy(title: str, content: str) -> None:
         headers['Actions'] = encode_rfc2047(push_config.get("NTFY_ACTIONS"))
 
     url = push_config.get("NTFY_URL") + "/" + push_config.get("NTFY_TOPIC")
-    response = requests.post(url, data=data, headers=headers)
+    response = _http_request("POST", url, data=data, headers=headers)
     if response.status_code == 200:  # 使用 response.status_code 进行检查
         print("Ntfy 推送成功！")
     else:
         print("Ntfy 推送失败！错误信息：", response.text)
+    return _provider_result(response.status_code == 200, None, None if response.status_code == 200 else response.text[:200])
 
 
-def wxpusher_bot(title: str, content: str) -> None:
+def wxpusher_bot(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过 wxpusher 推送消息。
     支持的环境变量:
@@ -924,7 +1495,7 @@ def wxpusher_bot(title: str, content: str) -> None:
     # topic_ids uids 至少有一个
     if not topic_ids and not uids:
         print("wxpusher 服务的 WXPUSHER_TOPIC_IDS 和 WXPUSHER_UIDS 至少设置一个!!")
-        return
+        return ChannelResult(False, error="WXPUSHER_TOPIC_IDS 和 WXPUSHER_UIDS 至少设置一个")
 
     print("wxpusher 服务启动")
 
@@ -939,12 +1510,13 @@ def wxpusher_bot(title: str, content: str) -> None:
     }
 
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, json=data, headers=headers).json()
+    response = _http_request("POST", url, json=data, headers=headers).json()
 
     if response.get("code") == 1000:
         print("wxpusher 推送成功！")
     else:
         print(f"wxpusher 推送失败！错误信息：{response.get('msg')}")
+    return _provider_result(response.get("code") == 1000, response.get("code"), response.get("msg"))
 
 
 def parse_headers(headers):
@@ -998,7 +1570,7 @@ def parse_body(body, content_type, value_format_fn=None):
     return parsed
 
 
-def custom_notify(title: str, content: str) -> None:
+def custom_notify(title: str, content: str) -> Optional[ChannelResult]:
     """
     通过 自定义通知 推送消息。
     """
@@ -1015,7 +1587,7 @@ def custom_notify(title: str, content: str) -> None:
 
     if "$title" not in WEBHOOK_URL and "$title" not in WEBHOOK_BODY:
         print("请求头或者请求体中必须包含 $title 和 $content")
-        return
+        return ChannelResult(False, error="WEBHOOK_URL 或 WEBHOOK_BODY 中必须包含 $title")
 
     headers = parse_headers(WEBHOOK_HEADERS)
     body = parse_body(
@@ -1028,14 +1600,15 @@ def custom_notify(title: str, content: str) -> None:
     formatted_url = WEBHOOK_URL.replace(
         "$title", urllib.parse.quote_plus(title)
     ).replace("$content", urllib.parse.quote_plus(content))
-    response = requests.request(
-        method=WEBHOOK_METHOD, url=formatted_url, headers=headers, timeout=15, data=body
+    response = _http_request(
+        WEBHOOK_METHOD, formatted_url, headers=headers, timeout=15, data=body
     )
 
     if response.status_code == 200:
         print("自定义通知推送成功！")
     else:
         print(f"自定义通知推送失败！{response.status_code} {response.text}")
+    return _provider_result(response.status_code == 200, None, None if response.status_code == 200 else response.text[:200])
 
 
 def one() -> str:
@@ -1044,10 +1617,40 @@ def one() -> str:
     :return:
     """
     url = "https://v1.hitokoto.cn/"
-    res = requests.get(url).json()
+    res = _http_request("GET", url, timeout=_config_float("HITOKOTO_TIMEOUT", 5.0)).json()
     return res["hitokoto"] + "    ----" + res["from"]
 
 
+_quote_pool_lock = threading.Lock()
+_quote_pool_instance = None
+
+
+def _quote_pool() -> QuotePool:
+    """返回进程级共享的一言池，首次调用时开始后台填充。"""
+    global _quote_pool_instance
+    if _quote_pool_instance is None:
+        with _quote_pool_lock:
+            if _quote_pool_instance is None:
+                pool = QuotePool(
+                    one,
+                    size=_config_int("HITOKOTO_POOL_SIZE", 8),
+                    refill_at=_config_int("HITOKOTO_REFILL_AT", 2),
+                )
+                pool.warm()
+                _quote_pool_instance = pool
+    return _quote_pool_instance
+
+
+def warm_up() -> None:
+    """提前创建连接池、分发线程池等进程级对象，并开始预取一言，缩短首次推送的耗时。"""
+    _http_pool()
+    _dispatcher()
+    _breakers()
+    _rate_limiters()
+    if str(push_config.get("HITOKOTO")).lower() != "false":
+        _quote_pool()
+
+
 def add_notify_function():
     notify_function = []
     if push_config.get("BARK_PUSH"):
@@ -1117,19 +1720,243 @@ def add_notify_function():
     return notify_function
 
 
-def _run_notify_channel(mode, title, content, errors, errors_lock):
+def _run_notify_channel(
+    mode,
+    title,
+    content,
+    errors,
+    errors_lock,
+    listener=None,
+    thread=None,
+    deadline=None,
+    results=None,
+    parent=None,
+    pace=False,
+):
+    """在 notify.channel span 中执行 _deliver_channel；parent 为 send() 所在线程的当前 span"""
     name = getattr(mode, "__name__", "unknown")
-    try:
-        result = mode(title, content)
-        if result:
-            with errors_lock:
-                errors[name] = str(result)
-    except Exception as exc:
-        with errors_lock:
-            errors[name] = str(exc)
+    with tracing.span("notify.channel", {"notify.channel": name}, parent=parent) as span:
+        outcome = _deliver_channel(
+            mode, title, content, errors, errors_lock, listener, thread, deadline, results, pace
+        )
+        span.set("notify.attempts", outcome.attempts)
+        span.set("http.response.status_code", outcome.http_status)
+        span.set("notify.provider_code", outcome.provider_code)
+        if not outcome.success:
+            span.fail(outcome.error)
 
 
-def send(title: str, content: str, ignore_default_config: bool = False, **kwargs):
+def _deliver_channel(
+    mode, title, content, errors, errors_lock, listener=None, thread=None, deadline=None, results=None, pace=False
+) -> ChannelResult:
+    """
+    执行单个渠道，失败信息写入 errors[渠道名]，投递结果（ChannelResult）写入 results[渠道名]。
+    渠道函数返回 success=False 的 ChannelResult 时视为服务商拒绝，记为失败且不重试。
+    可重试的失败按退避策略重试；熔断中的渠道直接跳过。
+    listener(渠道名, 状态, 详情) 用于上报渠道进度：running → success / error。
+    thread 为 (线索标识, 是否编辑)，供支持编辑消息的渠道使用。
+    deadline 为截止时间（time.monotonic()），限制请求超时、限速排队与重试等待。
+    pace=True 时限速排队只受 NOTIFY_RATE_LIMIT_MAX_WAIT 限制，排队多久截止时间就顺延多久
+    （调用方未显式给出 timeout、使用默认截止时间时），超出限速的消息按速率依次发出而不是被丢弃。
+    """
+    name = getattr(mode, "__name__", "unknown")
+    if deadline is not None and time.monotonic() >= deadline:
+        # 在分发队列中等到了截止时间，不再执行
+        error = "已到截止时间，未执行"
+        outcome = ChannelResult(False, channel=name, error=error)
+        with errors_lock:
+            errors[name] = error
+            if results is not None:
+                results[name] = outcome
+        _CHANNEL_SENDS.inc((name,))
+        _CHANNEL_FAILURES.inc((name,))
+        if listener:
+            listener(name, "error", {"error": error, "attempts": 0})
+        return outcome
+    breaker = _breakers().get(name)
+    if not breaker.allow():
+        error = f"熔断中，已跳过（连续失败，{breaker.snapshot().get('retry_in', 0)} 秒后重试）"
+        outcome = ChannelResult(False, channel=name, error=error)
+        with errors_lock:
+            errors[name] = error
+            if results is not None:
+                results[name] = outcome
+        _CHANNEL_SENDS.inc((name,))
+        _CHANNEL_FAILURES.inc((name,))
+        if listener:
+            listener(name, "error", {"error": error, "attempts": 0, "breaker": breaker.state})
+        return outcome
+
+    if listener:
+        listener(name, "running", None)
+    policy = _retry_policy()
+    bucket = _rate_limiters().get(name)
+    max_wait = _config_float("NOTIFY_RATE_LIMIT_MAX_WAIT", 120.0)
+    started = time.monotonic()
+    throttled = 0.0
+    attempts = 0
+    error = None
+    expired = False
+    provider = None
+    http = None
+    _channel_context.channel = name
+    _channel_context.thread = thread
+    _channel_context.deadline = deadline
+    try:
+        while True:
+            if bucket is not None:
+                # 超出限速时排队等待令牌，按速率依次发出；排队时间不超过截止时间
+                remaining = None if pace else _remaining()
+                limit = max_wait if remaining is None else max(0.0, min(max_wait, remaining))
+                waited = bucket.acquire(limit)
+                if waited is None:
+                    if limit < max_wait:
+                        error, expired = f"超出 {name} 限速，截止时间前无法发出", True
+                    else:
+                        error = f"超出 {name} 限速，排队超过 {max_wait:g} 秒，已放弃"
+                    break
+                throttled += waited
+                if pace and deadline is not None and waited:
+                    deadline += waited
+                    _channel_context.deadline = deadline
+            attempts += 1
+            retry_after = None
+            retryable = False
+            provider = None
+            _channel_context.http = None
+            with tracing.span("notify.attempt", {"notify.attempt": attempts}) as span:
+                try:
+                    result = mode(title, content)
+                    if isinstance(result, ChannelResult):
+                        provider = result
+                        error = None if result.success else result.error
+                    else:
+                        error = str(result) if result else None
+                except RetryableError as exc:
+                    error, retryable, retry_after = str(exc), True, exc.retry_after
+                    if bucket is not None and retry_after:
+                        bucket.penalize(retry_after)
+                except (requests.ConnectionError, requests.Timeout) as exc:
+                    error, retryable = str(exc), _safe_to_retry(exc)
+                except DeadlineExceeded as exc:
+                    # 首次尝试前即已到截止时间：未发出请求，不计入熔断；重试时到期则前几次的失败照常计入
+                    error, expired = str(exc), attempts == 1
+                except Exception as exc:
+                    error = str(exc)
+                if error is not None:
+                    span.fail(error)
+            if error is None or not retryable or attempts >= policy.max_attempts:
+                break
+            delay = policy.delay(attempts, retry_after)
+            if delay is None:
+                break
+            remaining = _remaining()
+            if remaining is not None and delay >= remaining:
+                error = f"{error}（截止时间前无法重试）"
+                break
+            print(f"{name} 第 {attempts} 次推送失败（{error}），{delay:.1f} 秒后重试")
+            time.sleep(delay)
+    finally:
+        http = getattr(_channel_context, "http", None)
+        _channel_context.channel = None
+        _channel_context.thread = None
+        _channel_context.deadline = None
+        _channel_context.http = None
+
+    outcome = provider if provider is not None else ChannelResult(error is None, error=error)
+    if error is not None:
+        outcome.success, outcome.error = False, error
+    outcome.channel = name
+    outcome.attempts = attempts
+    outcome.total_ms = (time.monotonic() - started) * 1000
+    if http is not None:
+        if outcome.http_status is None:
+            outcome.http_status = http[0]
+        outcome.connect_ms, outcome.ttfb_ms = http[1], http[2]
+    if results is not None:
+        with errors_lock:
+            results[name] = outcome
+    _CHANNEL_SENDS.inc((name,))
+    _CHANNEL_LATENCY.observe(outcome.total_ms, (name,))
+    if error is not None:
+        _CHANNEL_FAILURES.inc((name,))
+
+    if error is None:
+        breaker.record_success()
+    elif expired:
+        # 没有真正发出请求，不计入熔断；若本次为半开状态的探测请求，放行下一次探测
+        breaker.release()
+        with errors_lock:
+            errors[name] = error
+    else:
+        breaker.record_failure()
+        with errors_lock:
+            errors[name] = error
+    if listener:
+        info = outcome.to_dict()
+        del info["channel"], info["success"]
+        info["latency_ms"] = info.pop("total_ms")
+        info["breaker"] = breaker.state
+        if throttled:
+            info["throttled_ms"] = round(throttled * 1000, 1)
+        listener(name, "error" if error is not None else "success", info)
+    return outcome
+
+
+def _dispatch_channels(modes, title, content, listener=None, thread=None, deadline=None, pace=False):
+    """把各渠道提交到分发线程池，返回 (futures, errors, results)。pace 见 _deliver_channel。"""
+    errors = {}
+    results = {}
+    errors_lock = threading.Lock()
+    dispatcher = _dispatcher()
+    futures = [
+        dispatcher.submit(
+            mode.__name__,
+            _run_notify_channel,
+            mode,
+            title,
+            content,
+            errors,
+            errors_lock,
+            listener,
+            thread,
+            deadline,
+            results,
+            tracing.current(),
+            pace,
+        )
+        for mode in modes
+    ]
+    return futures, errors, results
+
+
+def send(
+    title: str,
+    content: str,
+    ignore_default_config: bool = False,
+    listener=None,
+    thread=None,
+    edit: bool = False,
+    timeout=None,
+    outbox_entry=None,
+    background: bool = False,
+    **kwargs,
+):
+    """
+    向所有已配置渠道推送消息。
+    listener 可选，签名为 listener(渠道名, 状态, 详情)，用于跟踪各渠道的投递进度。
+    thread 可选，为消息所属的线索（如 run_id）；edit=True 时支持编辑的渠道会更新该线索已发出的消息，
+    不支持编辑或编辑失败时仍发送新消息。
+    timeout 为本次推送的截止时间（秒），缺省时使用 NOTIFY_DEADLINE。到时立即返回已完成渠道的结果，
+    未完成的渠道记为超时（listener 收到 timeout 状态），其请求受同一截止时间约束，随后自行结束。
+    使用默认截止时间时限速排队不计入截止时间：超出限速的渠道继续排队、按速率发出（结果记入发件箱），
+    显式给出 timeout 时排队也受其限制。
+    返回值中 results 为各渠道的投递结果：是否成功、服务商业务码与说明、HTTP 状态、尝试次数与
+    建连 / 首字节 / 总耗时（毫秒）。
+    outbox_entry 为 journal() 预先登记的发件箱条目 ID，给出时不再重复登记。
+    background=True 表示没有调用方在等待结果（async 推送、进度摘要），未给出 timeout 时不使用 NOTIFY_DEADLINE，
+    由各渠道的请求超时与重试次数限制耗时。
+    """
     if kwargs:
         global push_config
         if ignore_default_config:
@@ -1150,29 +1977,77 @@ def send(title: str, content: str, ignore_default_config: bool = False, **kwargs
 
     hitokoto = push_config.get("HITOKOTO")
     if str(hitokoto).lower() != "false":
-        content += "\n\n" + one()
+        # 从预取池中取现成的句子，池为空时不附带，避免一言服务拖慢推送
+        with tracing.span("notify.quote"):
+            quote = _quote_pool().take()
+        if quote:
+            content += "\n\n" + quote
 
     notify_function = add_notify_function()
     if not notify_function:
         return {"errors": {"config": "no notification channels configured"}, "channels": 0}
 
-    errors = {}
-    errors_lock = threading.Lock()
-    ts = []
-    for mode in notify_function:
-        ts.append(
-            threading.Thread(
-                target=_run_notify_channel,
-                args=(mode, title, content, errors, errors_lock),
-                name=mode.__name__,
+    # 渠道被记为超时后，调用方的 listener 不再收到该渠道迟到的 success / error
+    gate = _ListenerGate(listener) if listener else None
+    listener = gate
+    outbox = _outbox()
+    if outbox is not None:
+        entry_id = outbox_entry or outbox.add(title, content, [mode.__name__ for mode in notify_function])
+        listener = _outbox_listener(outbox, entry_id, listener)
+
+    pace = timeout is None
+    if timeout is None:
+        timeout = 0 if background else _config_float("NOTIFY_DEADLINE", 30.0)
+    deadline = time.monotonic() + timeout if timeout and timeout > 0 else None
+
+    if listener:
+        for mode in notify_function:
+            listener(mode.__name__, "queued", None)
+    attributes = {"notify.channels": len(notify_function), "run_id": thread, "notify.edit": edit}
+    _INFLIGHT_DELIVERIES.inc()
+    try:
+        with tracing.span("notify.send", attributes) as span:
+            futures, errors, results = _dispatch_channels(
+                notify_function, title, content, listener, (thread, edit) if thread else None, deadline, pace
             )
-        )
-    for t in ts:
-        t.start()
-    for t in ts:
-        t.join()
-
-    return {"errors": errors, "channels": len(notify_function)}
+            _, not_done = wait(futures, timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if not_done:
+                span.fail(f"{len(not_done)} 个渠道超时")
+    finally:
+        _INFLIGHT_DELIVERIES.dec()
+
+    timed_out = []
+    if not_done:
+        # 截止时间已到：返回结果的快照，不再等待未完成的渠道
+        for mode, future in zip(notify_function, futures):
+            # 等待返回后刚好完成并已上报最终状态的渠道不再记为超时
+            if future in not_done and (gate is None or gate.expire(mode.__name__)):
+                timed_out.append(mode.__name__)
+        errors = dict(errors)
+        results = dict(results)
+        for name in timed_out:
+            errors[name] = f"超时：{timeout:g} 秒内未完成"
+            results[name] = ChannelResult(False, channel=name, error=errors[name])
+            if gate is not None:
+                gate.listener(name, "timeout", {"error": errors[name]})
+
+    breakers = _breakers()
+    limiters = _rate_limiters()
+    return {
+        "errors": errors,
+        "timed_out": timed_out,
+        "channels": len(notify_function),
+        "results": {
+            mode.__name__: results[mode.__name__].to_dict() for mode in notify_function if mode.__name__ in results
+        },
+        "breakers": {mode.__name__: breakers.get(mode.__name__).state for mode in notify_function},
+        "rate_limits": {
+            mode.__name__: limiters.get(mode.__name__).snapshot()
+            for mode in notify_function
+            if limiters.get(mode.__name__) is not None
+        },
+        "dispatcher": _dispatcher().stats(),
+    }
 
 
 def main():
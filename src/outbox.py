@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+持久化发件箱（追加写日志）。
+
+每条待推送消息在分发前以 ``add`` 记录写入日志并落盘，每个渠道完成后追加 ``ack`` 记录。
+进程被杀死后，下次启动时未 ack 的渠道会被重新投递（至少一次语义）。
+
+- 每个进程写自己的日志段 ``journal-*.log`` 并持有其文件锁；启动时能加锁成功的
+  其它日志段说明其进程已退出，由当前进程接管
+- 写入由后台线程批量完成，一批记录只做一次 fsync（group commit）
+- 日志超过阈值时重写为仅包含未完成条目的新文件（压缩）
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def _lock(handle) -> bool:
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _fsync_dir(directory: str) -> None:
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replay(path: str) -> "OrderedDict[str, Dict[str, Any]]":
+    """读取日志，返回仍有渠道未完成的条目（忽略损坏或写了一半的行）"""
+    entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    try:
+        handle = open(path, "rb")
+    except OSError:
+        return entries
+    with handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            op = record.get("op")
+            entry_id = record.get("id")
+            if op == "add":
+                entries[entry_id] = {
+                    "id": entry_id,
+                    "ts": record.get("ts"),
+                    "title": record.get("title", ""),
+                    "content": record.get("content", ""),
+                    "channels": list(record.get("channels", [])),
+                }
+            elif op == "ack" and entry_id in entries:
+                channels = entries[entry_id]["channels"]
+                if record.get("channel") in channels:
+                    channels.remove(record.get("channel"))
+                if not channels:
+                    del entries[entry_id]
+    return entries
+
+
+class Outbox:
+    """追加写日志实现的发件箱，一个进程一个实例"""
+
+    def __init__(
+        self,
+        directory: str,
+        commit_interval: float = 0.002,
+        max_batch: int = 256,
+        compact_bytes: int = 1024 * 1024,
+    ):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.commit_interval = max(0.0, commit_interval)
+        self.max_batch = max(1, max_batch)
+        self.compact_bytes = max(4096, compact_bytes)
+        os.makedirs(self.directory, exist_ok=True)
+
+        name = f"journal-{int(time.time() * 1000)}-{os.getpid()}-{uuid.uuid4().hex[:6]}.log"
+        self.path = os.path.join(self.directory, name)
+        self._handle = open(self.path, "ab")
+        _lock(self._handle)
+        _fsync_dir(self.directory)
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._queue: List[tuple] = []
+        self._cond = threading.Condition()
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self._size = 0
+        self._compact_at = self.compact_bytes
+        self.commits = 0
+        self.records = 0
+        self._writer = threading.Thread(target=self._write_loop, name="notify-outbox", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------ 写入
+
+    def add(self, title: str, content: str, channels: List[str]) -> str:
+        """登记一条待推送消息，落盘后返回条目 ID"""
+        entry_id = uuid.uuid4().hex
+        entry = {
+            "id": entry_id,
+            "ts": time.time(),
+            "title": title,
+            "content": content,
+            "channels": list(channels),
+        }
+        with self._cond:
+            self._entries[entry_id] = entry
+        self._append(dict(entry, op="add"), durable=True)
+        return entry_id
+
+    def ack(self, entry_id: str, channel: str, state: str) -> None:
+        """标记某渠道已完成（成功或最终失败），不等待落盘"""
+        with self._cond:
+            entry = self._entries.get(entry_id)
+            if entry is None or channel not in entry["channels"]:
+                return
+            entry["channels"].remove(channel)
+            if not entry["channels"]:
+                del self._entries[entry_id]
+        self._append({"op": "ack", "id": entry_id, "channel": channel, "state": state}, durable=False)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            return [dict(entry, channels=list(entry["channels"])) for entry in self._entries.values()]
+
+    def _append(self, record: Dict[str, Any], durable: bool) -> None:
+        line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        done = threading.Event() if durable else None
+        with self._cond:
+            if self._closing:
+                if durable:
+                    raise RuntimeError("outbox is closed")
+                return
+            self._queue.append((line, done))
+            self._cond.notify_all()
+        if done is not None:
+            done.wait()
+            if self._error is not None:
+                raise RuntimeError(f"outbox write failed: {self._error}")
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue and self._closing:
+                    return
+                if self.commit_interval and len(self._queue) < self.max_batch and not self._closing:
+                    # 稍等片刻，让并发写入者搭上同一次 fsync
+                    self._cond.wait(self.commit_interval)
+                batch, self._queue = self._queue, []
+            try:
+                self._handle.write(b"".join(line for line, _ in batch))
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+                self._size += sum(len(line) for line, _ in batch)
+                self.commits += 1
+                self.records += len(batch)
+            except OSError as exc:
+                self._error = exc
+            for _, done in batch:
+                if done is not None:
+                    done.set()
+            if self._size >= self._compact_at:
+                self._compact()
+
+    # ------------------------------------------------------------------ 压缩与恢复
+
+    def _compact(self) -> None:
+        """把日志重写为只包含未完成条目的新文件（仅在写线程内调用）"""
+        tmp_path = self.path + ".tmp"
+        with self._cond:
+            data = b"".join(
+                json.dumps(dict(entry, op="add"), ensure_ascii=False).encode("utf-8") + b"\n"
+                for entry in self._entries.values()
+            )
+        try:
+            handle = open(tmp_path, "wb")
+        except OSError:
+            return
+        try:
+            _lock(handle)
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+            os.replace(tmp_path, self.path)
+            _fsync_dir(self.directory)
+        except OSError:
+            # 压缩失败不影响继续追加写原日志
+            handle.close()
+            return
+        self._handle.close()
+        self._handle = handle
+        self._size = len(data)
+        # 未完成条目本身很大时避免反复压缩
+        self._compact_at = max(self.compact_bytes, self._size * 2)
+
+    def recover(self) -> List[Dict[str, Any]]:
+        """接管已退出进程留下的日志段，返回其中未完成的条目"""
+        recovered: List[Dict[str, Any]] = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "journal-*.log"))):
+            if os.path.abspath(path) == self.path:
+                continue
+            try:
+                handle = open(path, "rb")
+            except OSError:
+                continue
+            with handle:
+                if not _lock(handle):
+                    continue  # 其所属进程仍在运行
+                entries = list(replay(path).values())
+                for entry in entries:
+                    with self._cond:
+                        self._entries[entry["id"]] = entry
+                    self._append(dict(entry, op="add"), durable=True)
+                recovered.extend(entries)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return recovered
+
+    def close(self) -> None:
+        """写出剩余记录；没有未完成条目时删除自己的日志段"""
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._writer.join()
+        with self._cond:
+            empty = not self._entries
+        if not empty and self._size >= self.compact_bytes:
+            self._compact()
+        self._handle.close()
+        if empty and self._error is None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "path": self.path,
+                "pending": len(self._entries),
+                "queued": len(self._queue),
+                "bytes": self._size,
+                "commits": self.commits,
+                "records": self.records,
+            }
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+按请求的性能剖析。
+
+MCP_PUSH_PROFILE 选择要剖析的请求：
+- ``all``：每个请求
+- ``every:N``：每 N 个请求剖析一个
+- ``slow:MS``：每个请求都剖析，但只保存耗时不少于 MS 毫秒的结果
+
+被选中的请求在处理线程上运行 cProfile，同时由采样线程按 MCP_PUSH_PROFILE_INTERVAL_MS
+（默认 5 毫秒）定期读取所有线程的调用栈（sys._current_frames），覆盖渠道分发线程中的时间，
+包括等待 HTTP 响应的时间。同一时刻只剖析一个请求，其余请求照常执行、不剖析。
+
+结果按请求 id 写入 MCP_PUSH_PROFILE_DIR（默认 ~/.cache/mcp-push/profiles），每个请求三个文件：
+- ``<名称>.prof``：cProfile 结果，可用 pstats / snakeviz 查看
+- ``<名称>.stacks.txt``：折叠调用栈（"线程;函数;函数 次数"），可直接生成火焰图
+- ``<名称>.json``：请求方法、工具名、耗时与采样数
+目录中只保留最近 MCP_PUSH_PROFILE_KEEP（默认 50）个请求的结果。
+"""
+import cProfile
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+try:
+    from .debug import debug_log
+except ImportError:  # 直接以脚本运行
+    from debug import debug_log
+
+_SUFFIXES = (".prof", ".stacks.txt", ".json")
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def default_profile_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mcp-push", "profiles")
+
+
+class StackSampler:
+    """定期采样所有线程（自身除外）的调用栈，按折叠格式计数"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = max(0.001, interval)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mcp-profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stack.reverse()
+                self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+
+class _Session:
+    """一次被剖析的请求"""
+
+    __slots__ = ("profiler", "label", "meta", "cprofile", "sampler", "started")
+
+    def __init__(self, profiler: "RequestProfiler", label: str, meta: Dict[str, Any]):
+        self.profiler = profiler
+        self.label = label
+        self.meta = meta
+        self.cprofile = cProfile.Profile()
+        self.sampler = StackSampler(profiler.interval)
+        self.started = 0.0
+
+    def __enter__(self) -> "_Session":
+        self.sampler.start()
+        self.started = time.perf_counter()
+        try:
+            self.cprofile.enable()
+        except ValueError:
+            # 已有其它剖析工具在运行（如调试器），只保留采样结果
+            self.cprofile = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        self.sampler.stop()
+        self.profiler._finish(self, elapsed_ms)
+        return False
+
+
+class _Skip:
+    """未被选中的请求"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_Skip":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_SKIP = _Skip()
+
+
+class RequestProfiler:
+    """按 mode 选择请求进行剖析，结果写入 directory 并按 keep 清理旧结果"""
+
+    def __init__(self, mode: str, directory: Optional[str] = None, keep: int = 50, interval: float = 0.005):
+        self.mode, self.every, self.slow_ms = self.parse_mode(mode)
+        self.directory = os.path.expanduser(directory or default_profile_dir())
+        self.keep = max(1, int(keep))
+        self.interval = interval
+        self._counter = itertools.count(1)
+        self._busy = threading.Lock()
+        self._writers: List[threading.Thread] = []
+        self._writers_lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+    @staticmethod
+    def parse_mode(mode: str) -> tuple:
+        """返回 (模式, N, 阈值毫秒)；无法识别时抛出 ValueError"""
+        text = str(mode).strip().lower()
+        if text in ("1", "true", "yes", "on", "all"):
+            return "all", 1, 0.0
+        name, sep, value = text.partition(":")
+        if sep and name == "every" and value.isdigit() and int(value) > 0:
+            return "every", int(value), 0.0
+        if sep and name == "slow":
+            threshold = float(value)
+            if threshold >= 0:
+                return "slow", 1, threshold
+        raise ValueError(f"无法识别的 MCP_PUSH_PROFILE: {mode}")
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestProfiler"]:
+        """按 MCP_PUSH_PROFILE* 环境变量创建；未开启或配置无效时返回 None"""
+        mode = os.environ.get("MCP_PUSH_PROFILE", "").strip()
+        if mode.lower() in ("", "0", "false", "no", "off"):
+            return None
+        if not hasattr(sys, "_current_frames"):
+            debug_log("mcp-push: MCP_PUSH_PROFILE requires sys._current_frames, profiling disabled")
+            return None
+        try:
+            keep = int(os.environ.get("MCP_PUSH_PROFILE_KEEP") or 50)
+            interval = float(os.environ.get("MCP_PUSH_PROFILE_INTERVAL_MS") or 5) / 1000
+            return cls(mode, os.environ.get("MCP_PUSH_PROFILE_DIR"), keep, interval)
+        except ValueError as exc:
+            debug_log(f"mcp-push: invalid profiling config, profiling disabled: {exc}")
+            return None
+
+    def profile(self, request_id: Any, meta: Optional[Dict[str, Any]] = None):
+        """
+        上下文管理器：请求被选中且当前没有其它请求在剖析时记录该请求，否则不做任何事。
+        meta 随结果写入 .json（如 method、tool）。
+        """
+        if self.mode == "every" and next(self._counter) % self.every:
+            return _SKIP
+        if not self._busy.acquire(blocking=False):
+            return _SKIP
+        label = _UNSAFE.sub("_", str(request_id))[:64] or "none"
+        return _Session(self, label, dict(meta or {}, id=request_id))
+
+    def _finish(self, session: _Session, elapsed_ms: float) -> None:
+        self._busy.release()
+        if self.mode == "slow" and elapsed_ms < self.slow_ms:
+            return
+        session.meta.update(
+            duration_ms=round(elapsed_ms, 3),
+            samples=session.sampler.samples,
+            interval_ms=round(self.interval * 1000, 3),
+            time=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        )
+        # 写文件放到后台线程，不增加请求的响应时间；非守护线程，进程退出前会写完
+        writer = threading.Thread(target=self._write, args=(session,), name="mcp-profile-writer")
+        with self._writers_lock:
+            self._writers = [thread for thread in self._writers if thread.is_alive()]
+            self._writers.append(writer)
+        writer.start()
+
+    def flush(self) -> None:
+        """等待剖析结果全部写出"""
+        with self._writers_lock:
+            writers = list(self._writers)
+        for writer in writers:
+            writer.join()
+
+    def _write(self, session: _Session) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            base = os.path.join(self.directory, f"{stamp}-{next(self._seq):06d}-{session.label}")
+            if session.cprofile is not None:
+                session.cprofile.dump_stats(base + ".prof")
+            with open(base + ".stacks.txt", "w", encoding="utf-8") as handle:
+                for stack, count in session.sampler.stacks.most_common():
+                    handle.write(f"{stack} {count}\n")
+            with open(base + ".json", "w", encoding="utf-8") as handle:
+                json.dump(session.meta, handle, ensure_ascii=False, indent=2, default=str)
+            self._prune()
+        except Exception as exc:
+            debug_log(f"mcp-push: failed to write profile for {session.label}: {exc}")
+
+    def _prune(self) -> None:
+        """只保留最近 keep 个请求的结果（文件名以时间与序号开头，按名称排序即按时间排序）"""
+        bases = set()
+        for name in os.listdir(self.directory):
+            for suffix in _SUFFIXES:
+                if name.endswith(suffix):
+                    bases.add(name[: -len(suffix)])
+                    break
+        for base in sorted(bases)[: max(0, len(bases) - self.keep)]:
+            for suffix in _SUFFIXES:
+                try:
+                    os.remove(os.path.join(self.directory, base + suffix))
+                except FileNotFoundError:
+                    pass
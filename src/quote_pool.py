@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+后台预取的一言（随机句子）池。
+
+推送时只从池中取一条现成的句子（O(1)，不等待网络）；池中句子数降到补充阈值时，
+由一个后台线程补满。池为空时返回 None，消息照常推送、不附带句子。
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+
+class QuotePool:
+    """后台补充的句子池，线程安全"""
+
+    def __init__(
+        self,
+        fetch: Callable[[], str],
+        size: int = 8,
+        refill_at: int = 2,
+        retry_delay: float = 30.0,
+    ):
+        self._fetch = fetch
+        self.size = max(1, int(size))
+        self.refill_at = min(max(0, int(refill_at)), self.size - 1)
+        self.retry_delay = max(0.0, float(retry_delay))
+        self._quotes: deque = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._retry_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def take(self) -> Optional[str]:
+        """取出一条句子；池为空时返回 None"""
+        with self._lock:
+            quote = self._quotes.popleft() if self._quotes else None
+            if quote is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._maybe_refill_locked()
+        return quote
+
+    def warm(self) -> None:
+        """提前开始填充，不等待"""
+        with self._lock:
+            self._maybe_refill_locked()
+
+    def _maybe_refill_locked(self) -> None:
+        if self._refilling or len(self._quotes) > self.refill_at:
+            return
+        if time.monotonic() < self._retry_at:
+            return  # 上次获取失败，冷却中
+        self._refilling = True
+        threading.Thread(target=self._refill, name="hitokoto-refill", daemon=True).start()
+
+    def _refill(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    if len(self._quotes) >= self.size:
+                        return
+                try:
+                    quote = self._fetch()
+                except Exception:
+                    with self._lock:
+                        self.failures += 1
+                        self._retry_at = time.monotonic() + self.retry_delay
+                    return
+                with self._lock:
+                    self._quotes.append(quote)
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "available": len(self._quotes),
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "failures": self.failures,
+            }
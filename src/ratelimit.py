@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+按渠道的令牌桶限速。
+
+超出速率的消息不会被发出后再被服务商拒绝，而是排队等待令牌、按速率依次发出。
+令牌可以“预支”：每个请求在锁内预订一个令牌并算出需要等待的时间，
+因此多个并发等待者按到达顺序被均匀地放行。
+"""
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+_UNITS = {"s": 1.0, "sec": 1.0, "m": 60.0, "min": 60.0, "h": 3600.0, "hour": 3600.0}
+_SPEC = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*/\s*([a-z]+)\s*(?::\s*(\d+(?:\.\d+)?))?\s*$")
+
+
+def parse_rate(spec: str) -> Optional[Tuple[float, float]]:
+    """
+    解析 "次数/时间单位[:突发容量]"，如 "20/min"、"1/s:1"，返回 (每秒令牌数, 桶容量)。
+    "off"、"0" 或空值表示不限速，返回 None。
+    """
+    if not spec or str(spec).strip().lower() in ("off", "0", "none", "false"):
+        return None
+    match = _SPEC.match(str(spec).lower())
+    if not match or match.group(2) not in _UNITS:
+        raise ValueError(f"invalid rate limit: {spec!r}")
+    count = float(match.group(1))
+    rate = count / _UNITS[match.group(2)]
+    capacity = float(match.group(3)) if match.group(3) else count
+    if rate <= 0:
+        return None
+    return rate, max(1.0, capacity)
+
+
+class TokenBucket:
+    """令牌桶；acquire() 排队等待而不是拒绝。clock / sleep 可替换（测试用）"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._waiting = 0
+        self._granted = 0
+        self._throttled = 0
+        self._lock = threading.Lock()
+
+    def _refill_locked(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        取得一个令牌，返回实际等待的秒数。
+        需要等待的时间超过 max_wait 时不预订令牌，返回 None。
+        """
+        with self._lock:
+            self._refill_locked(self._clock())
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1
+            self._granted += 1
+            if wait > 0:
+                self._throttled += 1
+                self._waiting += 1
+        if wait > 0:
+            self._sleep(wait)
+            with self._lock:
+                self._waiting -= 1
+        return wait
+
+    def penalize(self, seconds: float) -> None:
+        """服务端要求暂停时（Retry-After），让后续请求至少等待 seconds 秒"""
+        with self._lock:
+            self._refill_locked(self._clock())
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            self._refill_locked(self._clock())
+            return {
+                "rate_per_sec": round(self.rate, 4),
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 2),
+                "waiting": self._waiting,
+                "granted": self._granted,
+                "throttled": self._throttled,
+            }
+
+
+class RateLimiters:
+    """渠道名 -> 令牌桶；未配置限速的渠道返回 None"""
+
+    def __init__(self, specs: Dict[str, str]):
+        self._buckets: Dict[str, TokenBucket] = {}
+        for name, spec in specs.items():
+            parsed = parse_rate(spec)
+            if parsed is not None:
+                self._buckets[name] = TokenBucket(*parsed)
+
+    def get(self, name: str) -> Optional[TokenBucket]:
+        return self._buckets.get(name)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: bucket.snapshot() for name, bucket in self._buckets.items()}
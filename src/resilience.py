@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+渠道执行的容错层：指数退避重试与熔断器。
+
+- RetryableError：渠道遇到可重试的失败（429、502/503/504、服务商“请求过于频繁”错误码）
+- DeadlineExceeded：本次推送的截止时间已到，不再发出新的请求
+- RetryPolicy：带抖动的指数退避，优先遵循 Retry-After
+- CircuitBreaker：closed → open → half_open，连续失败的渠道在冷却期内直接跳过
+"""
+import email.utils
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+
+class RetryableError(Exception):
+    """可重试的渠道失败，retry_after 为服务端建议的等待秒数"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """本次推送的截止时间已到（不可重试）"""
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """解析 Retry-After（秒数或 HTTP 日期），无法解析时返回 None"""
+    if value in (None, ""):
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(str(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """带随机抖动的指数退避"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max(0.0, float(max_delay))
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """第 attempt 次尝试失败后的等待秒数；服务端要求的等待超过上限时返回 None（放弃重试）"""
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+
+
+class CircuitBreaker:
+    """单个渠道的熔断器"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = max(0.0, float(reset_timeout))
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state_locked()
+
+    def _current_state_locked(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """是否放行本次调用；half_open 状态下只放行一个探测请求"""
+        with self._lock:
+            state = self._current_state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def release(self) -> None:
+        """本次调用既未成功也未失败（如截止时间已到、未发出请求）；若为探测请求则放行下一次探测"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            state = self._current_state_locked()
+            info: Dict[str, object] = {"state": state, "failures": self._failures}
+            if state == self.OPEN:
+                info["retry_in"] = round(self.reset_timeout - (time.monotonic() - self._opened_at), 1)
+            return info
+
+
+class BreakerRegistry:
+    """按渠道名懒创建熔断器"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[name] = breaker
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in breakers.items()}
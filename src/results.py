@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+单个渠道的投递结果。
+
+渠道函数返回 ChannelResult 表示服务商的处理结果（业务码、说明、HTTP 状态）；
+_run_notify_channel 再补上尝试次数与耗时，send() 按渠道汇总后返回给调用方。
+"""
+from typing import Any, Dict, Optional
+
+
+class ChannelResult:
+    """
+    - success：服务商是否确认收到
+    - provider_code / provider_msg：服务商返回的业务码与说明（如 errcode / errmsg）
+    - http_status：最后一次 HTTP 请求的状态码
+    - attempts：尝试次数（含重试）
+    - connect_ms：最后一次请求新建连接的耗时，复用长连接时为 None
+    - ttfb_ms：最后一次请求从发出到收到响应头的耗时
+    - total_ms：渠道从开始执行到结束的总耗时（含限速排队与重试）
+    """
+
+    __slots__ = (
+        "channel",
+        "success",
+        "provider_code",
+        "provider_msg",
+        "http_status",
+        "attempts",
+        "connect_ms",
+        "ttfb_ms",
+        "total_ms",
+        "error",
+    )
+
+    def __init__(
+        self,
+        success: bool,
+        provider_code: Any = None,
+        provider_msg: Optional[str] = None,
+        http_status: Optional[int] = None,
+        channel: Optional[str] = None,
+        attempts: int = 0,
+        connect_ms: Optional[float] = None,
+        ttfb_ms: Optional[float] = None,
+        total_ms: Optional[float] = None,
+        error: Optional[str] = None,
+    ):
+        self.channel = channel
+        self.success = bool(success)
+        self.provider_code = provider_code
+        self.provider_msg = provider_msg
+        self.http_status = http_status
+        self.attempts = attempts
+        self.connect_ms = connect_ms
+        self.ttfb_ms = ttfb_ms
+        self.total_ms = total_ms
+        self.error = error
+        if not self.success and self.error is None:
+            detail = " ".join(str(part) for part in (provider_code, provider_msg) if part not in (None, ""))
+            self.error = f"服务商返回失败：{detail}" if detail else "服务商返回失败"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """省略为 None 的字段；耗时保留一位小数"""
+        data: Dict[str, Any] = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if name.endswith("_ms"):
+                value = round(value, 1)
+            data[name] = value
+        return data
+
+    def __repr__(self) -> str:
+        return f"ChannelResult({self.to_dict()!r})"
@@ -5,25 +5,89 @@ Provides standardized MCP tool interface for notification channels
 """
 
 import builtins
+import contextlib
+import functools
 import json
 import os
 import sys
+import threading
+import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
-_DEBUG_PATH = os.environ.get("MCP_PUSH_DEBUG_PATH", "/tmp/mcp-push.debug.log")
-_DEBUG_ENABLED = os.environ.get("MCP_PUSH_DEBUG") not in (None, "", "0", "false", "False")
+try:
+    from .coalesce import EventCoalescer
+    from .debug import debug_log as _debug_log
+    from .deliveries import DeliveryStore
+    from .framing import FrameError, FrameReader
+    from .profiling import RequestProfiler
+    from . import jsoncodec, metrics, tracing
+except ImportError:
+    # Allow running as a script - add parent dir to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from src.coalesce import EventCoalescer
+    from src.debug import debug_log as _debug_log
+    from src.deliveries import DeliveryStore
+    from src.framing import FrameError, FrameReader
+    from src.profiling import RequestProfiler
+    from src import jsoncodec, metrics, tracing
 
 
-def _debug_log(message: str) -> None:
-    if not _DEBUG_ENABLED:
-        return
+def _env_int(name: str, default: int) -> int:
     try:
-        with open(_DEBUG_PATH, "a", encoding="utf-8") as handle:
-            handle.write(message + "\n")
-    except Exception:
-        pass
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 同时执行的 tools/call 上限；0 表示按顺序逐条处理
+_MAX_INFLIGHT = _env_int("MCP_PUSH_MAX_INFLIGHT", 8)
+
+# async 模式后台投递线程数，以及投递记录的保留条数与保留时间（秒）
+_ASYNC_WORKERS = _env_int("MCP_PUSH_ASYNC_WORKERS", 4)
+_DELIVERY_MAX_RECORDS = _env_int("MCP_PUSH_DELIVERY_MAX_RECORDS", 1000)
+_DELIVERY_TTL_SEC = _env_int("MCP_PUSH_DELIVERY_TTL_SEC", 3600)
+
+# JSON-RPC 批量请求的最大条数，以及并发执行批内请求的线程数
+_MAX_BATCH = _env_int("MCP_PUSH_MAX_BATCH", 50)
+_BATCH_WORKERS = _env_int("MCP_PUSH_BATCH_WORKERS", 8)
+
+# initialize 应答后是否在后台预加载 notify 模块
+_PRELOAD_NOTIFY = os.environ.get("MCP_PUSH_PRELOAD", "1") not in ("0", "false", "False", "no")
+
+# 同一 run_id 的 update 事件合并窗口（毫秒），0 表示不合并
+_COALESCE_WINDOW_MS = _env_int("MCP_PUSH_COALESCE_WINDOW_MS", 0)
+
+# 紧凑 JSON 输出：响应不加分隔空格
+_COMPACT_JSON = os.environ.get("MCP_PUSH_COMPACT_JSON", "0") not in ("0", "false", "False", "no", "")
+
+# 工具结果的 text 默认为紧凑 JSON（structuredContent 已给出同样的数据）；开启后缩进 2 格便于人工阅读
+_PRETTY_JSON = os.environ.get("MCP_PUSH_PRETTY_JSON", "0") not in ("0", "false", "False", "no", "")
+
+# Prometheus 文本格式指标的监听地址（[HOST:]PORT，缺省主机 127.0.0.1），为空时不启用
+_METRICS_ADDR = os.environ.get("MCP_PUSH_METRICS_ADDR", "").strip()
+
+# 内容固定的方法，构造 MCPServer 时预先序列化其 result
+_STATIC_METHODS = ("initialize", "tools/list", "prompts/list")
+
+# 保证并发写出的响应帧不会交错
+_write_lock = threading.Lock()
+
+# 未开启 MCP_PUSH_PROFILE 或请求未被选中时使用
+_NO_PROFILE = contextlib.nullcontext()
+
+# 指标按方法名 / 工具名分组，未知名称归入 other / unknown，避免标签无限增长
+_KNOWN_METHODS = frozenset((
+    "initialize", "initialized", "notifications/initialized",
+    "tools/list", "tools/call", "prompts/list", "prompts/get",
+))
+_KNOWN_TOOLS = frozenset(("notify_send", "notify_event", "notify_status", "notify_metrics"))
+_REQUESTS = metrics.REGISTRY.counter("mcp_push_requests_total", "按 MCP 方法统计的请求数", ("method",))
+_TOOL_LATENCY = metrics.REGISTRY.histogram("mcp_push_tool_call_latency_ms", "tools/call 耗时（毫秒）", ("tool",))
+_TOOL_ERRORS = metrics.REGISTRY.counter("mcp_push_tool_errors_total", "返回 isError 的工具调用数", ("tool",))
 
 
 class MCPAdapter:
@@ -55,19 +119,48 @@ class MCPAdapter:
 class MCPServer:
     """MCP Server 核心实现"""
 
-    def __init__(self):
+    def __init__(self, max_inflight: Optional[int] = None):
         self.tools = self._register_tools()
         self.prompt_text = self._load_prompt_text()
         self.server_info = {"name": "mcp-push", "version": "1.0.0"}
         self.capabilities = {"tools": {}, "prompts": {}}
+        self.max_inflight = _MAX_INFLIGHT if max_inflight is None else max(0, max_inflight)
         self._notify = None
         self._notify_error = None
+        self._notify_lock = threading.Lock()
+        self._preload_thread: Optional[threading.Thread] = None
+        # 当前线程正在处理的调用的进度回调（HTTP 传输的 SSE 流使用）
+        self._call_context = threading.local()
+        self.deliveries = DeliveryStore(_DELIVERY_MAX_RECORDS, _DELIVERY_TTL_SEC)
+        self._async_executor: Optional[ThreadPoolExecutor] = None
+        self._async_lock = threading.Lock()
+        self._batch_executor: Optional[ThreadPoolExecutor] = None
+        self.coalescer: Optional[EventCoalescer] = None
+        if _COALESCE_WINDOW_MS > 0:
+            self.coalescer = EventCoalescer(_COALESCE_WINDOW_MS / 1000, self._send_envelope)
+        # MCP_PUSH_PROFILE 开启时按请求剖析，见 profiling.py
+        self.profiler = RequestProfiler.from_env()
+        self._static_results = {
+            "initialize": self._dumps(self.handle_initialize({})),
+            "tools/list": self._dumps(self.handle_tools_list()),
+            "prompts/list": self._dumps(self.handle_prompts_list()),
+        }
 
     def _get_notify(self):
         if self._notify is not None or self._notify_error is not None:
             if self._notify_error is not None:
                 raise self._notify_error
             return self._notify
+        # 包含等待后台预加载完成的时间
+        with tracing.span("notify.load"):
+            with self._notify_lock:
+                if self._notify is None and self._notify_error is None:
+                    self._load_notify()
+        if self._notify_error is not None:
+            raise self._notify_error
+        return self._notify
+
+    def _load_notify(self) -> None:
         try:
             try:
                 from . import notify  # type: ignore
@@ -85,10 +178,52 @@ class MCPServer:
                     return builtins.print(*args, **kw)
                 notify._print = _stderr_print
             self._notify = notify
-            return notify
         except Exception as exc:
             self._notify_error = exc
-            raise
+            return
+        if hasattr(notify, "recover_outbox"):
+            try:
+                recovered = notify.recover_outbox()
+                if recovered:
+                    _debug_log(f"mcp-push: redelivering {recovered} outbox entries")
+            except Exception as exc:
+                _debug_log(f"mcp-push: outbox recovery failed: {exc}")
+
+    def preload_notify(self) -> None:
+        """
+        在后台线程加载并预热 notify 模块。
+        加载期间到达的工具调用在 _get_notify() 的锁上等待剩余部分；
+        预加载失败时不记入 _notify_error，等待中及之后的工具调用照常重新导入。
+        """
+        if self._preload_thread is not None or self._notify is not None or self._notify_error is not None:
+            return
+        self._preload_thread = threading.Thread(target=self._preload, name="notify-preload", daemon=True)
+        self._preload_thread.start()
+
+    def _preload(self) -> None:
+        started = time.monotonic()
+        error = None
+        with tracing.span("notify.load"):
+            with self._notify_lock:
+                if self._notify is None and self._notify_error is None:
+                    self._load_notify()
+                    error, self._notify_error = self._notify_error, None
+        if error is not None:
+            _debug_log(f"mcp-push: notify preload failed: {error}")
+            return
+        notify = self._notify
+        if notify is None:
+            return
+        loaded = time.monotonic()
+        if hasattr(notify, "warm_up"):
+            try:
+                notify.warm_up()
+            except Exception as exc:
+                _debug_log(f"mcp-push: notify warm-up failed: {exc}")
+        _debug_log(
+            f"mcp-push: notify preloaded in {(loaded - started) * 1000:.0f} ms, "
+            f"warm-up {(time.monotonic() - loaded) * 1000:.0f} ms"
+        )
 
     def _notify_error_response(self, message: str) -> Dict[str, Any]:
         return {
@@ -110,6 +245,15 @@ class MCPServer:
                         "ignore_default_config": {
                             "type": "boolean",
                             "description": "忽略默认配置（仅使用传入配置）"
+                        },
+                        "async": {
+                            "type": "boolean",
+                            "description": "后台推送，立即返回 delivery_id（用 notify_status 查询结果）"
+                        },
+                        "timeout_ms": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "description": "截止时间（毫秒），到时返回已完成渠道的结果，未完成的渠道标记为超时"
                         }
                     },
                     "required": ["title", "content"]
@@ -132,10 +276,44 @@ class MCPServer:
                             "type": "object",
                             "description": "附加数据（step, progress, artifact_url 等）"
                         },
-                        "timestamp": {"type": "string", "format": "date-time"}
+                        "timestamp": {"type": "string", "format": "date-time"},
+                        "async": {
+                            "type": "boolean",
+                            "description": "后台推送，立即返回 delivery_id（用 notify_status 查询结果）"
+                        },
+                        "timeout_ms": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "description": "截止时间（毫秒），到时返回已完成渠道的结果，未完成的渠道标记为超时"
+                        }
                     },
                     "required": ["run_id", "event", "message"]
                 }
+            },
+            {
+                "name": "notify_status",
+                "description": "查询 async 推送的投递状态（各渠道状态与耗时）",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "delivery_id": {"type": "string", "description": "async 推送返回的投递 ID"}
+                    },
+                    "required": ["delivery_id"]
+                }
+            },
+            {
+                "name": "notify_metrics",
+                "description": "查看运行指标（请求数、工具调用耗时、各渠道投递次数 / 失败数 / 耗时百分位、队列深度、在途投递数）",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "format": {
+                            "type": "string",
+                            "enum": ["json", "prometheus"],
+                            "description": "输出格式，默认 json"
+                        }
+                    }
+                }
             }
         ]
 
@@ -189,17 +367,35 @@ class MCPServer:
         normalized_name = {
             "notify_send": "notify_send",
             "notify_event": "notify_event",
+            "notify_status": "notify_status",
+            "notify_metrics": "notify_metrics",
         }.get(tool_name, tool_name)
 
-        if normalized_name == "notify_send":
-            return self._execute_send(arguments)
-        elif normalized_name == "notify_event":
-            return self._execute_event(arguments)
-        else:
-            return {
-                "isError": True,
-                "content": [{"type": "text", "text": f"Unknown tool: {tool_name}"}]
-            }
+        label = (normalized_name if normalized_name in _KNOWN_TOOLS else "unknown",)
+        attributes = {"mcp.tool": label[0]}
+        if isinstance(arguments, dict) and arguments.get("run_id"):
+            attributes["run_id"] = str(arguments["run_id"])
+        started = time.perf_counter()
+        with tracing.span("tools/call", attributes, kind="server") as span:
+            if normalized_name == "notify_send":
+                result = self._execute_send(arguments)
+            elif normalized_name == "notify_event":
+                result = self._execute_event(arguments)
+            elif normalized_name == "notify_status":
+                result = self._execute_status(arguments)
+            elif normalized_name == "notify_metrics":
+                result = self._execute_metrics(arguments)
+            else:
+                result = {
+                    "isError": True,
+                    "content": [{"type": "text", "text": f"Unknown tool: {tool_name}"}]
+                }
+            if result.get("isError"):
+                span.fail(result["content"][0]["text"] if result.get("content") else "isError")
+        _TOOL_LATENCY.observe((time.perf_counter() - started) * 1000, label)
+        if result.get("isError"):
+            _TOOL_ERRORS.inc(label)
+        return result
 
     def _execute_send(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """执行 notify_send 工具"""
@@ -216,38 +412,35 @@ class MCPServer:
                 "isError": True,
                 "content": [{"type": "text", "text": "title 和 content 为必填字段"}]
             }
-
-        try:
-            result = notify.send(title, content, ignore_default_config=ignore_default_config)
-            if not isinstance(result, dict):
-                result = {"errors": {"unknown": "notify.send returned no result"}, "channels": 0}
-            errors = result.get("errors", {})
-            channels = int(result.get("channels", 0) or 0)
-            status = self._status_from_errors(errors, channels)
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": json.dumps(
-                            {
-                                "status": status,
-                                "message": "消息已推送" if status == "success" else "消息推送未完全成功",
-                                "channels_count": channels,
-                                "errors": errors,
-                            },
-                            ensure_ascii=False,
-                            indent=2,
-                        ),
-                    }
-                ],
-                "isError": status == "error",
-            }
-        except Exception as e:
+        timeout = self._timeout_arg(args)
+        if timeout is False:
             return {
                 "isError": True,
-                "content": [{"type": "text", "text": f"推送失败: {str(e)}"}]
+                "content": [{"type": "text", "text": "timeout_ms 必须为正整数"}]
             }
 
+        def deliver(listener=None, entry=None, background=False) -> Dict[str, Any]:
+            result = notify.send(
+                title,
+                content,
+                ignore_default_config=ignore_default_config,
+                listener=listener,
+                timeout=timeout,
+                outbox_entry=entry,
+                background=background,
+            )
+            status, channels, errors = self._summarize(result)
+            return self._with_delivery({
+                "status": status,
+                "message": "消息已推送" if status == "success" else "消息推送未完全成功",
+                "channels_count": channels,
+                "errors": errors,
+            }, result)
+
+        return self._run_delivery(
+            "notify_send", args, deliver, "推送失败", journal=lambda: notify.journal(title, content)
+        )
+
     def _execute_event(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """执行 notify_event 工具"""
         try:
@@ -270,44 +463,232 @@ class MCPServer:
                 "isError": True,
                 "content": [{"type": "text", "text": f"无效的 event 类型: {event}"}]
             }
+        timeout = self._timeout_arg(args)
+        if timeout is False:
+            return {
+                "isError": True,
+                "content": [{"type": "text", "text": "timeout_ms 必须为正整数"}]
+            }
 
         # 自动填充时间戳
         if "timestamp" not in args:
             args["timestamp"] = datetime.utcnow().isoformat() + "Z"
 
+        if self.coalescer is not None:
+            if event == "update":
+                merged = self.coalescer.offer(dict(args))
+                if merged is not None:
+                    payload = {
+                        "status": "coalesced",
+                        "run_id": run_id,
+                        "event": event,
+                        "message": "进度更新已合并，将在窗口结束时推送",
+                        "timestamp": args["timestamp"],
+                    }
+                    payload.update(merged)
+                    return self._tool_result(payload, is_error=False)
+            else:
+                # start / end / error 前先推送缓存的进度摘要
+                self.coalescer.flush(run_id)
+
         # 转换为传统 send() 调用
-        title, content = MCPAdapter.event_to_send(args)
+        with tracing.span("notify.render", {"run_id": str(run_id), "mcp.event": event}):
+            title, content = MCPAdapter.event_to_send(args)
+
+        def deliver(listener=None, entry=None, background=False) -> Dict[str, Any]:
+            # update 编辑本次运行已发出的消息；end / error 发新消息提醒，并结束该线索
+            result = notify.send(
+                title,
+                content,
+                listener=listener,
+                thread=run_id,
+                edit=event == "update",
+                timeout=timeout,
+                outbox_entry=entry,
+                background=background,
+            )
+            if event in ("end", "error"):
+                notify.forget_thread(run_id)
+            status, channels, errors = self._summarize(result)
+            return self._with_delivery({
+                "status": status,
+                "run_id": run_id,
+                "event": event,
+                "message": "事件已推送" if status == "success" else "事件推送未完全成功",
+                "timestamp": args["timestamp"],
+                "channels_count": channels,
+                "errors": errors,
+            }, result)
 
+        return self._run_delivery(
+            "notify_event",
+            args,
+            deliver,
+            "事件推送失败",
+            {"run_id": run_id, "event": event},
+            journal=lambda: notify.journal(title, content),
+        )
+
+    def _send_envelope(self, envelope: Dict[str, Any]) -> None:
+        """推送合并后的进度摘要（由合并窗口回调）"""
         try:
-            result = notify.send(title, content)
-            if not isinstance(result, dict):
-                result = {"errors": {"unknown": "notify.send returned no result"}, "channels": 0}
-            errors = result.get("errors", {})
-            channels = int(result.get("channels", 0) or 0)
-            status = self._status_from_errors(errors, channels)
+            notify = self._get_notify()
+            title, content = MCPAdapter.event_to_send(envelope)
+            result = notify.send(title, content, thread=envelope.get("run_id"), edit=True, background=True)
+            status, _, errors = self._summarize(result)
+            _debug_log(f"mcp-push: digest run_id={envelope.get('run_id')} status={status} errors={errors}")
+        except Exception as exc:
+            _debug_log(f"mcp-push: digest run_id={envelope.get('run_id')} failed: {exc}")
+
+    def _execute_status(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """执行 notify_status 工具"""
+        delivery_id = args.get("delivery_id")
+        if not delivery_id:
             return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": json.dumps({
-                            "status": status,
-                            "run_id": run_id,
-                            "event": event,
-                            "message": "事件已推送" if status == "success" else "事件推送未完全成功",
-                            "timestamp": args["timestamp"],
-                            "channels_count": channels,
-                            "errors": errors,
-                        }, ensure_ascii=False, indent=2)
-                    }
-                ],
-                "isError": status == "error",
+                "isError": True,
+                "content": [{"type": "text", "text": "delivery_id 为必填字段"}]
             }
+        record = self.deliveries.get(delivery_id)
+        if record is None:
+            return {
+                "isError": True,
+                "content": [{"type": "text", "text": f"未知或已过期的 delivery_id: {delivery_id}"}]
+            }
+        return self._tool_result(record, is_error=False)
+
+    def _execute_metrics(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """执行 notify_metrics 工具"""
+        fmt = args.get("format") or "json"
+        if fmt == "prometheus":
+            return {
+                "content": [{"type": "text", "text": metrics.REGISTRY.render_prometheus()}],
+                "isError": False,
+            }
+        if fmt != "json":
+            return {
+                "isError": True,
+                "content": [{"type": "text", "text": "format 必须为 json 或 prometheus"}]
+            }
+        return self._tool_result(metrics.REGISTRY.snapshot(), is_error=False)
+
+    def _run_delivery(
+        self,
+        tool: str,
+        args: Dict[str, Any],
+        deliver: Callable[..., Dict[str, Any]],
+        error_prefix: str,
+        meta: Optional[Dict[str, Any]] = None,
+        journal: Optional[Callable[[], Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        同步执行投递，或在 async 模式下登记后交给后台线程。
+        async 模式先调用 journal 把消息写入发件箱并落盘，再返回投递 ID；写入失败时不受理。
+        后台投递以 background=True 调用 deliver：没有调用方在等待，不使用默认截止时间。
+        """
+        if args.get("async") is True:
+            try:
+                entry = journal() if journal is not None else None
+            except Exception as e:
+                return {
+                    "isError": True,
+                    "content": [{"type": "text", "text": f"{error_prefix}: 发件箱写入失败: {str(e)}"}]
+                }
+            delivery_id = self.deliveries.create(tool, meta)
+            parent = tracing.current()
+            if parent is not None:
+                parent.set("delivery.id", delivery_id)
+            self._get_async_executor().submit(
+                self._deliver_async, delivery_id, functools.partial(deliver, entry=entry, background=True), error_prefix, parent
+            )
+            payload = {"status": "accepted", "delivery_id": delivery_id, "message": "已受理，后台推送中"}
+            if meta:
+                payload.update(meta)
+            return self._tool_result(payload, is_error=False)
+        try:
+            return self._tool_result(deliver(getattr(self._call_context, "progress", None)))
         except Exception as e:
             return {
                 "isError": True,
-                "content": [{"type": "text", "text": f"事件推送失败: {str(e)}"}]
+                "content": [{"type": "text", "text": f"{error_prefix}: {str(e)}"}]
             }
 
+    def _deliver_async(
+        self,
+        delivery_id: str,
+        deliver: Callable[..., Dict[str, Any]],
+        error_prefix: str,
+        parent: Any = None,
+    ) -> None:
+        def listener(channel: str, state: str, info: Optional[Dict[str, Any]] = None) -> None:
+            self.deliveries.update_channel(delivery_id, channel, state, info)
+
+        # parent 为受理该投递的 tools/call span，后台投递归入同一调用链
+        with tracing.span("delivery", {"delivery.id": delivery_id}, parent=parent) as span:
+            try:
+                payload = deliver(listener)
+                self.deliveries.complete(delivery_id, payload["status"], payload)
+                if payload["status"] == "error":
+                    span.fail(str(payload.get("errors")))
+            except Exception as e:
+                _debug_log(f"mcp-push: async delivery {delivery_id} failed: {e}")
+                span.fail(str(e))
+                self.deliveries.complete(delivery_id, "error", {"error": f"{error_prefix}: {str(e)}"})
+
+    def _get_async_executor(self) -> ThreadPoolExecutor:
+        with self._async_lock:
+            if self._async_executor is None:
+                self._async_executor = ThreadPoolExecutor(
+                    max_workers=max(1, _ASYNC_WORKERS), thread_name_prefix="mcp-async"
+                )
+            return self._async_executor
+
+    def drain_deliveries(self) -> None:
+        """等待后台投递全部完成（进程退出前调用）"""
+        with self._async_lock:
+            executor, self._async_executor = self._async_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def _tool_result(payload: Dict[str, Any], is_error: Optional[bool] = None) -> Dict[str, Any]:
+        if is_error is None:
+            is_error = payload.get("status") == "error"
+        # structuredContent 供客户端直接读取；text 为兼容旧客户端保留的序列化结果
+        text = jsoncodec.dumps(payload, indent=_PRETTY_JSON, compact=not _PRETTY_JSON)
+        return {
+            "content": [{"type": "text", "text": text.decode("utf-8")}],
+            "structuredContent": payload,
+            "isError": is_error,
+        }
+
+    @staticmethod
+    def _timeout_arg(args: Dict[str, Any]) -> Any:
+        """timeout_ms 参数换算为秒；未提供时返回 None，不合法时返回 False"""
+        value = args.get("timeout_ms")
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            return False
+        return value / 1000
+
+    @staticmethod
+    def _with_delivery(payload: Dict[str, Any], result: Any) -> Dict[str, Any]:
+        """附上各渠道的投递结果（channels）；截止时间前未完成的渠道列入 timed_out"""
+        if not isinstance(result, dict):
+            return payload
+        if result.get("results"):
+            payload["channels"] = result["results"]
+        if result.get("timed_out"):
+            payload["timed_out"] = result["timed_out"]
+        return payload
+
+    def _summarize(self, result: Any) -> tuple:
+        if not isinstance(result, dict):
+            result = {"errors": {"unknown": "notify.send returned no result"}, "channels": 0}
+        errors = result.get("errors", {})
+        channels = int(result.get("channels", 0) or 0)
+        return self._status_from_errors(errors, channels), channels, errors
+
     def _get_active_channels(self) -> List[str]:
         """获取当前激活的推送渠道列表"""
         try:
@@ -356,111 +737,222 @@ class MCPServer:
             return "partial_success"
         return "error"
 
-    def run_stdio(self):
-        """通过 stdio 运行 MCP Server"""
-        _debug_log("mcp-push: run_stdio start")
-        reader = sys.stdin.buffer
-        while True:
-            try:
-                parsed = self._read_request(reader)
-                if parsed is None:
-                    _debug_log("mcp-push: EOF received, exiting")
-                    break
-                request, framed = parsed
-                method = request.get("method")
-                request_id = request.get("id")
-                use_jsonrpc = "jsonrpc" in request or "id" in request
-                _debug_log(f"mcp-push: request method={method} framed={framed} jsonrpc={use_jsonrpc} id={request_id}")
-
-                response = None
-                error = None
-                if method == "initialize":
-                    params = request.get("params", {})
-                    response = self.handle_initialize(params)
-                elif method == "initialized":
-                    response = None
-                elif method == "notifications/initialized":
-                    response = None
-                elif method == "tools/list":
-                    response = self.handle_tools_list()
-                elif method == "prompts/list":
-                    response = self.handle_prompts_list()
-                elif method == "prompts/get":
-                    params = request.get("params", {})
-                    response = self.handle_prompts_get(params)
-                elif method == "tools/call":
-                    params = request.get("params", {})
-                    response = self.handle_tools_call(params)
-                else:
-                    error = {"code": -32601, "message": f"Method not found: {method}"}
-
-                if not (use_jsonrpc and request_id is None):
-                    self._write_response(
-                        response,
-                        framed,
-                        use_jsonrpc=use_jsonrpc,
-                        request_id=request_id,
-                        error=error,
-                    )
-
-            except json.JSONDecodeError as e:
-                error_response = {
-                    "error": {"code": -32700, "message": f"Parse error: {str(e)}"}
-                }
-                _debug_log(f"mcp-push: JSON decode error: {e}")
-                self._write_response(error_response, framed=False)
-            except Exception as e:
-                error_response = {
-                    "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
-                }
-                _debug_log(f"mcp-push: internal error: {e}")
-                self._write_response(error_response, framed=False)
+    def handle_request(self, request: Dict[str, Any]) -> tuple:
+        """分发单个请求，返回 (response, error)"""
+        method = request.get("method")
+        params = request.get("params", {})
+        if method == "initialize":
+            return self.handle_initialize(params), None
+        if method in ("initialized", "notifications/initialized"):
+            return None, None
+        if method == "tools/list":
+            return self.handle_tools_list(), None
+        if method == "prompts/list":
+            return self.handle_prompts_list(), None
+        if method == "prompts/get":
+            return self.handle_prompts_get(params), None
+        if method == "tools/call":
+            return self.handle_tools_call(params), None
+        return None, {"code": -32601, "message": f"Method not found: {method}"}
 
-    @staticmethod
-    def _read_request(reader) -> Optional[tuple]:
-        line = reader.readline()
-        if not line:
+    def process(
+        self, request: Dict[str, Any], progress: Optional[Callable[..., None]] = None
+    ) -> Optional[bytes]:
+        """
+        处理一条请求，返回编码后的响应；通知类消息返回 None。
+        progress(渠道名, 状态, 详情) 可选，同步投递时接收各渠道进度。
+        """
+        request_id = request.get("id")
+        use_jsonrpc = "jsonrpc" in request or "id" in request
+        method = request.get("method")
+        _REQUESTS.inc((method if isinstance(method, str) and method in _KNOWN_METHODS else "other",))
+        static = self._static_results.get(method) if isinstance(method, str) else None
+        if static is not None:
+            # 预先序列化的 result 只需拼接外层信封
+            if not use_jsonrpc:
+                return static
+            if request_id is None:
+                return None
+            return b'{"jsonrpc":"2.0","id":' + self._dumps(request_id) + b',"result":' + static + b"}"
+        self._call_context.progress = progress
+        profile = _NO_PROFILE
+        if self.profiler is not None:
+            params = request.get("params")
+            tool = params.get("name") if method == "tools/call" and isinstance(params, dict) else None
+            label = request_id if request_id is not None else method
+            profile = self.profiler.profile(label, {"method": method, "tool": tool})
+        try:
+            with profile:
+                response, error = self.handle_request(request)
+        except Exception as e:
+            _debug_log(f"mcp-push: internal error: {e}")
+            response, error = None, {"code": -32603, "message": f"Internal error: {str(e)}"}
+        finally:
+            self._call_context.progress = None
+        if use_jsonrpc and request_id is None:
             return None
-        if line in (b"\n", b"\r\n"):
-            return MCPServer._read_request(reader)
+        return self._encode_response(response, use_jsonrpc, request_id, error)
+
+    def handle_message(
+        self, message: Any, progress: Optional[Callable[..., None]] = None
+    ) -> Optional[bytes]:
+        """处理单条请求或批量请求（数组），返回编码后的响应"""
+        if isinstance(message, list):
+            return self.process_batch(message)
+        if isinstance(message, dict):
+            return self.process(message, progress=progress)
+        return self._encode_response(None, True, None, {"code": -32600, "message": "Invalid Request"})
+
+    def process_batch(self, batch: List[Any]) -> Optional[bytes]:
+        """
+        并发执行 JSON-RPC 批量请求，按原顺序返回一个响应数组；批内全部为通知时返回 None。
+        同一 run_id 的 notify_event 在同一线程内按顺序执行，保证 start / update / end 的先后。
+        """
+        if not batch:
+            return self._encode_response(None, True, None, {"code": -32600, "message": "Invalid Request: empty batch"})
+        if _MAX_BATCH > 0 and len(batch) > _MAX_BATCH:
+            error = {"code": -32600, "message": f"Invalid Request: batch of {len(batch)} exceeds limit {_MAX_BATCH}"}
+            return self._encode_response(None, True, None, error)
 
-        if line.lower().startswith(b"content-length:"):
-            body = MCPServer._read_framed_body(reader, first_line=line)
-            return json.loads(body.decode("utf-8")), True
+        results: List[Optional[bytes]] = [None] * len(batch)
+        groups: Dict[Any, List[int]] = {}
+        for index, message in enumerate(batch):
+            if not isinstance(message, dict):
+                results[index] = self._encode_response(None, True, None, {"code": -32600, "message": "Invalid Request"})
+                continue
+            groups.setdefault(self._batch_key(message, index), []).append(index)
 
-        return json.loads(line.decode("utf-8").strip()), False
+        def run(indexes: List[int]) -> None:
+            for index in indexes:
+                results[index] = self.process(batch[index])
+
+        if len(groups) == 1:
+            run(next(iter(groups.values())))
+        else:
+            for future in [self._get_batch_executor().submit(run, indexes) for indexes in groups.values()]:
+                future.result()
+        parts = [part for part in results if part is not None]
+        if not parts:
+            return None
+        return b"[" + b",".join(parts) + b"]"
 
     @staticmethod
-    def _read_framed_body(reader, first_line: bytes) -> bytes:
-        headers = {}
+    def _batch_key(message: Dict[str, Any], index: int) -> Any:
+        params = message.get("params") or {}
+        if message.get("method") == "tools/call" and isinstance(params, dict):
+            arguments = params.get("arguments") or {}
+            name = str(params.get("name", "")).replace("-", "_")
+            if name == "notify_event" and isinstance(arguments, dict) and arguments.get("run_id"):
+                return ("run", arguments["run_id"])
+        return index
 
-        def add_header(header_line: bytes) -> None:
-            try:
-                name, value = header_line.decode("ascii").split(":", 1)
-            except ValueError:
-                return
-            headers[name.strip().lower()] = value.strip()
-
-        add_header(first_line)
-        while True:
-            line = reader.readline()
-            if not line:
-                raise ValueError("Connection closed before headers complete")
-            if line in (b"\n", b"\r\n"):
-                break
-            add_header(line)
-
-        length_str = headers.get("content-length")
-        if not length_str:
-            raise ValueError("Missing Content-Length header")
-        length = int(length_str)
-        if length < 0 or length > 10 * 1024 * 1024:
-            raise ValueError(f"Invalid Content-Length: {length}")
-
-        body = reader.read(length)
-        if len(body) != length:
-            raise ValueError("Connection closed before reading full frame")
-        return body
+    def _get_batch_executor(self) -> ThreadPoolExecutor:
+        with self._async_lock:
+            if self._batch_executor is None:
+                self._batch_executor = ThreadPoolExecutor(
+                    max_workers=max(1, _BATCH_WORKERS), thread_name_prefix="mcp-batch"
+                )
+            return self._batch_executor
+
+    def _respond(self, request: Any, framed: bool) -> None:
+        """处理请求并写出响应（通知类消息不写出）"""
+        payload = self.handle_message(request)
+        if payload is not None:
+            self._write_payload(payload, framed)
+            _debug_log(f"mcp-push: response sent framed={framed} batch={isinstance(request, list)}")
+        if _PRELOAD_NOTIFY and isinstance(request, dict) and request.get("method") == "initialize":
+            self.preload_notify()
+
+    def run_stdio(self):
+        """通过 stdio 运行 MCP Server
+
+        max_inflight > 0 时 tools/call 交给工作线程执行，读取循环继续处理后续请求，
+        响应按完成顺序写出并以 id 对应；在途调用达到上限时暂停读取（背压）。
+        同一 run_id 的 notify_event 与批量请求一样按到达顺序依次执行（同一工作线程内排队），
+        保证 start / update / end 的先后。
+        """
+        _debug_log(f"mcp-push: run_stdio start max_inflight={self.max_inflight}")
+        reader = FrameReader(sys.stdin.buffer)
+        executor = None
+        slots = None
+        if self.max_inflight > 0:
+            executor = ThreadPoolExecutor(
+                max_workers=self.max_inflight, thread_name_prefix="mcp-call"
+            )
+            slots = threading.BoundedSemaphore(self.max_inflight)
+        # run_id -> 等待执行的同一 run_id 请求；键存在表示该 run_id 已有请求在执行
+        lanes: Dict[Any, deque] = {}
+        lanes_lock = threading.Lock()
+
+        def run_lane(key: Any, request: Any, framed: bool) -> None:
+            while True:
+                try:
+                    self._respond(request, framed)
+                finally:
+                    slots.release()
+                with lanes_lock:
+                    if not lanes[key]:
+                        del lanes[key]
+                        return
+                    request, framed = lanes[key].popleft()
+
+        try:
+            while True:
+                try:
+                    parsed = reader.read()
+                    if parsed is None:
+                        _debug_log("mcp-push: EOF received, exiting")
+                        break
+                    request, framed = parsed
+                    if isinstance(request, list):
+                        # 批量请求中含 tools/call 时同样交给工作线程，不阻塞读取循环
+                        method = "tools/call" if any(
+                            isinstance(item, dict) and item.get("method") == "tools/call" for item in request
+                        ) else "batch"
+                        _debug_log(f"mcp-push: batch of {len(request)} framed={framed}")
+                    else:
+                        method = request.get("method") if isinstance(request, dict) else None
+                        _debug_log(
+                            f"mcp-push: request method={method} framed={framed} id="
+                            f"{request.get('id') if isinstance(request, dict) else None}"
+                        )
+                    if executor is not None and method == "tools/call":
+                        slots.acquire()
+                        key = self._batch_key(request, None) if isinstance(request, dict) else None
+                        if key is None:
+                            future = executor.submit(self._respond, request, framed)
+                            future.add_done_callback(lambda _: slots.release())
+                            continue
+                        with lanes_lock:
+                            queued = lanes.get(key)
+                            if queued is not None:
+                                queued.append((request, framed))
+                                continue
+                            lanes[key] = deque()
+                        executor.submit(run_lane, key, request, framed)
+                    else:
+                        self._respond(request, framed)
+
+                except FrameError as e:
+                    # 解析器已跳过出错的帧，继续读取下一条
+                    error_response = {
+                        "error": {"code": -32700, "message": f"Parse error: {e}"}
+                    }
+                    _debug_log(f"mcp-push: malformed frame: {e}")
+                    self._write_response(error_response, framed=e.framed)
+                except Exception as e:
+                    error_response = {
+                        "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
+                    }
+                    _debug_log(f"mcp-push: internal error: {e}")
+                    self._write_response(error_response, framed=False)
+        finally:
+            if executor is not None:
+                # 输入结束后等待在途调用完成再退出
+                executor.shutdown(wait=True)
+            if self.coalescer is not None:
+                self.coalescer.flush_all()
+            self.drain_deliveries()
 
     @staticmethod
     def _write_response(
@@ -470,8 +962,21 @@ class MCPServer:
         request_id: Optional[Any] = None,
         error: Optional[Dict[str, Any]] = None,
     ) -> None:
-        if response is None and error is None:
+        payload = MCPServer._encode_response(response, use_jsonrpc, request_id, error)
+        if payload is None:
             return
+        MCPServer._write_payload(payload, framed)
+        _debug_log(f"mcp-push: response sent framed={framed} jsonrpc={use_jsonrpc} id={request_id}")
+
+    @staticmethod
+    def _encode_response(
+        response: Optional[Dict[str, Any]],
+        use_jsonrpc: bool,
+        request_id: Optional[Any],
+        error: Optional[Dict[str, Any]],
+    ) -> Optional[bytes]:
+        if response is None and error is None:
+            return None
         payload_obj: Dict[str, Any]
         if use_jsonrpc:
             if error:
@@ -480,19 +985,61 @@ class MCPServer:
                 payload_obj = {"jsonrpc": "2.0", "id": request_id, "result": response}
         else:
             payload_obj = response or {"error": error}
+        return MCPServer._dumps(payload_obj)
+
+    @staticmethod
+    def _dumps(obj: Any) -> bytes:
+        return jsoncodec.dumps(obj, compact=_COMPACT_JSON)
 
-        payload = json.dumps(payload_obj, ensure_ascii=False).encode("utf-8")
-        if framed:
-            header = f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii")
-            sys.stdout.buffer.write(header + payload)
+    @staticmethod
+    def _write_payload(payload: bytes, framed: bool) -> None:
+        with _write_lock:
+            if framed:
+                header = f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii")
+                sys.stdout.buffer.write(header + payload)
+            else:
+                sys.stdout.buffer.write(payload + b"\n")
             sys.stdout.buffer.flush()
-        else:
-            print(payload.decode("utf-8"), flush=True)
-        _debug_log(f"mcp-push: response sent framed={framed} jsonrpc={use_jsonrpc} id={request_id}")
 
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="mcp-push", description="MCP notification bridge")
+    parser.add_argument("--daemon", action="store_true", help="以常驻进程运行，在 Unix 域套接字上提供服务")
+    parser.add_argument("--socket", help="守护进程套接字路径（默认 MCP_PUSH_SOCKET 或运行时目录）")
+    parser.add_argument("--http", metavar="[HOST:]PORT", help="以 Streamable HTTP 传输运行，默认监听 127.0.0.1")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=_env_int("MCP_PUSH_HTTP_WORKERS", 32),
+        help="HTTP 传输的工作线程数",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=float(_env_int("MCP_PUSH_DAEMON_IDLE_SEC", 600)),
+        help="守护进程空闲多少秒后退出（默认 600），0 表示不退出",
+    )
+    args = parser.parse_args()
+
     server = MCPServer()
+    if _METRICS_ADDR:
+        endpoint = metrics.serve(_METRICS_ADDR)
+        host, port = endpoint.server_address[:2]
+        _debug_log(f"mcp-push: metrics listening on {host}:{port}/metrics")
+    if args.http:
+        try:
+            from .http_transport import serve as serve_http
+        except ImportError:
+            from src.http_transport import serve as serve_http
+        sys.exit(serve_http(server, args.http, args.workers))
+    if args.daemon:
+        try:
+            from .daemon import serve
+        except ImportError:
+            from src.daemon import serve
+        sys.exit(serve(server, args.socket, args.idle_timeout))
     server.run_stdio()
 
 
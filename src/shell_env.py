@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+登录 shell 环境变量快照。
+
+``zsh -lic printenv`` / ``bash -lc printenv`` 在 rc 文件较重的机器上需要 0.5–3 秒，
+因此把捕获结果缓存在磁盘上：
+
+- 缓存键由 shell 路径与相关 rc/profile 文件的 mtime 组成，任一文件变化即视为过期
+- 有效缓存直接使用；过期缓存先照常使用，同时在后台线程重新捕获并写回缓存
+- 没有缓存时同步捕获一次
+- 捕获时 shell 只继承 HOME、USER 等少数变量，结果只含 rc/profile 文件设置的值，
+  不会把某次调用方进程临时设置的变量缓存下来、再应用到之后的进程
+- 只保留调用方给出的键（push_config 的配置项）；缓存文件可能含密钥，以 0600 权限写入
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .debug import debug_log
+except ImportError:  # 直接以脚本运行
+    from debug import debug_log
+
+_HOME_FILES = {
+    "zsh": [".zshenv", ".zprofile", ".zshrc", ".zlogin"],
+    "bash": [".bash_profile", ".bash_login", ".profile", ".bashrc"],
+    "sh": [".profile"],
+}
+_SYSTEM_FILES = {
+    "zsh": ["/etc/zshenv", "/etc/zprofile", "/etc/zshrc", "/etc/zsh/zshenv", "/etc/zsh/zprofile", "/etc/zsh/zshrc"],
+    "bash": ["/etc/profile", "/etc/bash.bashrc", "/etc/bashrc", "/etc/profile.d"],
+    "sh": ["/etc/profile", "/etc/profile.d"],
+}
+
+
+# 捕获时从调用方进程继承的变量：shell 定位 rc 文件与正常初始化所需的最小集合
+_INHERITED = ("HOME", "USER", "LOGNAME", "SHELL", "ZDOTDIR", "TMPDIR")
+
+
+def shell_command() -> Tuple[str, List[str]]:
+    """返回 (shell 路径, 输出环境变量的命令)"""
+    if os.name == "nt":
+        shell = "pwsh" if shutil.which("pwsh") else "powershell"
+        return shell, [shell, "-Command", "Get-ChildItem Env: | ForEach-Object {\"$($_.Name)=$($_.Value)\"}"]
+    shell = os.environ.get("SHELL", "")
+    if shell.endswith("zsh"):
+        return shell, [shell, "-lic", "printenv"]
+    if shell.endswith("bash"):
+        return shell, [shell, "-lc", "printenv"]
+    return "/bin/sh", ["/bin/sh", "-lc", "printenv"]
+
+
+def _rc_files(shell: str) -> List[str]:
+    kind = "zsh" if shell.endswith("zsh") else "bash" if shell.endswith("bash") else "sh"
+    home = os.path.expanduser("~")
+    zdotdir = os.environ.get("ZDOTDIR", home) if kind == "zsh" else home
+    return [os.path.join(zdotdir, name) for name in _HOME_FILES[kind]] + _SYSTEM_FILES[kind]
+
+
+def fingerprint(shell: str) -> str:
+    """shell 路径 + 各 rc/profile 文件的 mtime（不存在的文件记为 -1）"""
+    parts = [shell, shutil.which(shell) or shell]
+    for path in _rc_files(shell):
+        try:
+            parts.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:-1")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _clean_env() -> Optional[Dict[str, str]]:
+    """捕获用的环境（相当于 env -i HOME=… USER=… SHELL=…）；Windows 上 shell 需要完整环境，返回 None"""
+    if os.name == "nt":
+        return None
+    return {key: os.environ[key] for key in _INHERITED if key in os.environ}
+
+
+def capture(cmd: List[str], timeout: float = 10.0) -> Dict[str, str]:
+    proc = subprocess.run(cmd, capture_output=True, text=True, check=False, timeout=timeout, env=_clean_env())
+    env = {}
+    for line in proc.stdout.splitlines():
+        if "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        if key:
+            env[key] = value
+    return env
+
+
+def default_cache_path() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mcp-push", "shell_env.json")
+
+
+def _read_cache(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("env"), dict):
+        return None
+    return data
+
+
+def _write_cache(path: str, key: str, env: Dict[str, str]) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"key": key, "captured_at": time.time(), "env": env}, handle)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        debug_log(f"mcp-push: shell env cache write failed: {exc}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _capture_and_store(
+    shell: str, cmd: List[str], key: str, path: Optional[str], reason: str, keys: Optional[Iterable[str]] = None
+) -> Dict[str, str]:
+    started = time.monotonic()
+    env = capture(cmd)
+    if keys is not None:
+        env = {name: value for name, value in env.items() if name in keys}
+    elapsed = (time.monotonic() - started) * 1000
+    debug_log(f"mcp-push: shell env captured via {shell} in {elapsed:.0f} ms ({reason}, {len(env)} vars)")
+    if path and env:
+        _write_cache(path, key, env)
+    return env
+
+
+def snapshot(
+    cache_path: Optional[str] = None, max_age: float = 86400.0, keys: Optional[Iterable[str]] = None
+) -> Dict[str, str]:
+    """
+    返回登录 shell 的环境变量；keys 不为 None 时只返回（并缓存）其中列出的变量。
+    cache_path 为 None 时不使用缓存；缓存过期（rc 文件变化或超过 max_age 秒）时先返回旧快照并在后台刷新。
+    """
+    keys = frozenset(keys) if keys is not None else None
+    shell, cmd = shell_command()
+    key = fingerprint(shell) if cache_path else ""
+    if keys is not None:
+        # 键集合变化（如升级后新增配置项）也视为缓存过期
+        key = hashlib.sha256((key + "\n" + "\n".join(sorted(keys))).encode("utf-8")).hexdigest()
+    cached = _read_cache(cache_path) if cache_path else None
+    if cached is None:
+        return _capture_and_store(shell, cmd, key, cache_path, "no cache" if cache_path else "cache disabled", keys)
+
+    age = time.time() - float(cached.get("captured_at") or 0)
+    if cached.get("key") == key and 0 <= age < max_age:
+        debug_log(f"mcp-push: shell env loaded from cache {cache_path} (age {age:.0f} s)")
+    else:
+        reason = "rc files changed" if cached.get("key") != key else f"older than {max_age:.0f} s"
+        debug_log(f"mcp-push: shell env cache stale ({reason}), refreshing in background")
+        threading.Thread(
+            target=_refresh_quietly,
+            args=(shell, cmd, key, cache_path, reason, keys),
+            name="shell-env-refresh",
+            daemon=True,
+        ).start()
+    return {str(k): str(v) for k, v in cached["env"].items() if keys is None or k in keys}
+
+
+def _refresh_quietly(
+    shell: str, cmd: List[str], key: str, path: str, reason: str, keys: Optional[frozenset] = None
+) -> None:
+    try:
+        _capture_and_store(shell, cmd, key, path, reason, keys)
+    except Exception as exc:
+        debug_log(f"mcp-push: shell env refresh failed: {exc}")
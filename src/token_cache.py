@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+access_token 缓存。
+
+- 按调用方给出的键（如 corpid + corpsecret）缓存令牌，遵循服务端返回的 expires_in
+- 过期前 refresh_ahead 秒内由一个后台线程提前刷新，其余调用继续使用旧令牌
+- 令牌已失效时只有一个调用方请求新令牌（single-flight），并发调用等待其结果
+- 可选持久化到磁盘，重启后继续使用未过期的令牌；文件中只保存键的哈希
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# fetch() 返回 (令牌, 有效期秒数)
+Fetcher = Callable[[], Tuple[str, float]]
+
+
+class _Entry:
+    __slots__ = ("token", "expires_at", "refresh_at", "inflight", "error")
+
+    def __init__(self):
+        self.token: Optional[str] = None
+        self.expires_at = 0.0
+        self.refresh_at = 0.0
+        self.inflight: Optional[threading.Event] = None
+        self.error: Optional[BaseException] = None
+
+
+def token_key(*parts: str) -> str:
+    """由凭据生成缓存键（SHA-256），避免明文密钥出现在缓存文件中"""
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """线程安全的令牌缓存"""
+
+    def __init__(self, path: Optional[str] = None, refresh_ahead: float = 300.0, fetch_timeout: float = 30.0):
+        self.path = os.path.abspath(os.path.expanduser(path)) if path else None
+        self.refresh_ahead = max(0.0, float(refresh_ahead))
+        self.fetch_timeout = fetch_timeout
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.fetches = 0
+        self._load()
+
+    def get(self, key: str, fetch: Fetcher) -> str:
+        """返回有效令牌，必要时调用 fetch() 获取新令牌"""
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            now = time.time()
+            if entry.token is not None and now < entry.expires_at:
+                if now >= entry.refresh_at and entry.inflight is None:
+                    # 即将过期：后台提前刷新，本次仍返回旧令牌
+                    entry.inflight = threading.Event()
+                    threading.Thread(
+                        target=self._refresh, args=(key, entry, fetch), name="token-refresh", daemon=True
+                    ).start()
+                return entry.token
+            leader = entry.inflight is None
+            if leader:
+                entry.inflight = threading.Event()
+            inflight = entry.inflight
+        if leader:
+            self._refresh(key, entry, fetch)
+        else:
+            inflight.wait(self.fetch_timeout)
+        with self._lock:
+            if entry.token is not None and time.time() < entry.expires_at:
+                return entry.token
+            error = entry.error
+        raise error if error is not None else TimeoutError("access_token 获取超时")
+
+    def invalidate(self, key: str, token: str) -> None:
+        """服务端判定 token 无效时调用；只作废仍是该值的缓存，避免并发调用重复刷新"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.token == token:
+                entry.token = None
+                entry.expires_at = 0.0
+
+    def _set_locked(self, entry: _Entry, token: str, expires_at: float) -> None:
+        lifetime = max(0.0, expires_at - time.time())
+        entry.token = token
+        entry.expires_at = expires_at
+        # 有效期很短的令牌最多提前一半时间刷新
+        entry.refresh_at = expires_at - min(self.refresh_ahead, lifetime / 2)
+
+    def _refresh(self, key: str, entry: _Entry, fetch: Fetcher) -> None:
+        try:
+            token, expires_in = fetch()
+            error = None
+        except Exception as exc:
+            token, expires_in, error = None, 0, exc
+        with self._lock:
+            self.fetches += 1
+            if token is not None:
+                self._set_locked(entry, token, time.time() + float(expires_in))
+            entry.error = error
+            inflight, entry.inflight = entry.inflight, None
+        if inflight is not None:
+            inflight.set()
+        if token is not None:
+            self._save()
+
+    # ------------------------------------------------------------------ 持久化
+
+    def _load(self) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, item in (data if isinstance(data, dict) else {}).items():
+            try:
+                token, expires_at = str(item["token"]), float(item["expires_at"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if expires_at > now:
+                entry = _Entry()
+                self._set_locked(entry, token, expires_at)
+                self._entries[key] = entry
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                key: {"token": entry.token, "expires_at": entry.expires_at}
+                for key, entry in self._entries.items()
+                if entry.token is not None
+            }
+        with self._save_lock:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(data, handle)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                # 持久化失败不影响内存缓存
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+"""
+轻量的 span 追踪。
+
+设置 MCP_PUSH_TRACE_FILE 后启用：每个根 span（如一次 tools/call）按 MCP_PUSH_TRACE_SAMPLE
+的比例采样，未采样的调用链上所有 span 都是空操作。结束的 span 交给后台线程批量写入 JSONL，
+每行一个 span，字段与 OTLP/JSON 一致（traceId、spanId、parentSpanId、startTimeUnixNano、
+attributes 的 key / value 列表等，resource 同样为 ``{"attributes": [...]}``），文件超过
+MCP_PUSH_TRACE_MAX_MB 后轮转，保留 MCP_PUSH_TRACE_BACKUPS 个旧文件。导出队列满时丢弃新 span，不阻塞调用方。
+
+当前 span 按线程记录；跨线程执行时（渠道分发、async 投递）由调用方取得 current() 后以
+parent 显式传入。
+"""
+import atexit
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    from .jsoncodec import dumps
+except ImportError:  # 直接以脚本运行
+    from jsoncodec import dumps
+
+_KINDS = {
+    "internal": "SPAN_KIND_INTERNAL",
+    "server": "SPAN_KIND_SERVER",
+    "client": "SPAN_KIND_CLIENT",
+}
+_RESOURCE = None
+
+_local = threading.local()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+class JsonlExporter:
+    """后台线程批量写入 JSONL，按大小轮转"""
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 3, queue_size: int = 10000):
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes))
+        self.backups = max(0, int(backups))
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(queue_size)
+        self._handle = None
+        self._size = 0
+        self._thread = threading.Thread(target=self._run, name="mcp-trace-export", daemon=True)
+        self._thread.start()
+
+    def export(self, record: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """等待已提交的 span 全部写出"""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 512:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            try:
+                lines = [dumps(record) + b"\n" for record in batch if record is not None]
+                if lines:
+                    self._write(b"".join(lines))
+            except Exception:
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                if self._handle is not None:
+                    self._handle.close()
+                return
+
+    def _write(self, data: bytes) -> None:
+        if self._handle is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._handle = open(self.path, "ab")
+            self._size = self._handle.tell()
+        if self.max_bytes and self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._handle.write(data)
+        self._handle.flush()
+        self._size += len(data)
+
+    def _rotate(self) -> None:
+        self._handle.close()
+        if self.backups:
+            for index in range(self.backups - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+            self._handle = open(self.path, "ab")
+        else:
+            self._handle = open(self.path, "wb")
+        self._size = 0
+
+
+class Span:
+    """已采样的 span；作为上下文管理器使用时成为当前线程的当前 span"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "attributes",
+        "start_ns", "_started", "error", "_previous",
+    )
+    sampled = True
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: str, attributes: Optional[dict]):
+        self.trace_id = trace_id
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = {key: value for key, value in attributes.items() if value is not None} if attributes else {}
+        self.error: Optional[str] = None
+        self._previous = None
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+
+    def set(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def fail(self, message: str) -> None:
+        self.error = str(message)
+
+    def __enter__(self) -> "Span":
+        self._previous = getattr(_local, "span", None)
+        _local.span = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _local.span = self._previous
+        if exc is not None and self.error is None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        end_ns = self.start_ns + (time.perf_counter_ns() - self._started)
+        if _exporter is not None:
+            _exporter.export(self._record(end_ns))
+        return False
+
+    def _record(self, end_ns: int) -> Dict[str, Any]:
+        record: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _KINDS.get(self.kind, "SPAN_KIND_INTERNAL"),
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": end_ns,
+            "attributes": [{"key": key, "value": _value(value)} for key, value in self.attributes.items()],
+            "status": {"code": "STATUS_CODE_ERROR", "message": self.error} if self.error else {"code": "STATUS_CODE_OK"},
+            "resource": _RESOURCE,
+        }
+        if self.parent_id:
+            record["parentSpanId"] = self.parent_id
+        return record
+
+
+class _Unsampled:
+    """未采样调用链上的 span：不记录，但仍作为当前 span，使其子 span 同样不采样"""
+
+    __slots__ = ("_previous",)
+    sampled = False
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def fail(self, message: str) -> None:
+        pass
+
+    def __enter__(self) -> "_Unsampled":
+        self._previous = getattr(_local, "span", None)
+        _local.span = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _local.span = self._previous
+        return False
+
+
+class _Disabled:
+    """未启用追踪时的空 span"""
+
+    __slots__ = ()
+    sampled = False
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def fail(self, message: str) -> None:
+        pass
+
+    def __enter__(self) -> "_Disabled":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_DISABLED = _Disabled()
+
+
+def _value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None, parent: Any = None, kind: str = "internal"):
+    """
+    创建 span，用作上下文管理器。parent 缺省为当前线程的当前 span；没有父 span 时开始新的
+    调用链并按采样比例决定是否记录。span 内抛出的异常记为错误状态（异常照常向上传递）。
+    """
+    if _exporter is None:
+        return _DISABLED
+    if parent is None:
+        parent = getattr(_local, "span", None)
+    if parent is None:
+        if _sample < 1.0 and random.random() >= _sample:
+            return _Unsampled()
+        return Span(name, "%032x" % random.getrandbits(128), None, kind, attributes)
+    if not parent.sampled:
+        return _Unsampled()
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+
+def current():
+    """当前线程的当前 span，没有时返回 None；用于把调用链传给其它线程"""
+    return getattr(_local, "span", None)
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+_exporter: Optional[JsonlExporter] = None
+_sample = 1.0
+
+
+def configure(
+    path: Optional[str] = None,
+    sample: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+    backups: Optional[int] = None,
+) -> Optional[JsonlExporter]:
+    """
+    按参数（缺省取环境变量）启用或关闭追踪，返回导出器；path 为空时关闭。
+    - MCP_PUSH_TRACE_FILE：JSONL 文件路径
+    - MCP_PUSH_TRACE_SAMPLE：根 span 的采样比例，0 ~ 1，默认 1
+    - MCP_PUSH_TRACE_MAX_MB：单个文件的大小上限（MB），默认 10，0 表示不轮转
+    - MCP_PUSH_TRACE_BACKUPS：保留的旧文件个数，默认 3
+    """
+    global _exporter, _sample, _RESOURCE
+    if path is None:
+        path = os.environ.get("MCP_PUSH_TRACE_FILE", "").strip()
+    if sample is None:
+        sample = _env_float("MCP_PUSH_TRACE_SAMPLE", 1.0)
+    if max_bytes is None:
+        max_bytes = int(_env_float("MCP_PUSH_TRACE_MAX_MB", 10) * 1024 * 1024)
+    if backups is None:
+        backups = int(_env_float("MCP_PUSH_TRACE_BACKUPS", 3))
+    previous, _exporter = _exporter, None
+    if previous is not None:
+        previous.close()
+    _sample = min(1.0, max(0.0, sample))
+    if path:
+        # OTLP Resource：与 span 的 attributes 相同的 key / value 列表
+        _RESOURCE = {
+            "attributes": [
+                {"key": key, "value": _value(value)}
+                for key, value in (("service.name", "mcp-push"), ("process.pid", os.getpid()))
+            ]
+        }
+        _exporter = JsonlExporter(os.path.expanduser(path), max_bytes, backups)
+    return _exporter
+
+
+def _shutdown() -> None:
+    if _exporter is not None:
+        _exporter.close()
+
+
+configure()
+atexit.register(_shutdown)
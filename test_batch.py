@@ -0,0 +1,22 @@
+import json
+
+from src.server import MCPServer
+
+
+def test_batch_returns_one_array_without_notification_responses():
+    server = MCPServer()
+    batch = [
+        {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "prompts/list"},
+        {"jsonrpc": "2.0", "id": 3, "method": "no/such"},
+        7,
+    ]
+    responses = json.loads(server.handle_message(batch))
+    assert [item["id"] for item in responses] == [1, 2, 3, None]
+    assert "tools" in responses[0]["result"]
+    assert responses[2]["error"]["code"] == -32601
+    assert responses[3]["error"]["code"] == -32600
+
+    assert server.handle_message([{"jsonrpc": "2.0", "method": "notifications/initialized"}]) is None
+    assert json.loads(server.handle_message([]))["error"]["code"] == -32600
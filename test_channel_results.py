@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+os.environ.setdefault("MCP_PUSH_SHELL_ENV", "0")
+
+from src import notify  # noqa: E402
+from src.results import ChannelResult  # noqa: E402
+
+
+class _Provider(BaseHTTPRequestHandler):
+    """固定返回 HTTP 200，业务码由 path 决定"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.startswith("/message"):
+            body = {"error": "Unauthorized", "errorCode": 401, "errorDescription": "invalid token"}
+        else:
+            body = {"errcode": 0, "errmsg": "ok"}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_provider_rejection_is_reported_per_channel(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), _Provider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    origin = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setitem(notify.push_config, "GOTIFY_URL", origin)
+    monkeypatch.setitem(notify.push_config, "GOTIFY_TOKEN", "token")
+    monkeypatch.setitem(notify.push_config, "QYWX_KEY", "key")
+    monkeypatch.setitem(notify.push_config, "QYWX_ORIGIN", origin)
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [notify.gotify, notify.wecom_bot])
+    try:
+        result = notify.send("title", "content", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert set(result["errors"]) == {"gotify"}
+    gotify = result["results"]["gotify"]
+    assert gotify["success"] is False and gotify["attempts"] == 1
+    assert gotify["http_status"] == 200 and gotify["provider_code"] == 401
+    assert "invalid token" in gotify["error"]
+    wecom = result["results"]["wecom_bot"]
+    assert wecom["success"] is True and wecom["provider_code"] == 0
+    for entry in (gotify, wecom):
+        assert entry["ttfb_ms"] >= 0 and entry["total_ms"] >= entry["ttfb_ms"]
+
+
+def test_channel_result_serialization():
+    failed = ChannelResult(False, provider_code=40001, provider_msg="invalid key", http_status=200)
+    assert failed.error == "服务商返回失败：40001 invalid key"
+    assert failed.to_dict() == {
+        "success": False,
+        "provider_code": 40001,
+        "provider_msg": "invalid key",
+        "http_status": 200,
+        "attempts": 0,
+        "error": "服务商返回失败：40001 invalid key",
+    }
+    ok = ChannelResult(True, channel="bark", attempts=2, ttfb_ms=12.345)
+    assert ok.to_dict() == {"channel": "bark", "success": True, "attempts": 2, "ttfb_ms": 12.3}
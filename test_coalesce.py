@@ -0,0 +1,45 @@
+import time
+
+from src.coalesce import EventCoalescer
+
+
+def test_updates_collapse_into_one_digest_before_end():
+    delivered = []
+    coalescer = EventCoalescer(10, delivered.append)
+
+    assert coalescer.offer({"run_id": "r", "event": "update", "message": "step 0"}) is None
+    for i in range(1, 4):
+        info = coalescer.offer({"run_id": "r", "event": "update", "message": f"step {i}", "data": {"progress": i}})
+        assert info == {"pending_updates": i}
+
+    coalescer.flush("r")
+    assert len(delivered) == 1
+    assert delivered[0]["data"] == {"progress": 3, "coalesced_updates": 3}
+    assert delivered[0]["message"].startswith("step 3")
+
+    # flush 后窗口关闭，下一条 update 重新立即推送
+    assert coalescer.offer({"run_id": "r", "event": "update", "message": "again"}) is None
+
+
+def test_window_expiry_sends_digest():
+    delivered = []
+    coalescer = EventCoalescer(0.05, delivered.append)
+    coalescer.offer({"run_id": "r", "message": "a"})
+    coalescer.offer({"run_id": "r", "message": "b"})
+    time.sleep(0.3)
+    assert [d["data"]["coalesced_updates"] for d in delivered] == [1]
+    assert coalescer.offer({"run_id": "r", "message": "c"}) is None
+
+
+def test_coalescing_is_off_unless_a_window_is_configured(monkeypatch):
+    import os
+
+    from src import server
+
+    if "MCP_PUSH_COALESCE_WINDOW_MS" not in os.environ:
+        assert server._COALESCE_WINDOW_MS == 0
+    monkeypatch.setattr(server, "_COALESCE_WINDOW_MS", 0)
+    assert server.MCPServer().coalescer is None
+    monkeypatch.setattr(server, "_COALESCE_WINDOW_MS", 5000)
+    coalescer = server.MCPServer().coalescer
+    assert coalescer is not None and coalescer.window == 5.0
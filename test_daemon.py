@@ -0,0 +1,103 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+
+def test_daemon_serves_requests_over_unix_socket(tmp_path):
+    path = str(tmp_path / "mcp-push.sock")
+    env = dict(os.environ, CONSOLE="true", HITOKOTO="false", MCP_PUSH_SHELL_ENV="0")
+    proc = subprocess.Popen(
+        [sys.executable, "src/server.py", "--daemon", "--socket", path],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert oct(os.stat(path).st_mode & 0o777) == "0o600"
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+            stream = client.makefile("rwb")
+            for request_id, method in ((1, "initialize"), (2, "tools/list")):
+                stream.write(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method}).encode() + b"\n")
+                stream.flush()
+                assert json.loads(stream.readline())["id"] == request_id
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=10) == 0
+    assert not os.path.exists(path)
+
+
+def _load_mcp_call():
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location("mcp_call", os.path.join(os.path.dirname(__file__), "mcp-call.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_call_daemon_does_not_resend_after_request_was_written(tmp_path, monkeypatch):
+    import threading
+
+    mcp_call = _load_mcp_call()
+    path = str(tmp_path / "mcp-push.sock")
+    monkeypatch.setenv("MCP_PUSH_SOCKET", path)
+    monkeypatch.delenv("MCP_PUSH_DAEMON", raising=False)
+    received = []
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+
+    def accept_and_hang_up():
+        conn, _ = listener.accept()
+        with conn, conn.makefile("rb") as stream:
+            received.append(stream.readline())
+
+    thread = threading.Thread(target=accept_and_hang_up, daemon=True)
+    thread.start()
+    request = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "notify_send"}}
+    try:
+        response = mcp_call.call_daemon(request)
+    finally:
+        thread.join(5)
+        listener.close()
+    # 请求已送达守护进程：返回错误而不是 None，避免调用方退回 call_stdio 再推送一次
+    assert len(received) == 1
+    assert response["id"] == 1 and "未重新发送" in response["error"]["message"]
+
+    # 守护进程不存在且无法启动：返回 None，由调用方直接启动 server.py
+    monkeypatch.setattr(mcp_call, "start_daemon", lambda path: None)
+    assert mcp_call.call_daemon(request) is None
+
+
+def test_daemon_exits_when_config_sh_changes(tmp_path):
+    path = str(tmp_path / "mcp-push.sock")
+    server = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "server.py")
+    env = dict(os.environ, HITOKOTO="false", MCP_PUSH_SHELL_ENV="0")
+    proc = subprocess.Popen(
+        [sys.executable, server, "--daemon", "--socket", path],
+        cwd=str(tmp_path),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert os.path.exists(path)
+        # 工作目录下新建 config.sh：空闲的守护进程退出，下一次调用会启动加载新配置的进程
+        (tmp_path / "config.sh").write_text("export CONSOLE=true\n")
+        assert proc.wait(timeout=10) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+    assert not os.path.exists(path)
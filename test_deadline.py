@@ -0,0 +1,128 @@
+import os
+import socket
+import threading
+import time
+
+os.environ.setdefault("MCP_PUSH_SHELL_ENV", "0")
+
+from src import notify  # noqa: E402
+
+
+def _black_hole():
+    """接受连接但从不响应的服务端"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    accepted = []
+
+    def accept():
+        while True:
+            try:
+                accepted.append(server.accept()[0])
+            except OSError:
+                return
+
+    threading.Thread(target=accept, daemon=True).start()
+    return server, accepted
+
+
+def test_black_holed_endpoint_is_bounded_by_deadline(monkeypatch):
+    server, accepted = _black_hole()
+    monkeypatch.setitem(notify.push_config, "GOTIFY_URL", f"http://127.0.0.1:{server.getsockname()[1]}")
+    monkeypatch.setitem(notify.push_config, "GOTIFY_TOKEN", "token")
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [notify.gotify])
+    try:
+        started = time.monotonic()
+        result = notify.send("title", "content", timeout=0.5)
+        assert time.monotonic() - started < 2.0
+        assert "gotify" in result["errors"]
+    finally:
+        server.close()
+        for conn in accepted:
+            conn.close()
+
+
+def test_unfinished_channels_are_reported_as_timed_out(monkeypatch):
+    def stuck_channel(title, content):
+        time.sleep(1.5)
+
+    def fast_channel(title, content):
+        return None
+
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [stuck_channel, fast_channel])
+    states = []
+    started = time.monotonic()
+    result = notify.send(
+        "title", "content", timeout=0.3, listener=lambda name, state, info=None: states.append((name, state))
+    )
+    assert time.monotonic() - started < 1.0
+    assert result["timed_out"] == ["stuck_channel"]
+    assert set(result["errors"]) == {"stuck_channel"}
+    assert ("stuck_channel", "timeout") in states and ("fast_channel", "success") in states
+
+
+def test_probe_that_misses_deadline_releases_half_open_breaker(monkeypatch):
+    from src.resilience import BreakerRegistry, DeadlineExceeded
+
+    outcomes = iter(["fail", "deadline", "ok"])
+
+    def flaky_channel(title, content):
+        outcome = next(outcomes)
+        if outcome == "fail":
+            raise RuntimeError("provider down")
+        if outcome == "deadline":
+            raise DeadlineExceeded("已到截止时间，未发出请求")
+
+    # 一次失败即熔断，冷却时间为 0：下一次调用就是半开状态的探测
+    monkeypatch.setattr(notify, "_breakers_instance", BreakerRegistry(failure_threshold=1, reset_timeout=0))
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [flaky_channel])
+    assert notify.send("title", "content", timeout=5)["breakers"]["flaky_channel"] == "half_open"
+    probe = notify.send("title", "content", timeout=5)
+    assert "flaky_channel" in probe["errors"] and "熔断" not in probe["errors"]["flaky_channel"]
+    # 探测未发出请求就到期，放行下一次探测，而不是一直停在半开状态
+    result = notify.send("title", "content", timeout=5)
+    assert result["errors"] == {} and result["breakers"]["flaky_channel"] == "closed"
+
+
+def test_late_completion_after_timeout_is_not_reported(monkeypatch):
+    finished = threading.Event()
+
+    def slow_channel(title, content):
+        time.sleep(0.5)
+        finished.set()
+
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [slow_channel])
+    states = []
+    result = notify.send(
+        "title", "content", timeout=0.1, listener=lambda name, state, info=None: states.append(state)
+    )
+    assert result["timed_out"] == ["slow_channel"]
+    assert finished.wait(2.0)
+    time.sleep(0.1)
+    assert states == ["queued", "running", "timeout"]
+
+
+def test_background_deliveries_are_not_bound_by_the_default_deadline(monkeypatch):
+    from src.server import MCPServer
+
+    def slow_channel(title, content):
+        time.sleep(0.4)
+
+    monkeypatch.setitem(notify.push_config, "NOTIFY_DEADLINE", "0.1")
+    monkeypatch.setitem(notify.push_config, "HITOKOTO", "false")
+    monkeypatch.setattr(notify, "_outbox_instance", None)
+    monkeypatch.setattr(notify, "_outbox_checked", True)
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [slow_channel])
+
+    # 同步调用受默认截止时间约束
+    assert notify.send("title", "content")["timed_out"] == ["slow_channel"]
+    time.sleep(0.4)
+
+    server = MCPServer()
+    accepted = server.handle_tools_call(
+        {"name": "notify_send", "arguments": {"title": "t", "content": "c", "async": True}}
+    )["structuredContent"]
+    server.drain_deliveries()
+    record = server.deliveries.get(accepted["delivery_id"])
+    assert record["status"] == "success"
+    assert record["channels"]["slow_channel"]["state"] == "success"
@@ -0,0 +1,82 @@
+import os
+import threading
+
+os.environ.setdefault("MCP_PUSH_SHELL_ENV", "0")
+
+from src import deliveries, notify  # noqa: E402
+from src.deliveries import DeliveryStore  # noqa: E402
+from src.server import MCPServer  # noqa: E402
+
+
+def test_finished_records_expire_by_age(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(deliveries.time, "monotonic", lambda: now[0])
+    store = DeliveryStore(max_records=10, max_age=60)
+    done = store.create("notify_send")
+    running = store.create("notify_send")
+    store.complete(done, "success", {})
+
+    now[0] += 59
+    assert store.get(done)["status"] == "success"
+    now[0] += 1
+    assert store.get(done) is None
+    # 进行中的记录不按存活时间淘汰
+    assert store.get(running)["status"] == "pending"
+
+
+def test_oldest_finished_records_are_evicted_over_capacity():
+    store = DeliveryStore(max_records=2, max_age=0)
+    running = store.create("notify_send")
+    first = store.create("notify_send")
+    store.complete(first, "success", {})
+    second = store.create("notify_send")
+    store.complete(second, "error", {})
+    assert store.get(first) is None
+    assert store.get(second)["status"] == "error" and store.get(running) is not None
+
+    # 全部为进行中的记录时允许暂时超出上限，而不是丢弃未完成的投递
+    store.create("notify_send")
+    assert len(store) == 3
+
+
+def test_notify_status_reports_channel_state_and_latency(monkeypatch):
+    release = threading.Event()
+
+    def fast_channel(title, content):
+        return None
+
+    def slow_channel(title, content):
+        release.wait(5)
+
+    monkeypatch.setitem(notify.push_config, "HITOKOTO", "false")
+    monkeypatch.setattr(notify, "_outbox_instance", None)
+    monkeypatch.setattr(notify, "_outbox_checked", True)
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [fast_channel, slow_channel])
+    server = MCPServer()
+
+    def status(delivery_id):
+        result = server.handle_tools_call({"name": "notify_status", "arguments": {"delivery_id": delivery_id}})
+        return result["structuredContent"]
+
+    try:
+        accepted = server.handle_tools_call(
+            {"name": "notify_send", "arguments": {"title": "t", "content": "c", "async": True}}
+        )["structuredContent"]
+        delivery_id = accepted["delivery_id"]
+        record = status(delivery_id)
+        assert record["status"] in ("pending", "running")
+        assert record["tool"] == "notify_send" and record["finished_at"] is None
+    finally:
+        release.set()
+        server.drain_deliveries()
+
+    record = status(delivery_id)
+    assert record["status"] == "success" and record["finished_at"]
+    for name in ("fast_channel", "slow_channel"):
+        channel = record["channels"][name]
+        assert channel["state"] == "success"
+        assert channel["attempts"] == 1 and channel["latency_ms"] >= 0
+    assert record["channels"]["slow_channel"]["latency_ms"] >= record["channels"]["fast_channel"]["latency_ms"]
+
+    unknown = server.handle_tools_call({"name": "notify_status", "arguments": {"delivery_id": "dlv-missing"}})
+    assert unknown["isError"]
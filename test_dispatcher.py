@@ -0,0 +1,44 @@
+import threading
+import time
+
+from src.dispatcher import ChannelDispatcher
+
+
+def test_hung_channel_does_not_starve_others():
+    dispatcher = ChannelDispatcher(max_workers=4, channel_concurrency=1, idle_timeout=1)
+    release = threading.Event()
+    hung = [dispatcher.submit("smtp", release.wait, 5) for _ in range(3)]
+
+    started = time.monotonic()
+    others = [dispatcher.submit(f"channel-{i}", time.sleep, 0.02) for i in range(6)]
+    for future in others:
+        future.result(timeout=2)
+    assert time.monotonic() - started < 1
+
+    stats = dispatcher.stats()
+    assert stats["channels"]["smtp"] == {"active": 1, "pending": 2}
+    assert stats["queue_depth"] == 2
+    assert stats["workers"] <= 4
+
+    release.set()
+    for future in hung:
+        assert future.result(timeout=2) is True
+    dispatcher.shutdown(wait=True)
+
+
+def test_workers_are_reused_across_submissions():
+    dispatcher = ChannelDispatcher(max_workers=4, channel_concurrency=2, idle_timeout=5)
+    for _ in range(5):
+        assert dispatcher.submit("console", threading.current_thread).result(timeout=2)
+        time.sleep(0.01)
+    stats = dispatcher.stats()
+    assert stats["workers"] == 1
+    assert stats["completed"] == 5
+    dispatcher.shutdown(wait=True)
+
+
+def test_exceptions_are_returned_through_future():
+    dispatcher = ChannelDispatcher(max_workers=1)
+    future = dispatcher.submit("bark", lambda: 1 / 0)
+    assert isinstance(future.exception(timeout=2), ZeroDivisionError)
+    dispatcher.shutdown(wait=True)
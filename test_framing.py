@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from src.framing import FrameError, FrameReader
+
+
+class _Trickle(io.RawIOBase):
+    """每次最多返回 step 字节，模拟管道上被拆开的帧"""
+
+    def __init__(self, data: bytes, step: int):
+        self._data = memoryview(data)
+        self._step = step
+
+    def readable(self):
+        return True
+
+    def read1(self, size=-1):
+        chunk, self._data = self._data[:self._step], self._data[self._step:]
+        return bytes(chunk)
+
+    read = read1
+
+
+def _drain(reader):
+    messages = []
+    while True:
+        try:
+            parsed = reader.read()
+        except FrameError as exc:
+            messages.append(("error", exc.framed))
+            continue
+        if parsed is None:
+            return messages
+        messages.append(parsed)
+
+
+def test_mixed_framing_survives_chunk_boundaries_and_blank_lines():
+    body = b'{"id": 2, "text": "\xe4\xbd\xa0\xe5\xa5\xbd"}'
+    data = (
+        b"\n" * 20000
+        + b'{"id": 1}\n'
+        + b"Content-Type: application/json\r\nContent-Length: %d\r\n\r\n" % len(body)
+        + body
+        + b"\r\n\r\n"
+        + b'[{"id": 3}]'
+    )
+    for step in (1, 7, len(data)):
+        assert _drain(FrameReader(_Trickle(data, step), chunk_size=16)) == [
+            ({"id": 1}, False),
+            ({"id": 2, "text": "你好"}, True),
+            ([{"id": 3}], False),
+        ]
+
+
+def test_malformed_frames_are_reported_without_losing_sync():
+    data = (
+        b'{"id": 1,\n'
+        + b"not json\n"
+        + b"Content-Length: 3\r\n\r\n{x}"
+        + b"X-Other: 1\r\n\r\n"
+        + b"Content-Length: 999\r\n\r\n" + b"z" * 999
+        + b'{"id": 2}\n'
+    )
+    reader = FrameReader(io.BytesIO(data), max_frame=100)
+    assert _drain(reader) == [
+        ("error", False),
+        ("error", False),
+        ("error", True),
+        ("error", True),
+        ("error", True),
+        ({"id": 2}, False),
+    ]
+
+
+def test_truncated_frame_at_eof():
+    reader = FrameReader(io.BytesIO(b"Content-Length: 10\r\n\r\n{}"))
+    with pytest.raises(FrameError):
+        reader.read()
+    assert reader.read() is None
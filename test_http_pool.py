@@ -0,0 +1,120 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src import http_pool
+from src.http_pool import HostSessionPool, last_connect_ms
+
+
+class _Slow(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(0.1)
+        with cls.lock:
+            cls.active -= 1
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Slow)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_channels_on_one_host_share_a_session():
+    pool = HostSessionPool()
+    a = pool.session_for("https://qyapi.weixin.qq.com/cgi-bin/gettoken")
+    b = pool.session_for("https://QYAPI.weixin.qq.com/cgi-bin/webhook/send")
+    c = pool.session_for("https://open.feishu.cn/open-apis/bot")
+    assert a is b and a is not c
+    assert pool.session_for("http://qyapi.weixin.qq.com/") is not a  # scheme 不同不共用
+    assert pool.stats()["created"] == 3
+    pool.close()
+
+
+def test_keep_alive_reuses_the_connection():
+    server, origin = _serve()
+    pool = HostSessionPool()
+    try:
+        assert pool.request("GET", origin + "/a", timeout=5).text == "ok"
+        assert last_connect_ms() is not None
+        assert pool.request("GET", origin + "/b", timeout=5).text == "ok"
+        assert last_connect_ms() is None
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_per_host_connection_cap_is_enforced():
+    server, origin = _serve()
+    _Slow.peak = 0
+    pool = HostSessionPool(pool_maxsize=2)
+    statuses = []
+
+    def fetch():
+        statuses.append(pool.request("GET", origin, timeout=5).status_code)
+
+    threads = [threading.Thread(target=fetch) for _ in range(6)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+    # 超出上限的请求排队等待空闲连接，而不是报错或新建连接
+    assert statuses == [200] * 6
+    assert _Slow.peak == 2
+
+
+def test_idle_sessions_are_swept(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(http_pool.time, "monotonic", lambda: now[0])
+    pool = HostSessionPool(idle_timeout=60)
+    old = pool.session_for("https://api.day.app/")
+    now[0] += 30
+    busy = pool.session_for("https://open.feishu.cn/")
+    now[0] += 30
+    assert pool.evict_idle() == 1
+    assert set(pool.stats()["hosts"]) == {"https://open.feishu.cn"}
+    assert pool.session_for("https://open.feishu.cn/") is busy
+
+    # session_for 顺带清理：超过 idle_timeout / 2 未清理时回收空闲会话
+    now[0] += 61
+    pool.session_for("https://api.telegram.org/")
+    assert set(pool.stats()["hosts"]) == {"https://api.telegram.org"}
+    assert pool.session_for("https://api.day.app/") is not old
+    assert pool.stats()["evicted"] == 2
+
+
+def test_least_recently_used_host_is_evicted_over_max_hosts(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(http_pool.time, "monotonic", lambda: now[0])
+    pool = HostSessionPool(idle_timeout=0, max_hosts=2)
+    first = pool.session_for("https://a.example/")
+    now[0] += 1
+    pool.session_for("https://b.example/")
+    now[0] += 1
+    assert pool.session_for("https://a.example/") is first
+    now[0] += 1
+    pool.session_for("https://c.example/")
+    assert set(pool.stats()["hosts"]) == {"https://a.example", "https://c.example"}
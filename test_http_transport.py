@@ -0,0 +1,182 @@
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _post(port, message, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("POST", "/mcp", json.dumps(message), {"Content-Type": "application/json", **(headers or {})})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+def test_http_transport_json_and_sse():
+    port = _free_port()
+    env = dict(os.environ, CONSOLE="true", HITOKOTO="false", MCP_PUSH_SHELL_ENV="0")
+    proc = subprocess.Popen(
+        [sys.executable, "src/server.py", "--http", f"127.0.0.1:{port}", "--workers", "4"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+
+        response, body = _post(port, {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}})
+        assert response.status == 200
+        session = response.getheader("Mcp-Session-Id")
+        assert session and json.loads(body)["result"]["serverInfo"]["name"] == "mcp-push"
+
+        response, _ = _post(port, {"jsonrpc": "2.0", "method": "notifications/initialized"}, {"Mcp-Session-Id": session})
+        assert response.status == 202
+
+        call = {
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "tools/call",
+            "params": {
+                "name": "notify_send",
+                "arguments": {"title": "t", "content": "c"},
+                "_meta": {"progressToken": "p1"},
+            },
+        }
+        response, body = _post(port, call, {"Accept": "application/json, text/event-stream"})
+        assert response.getheader("Content-Type") == "text/event-stream"
+        events = [json.loads(line[len("data: "):]) for line in body.decode().splitlines() if line.startswith("data: ")]
+        assert events[0]["method"] == "notifications/progress"
+        assert events[-2]["params"]["progress"] == events[-2]["params"]["total"] == 1
+        assert events[-1]["id"] == 2 and events[-1]["result"]["isError"] is False
+
+        listing = {"jsonrpc": "2.0", "id": 3, "method": "tools/list"}
+        with ThreadPoolExecutor(8) as pool:
+            statuses = list(pool.map(lambda _: _post(port, listing)[0].status, range(16)))
+        assert statuses == [200] * 16
+
+        response, _ = _post(port, listing, {"Origin": "http://evil.example"})
+        assert response.status == 403
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=20) == 0
+
+
+def _serve_in_process(**kwargs):
+    import threading
+
+    from src.http_transport import MCPHTTPServer
+    from src.server import MCPServer
+
+    server = MCPHTTPServer(("127.0.0.1", 0), MCPServer(), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_non_object_params_get_a_jsonrpc_error():
+    server = _serve_in_process(workers=2)
+    port = server.server_address[1]
+    try:
+        for params in ([1, 2], {"name": "notify_send", "_meta": ["p1"]}):
+            call = {"jsonrpc": "2.0", "id": 7, "method": "tools/call", "params": params}
+            response, body = _post(port, call, {"Accept": "application/json, text/event-stream"})
+            assert response.status == 200
+            reply = json.loads(body)
+            assert reply["id"] == 7
+            assert "error" in reply or reply["result"]["isError"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_keep_alive_is_closed_when_workers_are_saturated():
+    server = _serve_in_process(workers=2)
+    port = server.server_address[1]
+    listing = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    idle = None
+    try:
+        conn.request("POST", "/mcp", listing, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        assert response.getheader("Connection") is None  # 有空闲线程时保持连接
+
+        # 另一个客户端占住第二个工作线程
+        idle = socket.create_connection(("127.0.0.1", port))
+        deadline = time.monotonic() + 5
+        while not server.saturated() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        conn.request("POST", "/mcp", listing, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 200 and response.getheader("Connection") == "close"
+    finally:
+        conn.close()
+        if idle is not None:
+            idle.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_sessions_are_capped_and_expire(monkeypatch):
+    from src import http_transport
+    from src.http_transport import MCPHTTPServer
+    from src.server import MCPServer
+
+    now = [1000.0]
+    monkeypatch.setattr(http_transport.time, "monotonic", lambda: now[0])
+    server = MCPHTTPServer(("127.0.0.1", 0), MCPServer(), workers=1, max_sessions=2, session_ttl=60)
+    try:
+        first = server.new_session()
+        now[0] += 10
+        second = server.new_session()
+        now[0] += 10
+        assert server.session_known(first)  # 使用后变为最近使用
+        third = server.new_session()
+        assert not server.session_known(second)
+        assert server.session_known(first) and server.session_known(third)
+
+        now[0] += 59
+        assert server.session_known(third)
+        now[0] += 1
+        # first 最近一次使用在 60 秒前，已过期；third 刚被使用
+        assert not server.session_known(first) and server.session_known(third)
+        assert len(server._sessions) == 1
+    finally:
+        server.server_close()
+
+
+def test_request_without_result_gets_a_jsonrpc_error():
+    server = _serve_in_process(workers=2)
+    port = server.server_address[1]
+    try:
+        response, body = _post(port, {"jsonrpc": "2.0", "id": 5, "method": "notifications/initialized"})
+        assert response.status == 200
+        assert json.loads(body) == {
+            "jsonrpc": "2.0",
+            "id": 5,
+            "error": {"code": -32600, "message": "Invalid Request: method notifications/initialized produces no result"},
+        }
+        # 真正的通知（没有 id）返回 202，不带响应体
+        response, body = _post(port, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        assert response.status == 202 and body == b""
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,46 @@
+import json
+
+from src import jsoncodec
+from src.server import MCPServer
+
+
+def test_codec_round_trip_keeps_unicode():
+    payload = {"title": "构建完成", "n": [1, 2.5, None, True]}
+    for options in ({}, {"indent": True}, {"compact": True}):
+        encoded = jsoncodec.dumps(payload, **options)
+        assert isinstance(encoded, bytes) and "构建完成".encode("utf-8") in encoded
+        assert jsoncodec.loads(encoded) == payload
+        assert jsoncodec.loads(memoryview(encoded)) == payload
+    assert b"\n" in jsoncodec.dumps(payload, indent=True)
+
+
+def test_static_responses_match_handlers():
+    server = MCPServer()
+    cases = [
+        ("initialize", server.handle_initialize({})),
+        ("tools/list", server.handle_tools_list()),
+        ("prompts/list", server.handle_prompts_list()),
+    ]
+    for method, expected in cases:
+        response = json.loads(server.process({"jsonrpc": "2.0", "id": "a-1", "method": method}))
+        assert response == {"jsonrpc": "2.0", "id": "a-1", "result": expected}
+        assert json.loads(server.process({"method": method})) == expected
+        assert server.process({"jsonrpc": "2.0", "method": method}) is None
+
+
+def test_tool_result_carries_structured_content():
+    result = MCPServer._tool_result({"status": "success", "channels": 2})
+    assert result["structuredContent"] == {"status": "success", "channels": 2}
+    text = result["content"][0]["text"]
+    assert json.loads(text) == result["structuredContent"]
+    # text 默认紧凑：与 structuredContent 重复的数据不再以缩进格式发送
+    assert text == '{"status":"success","channels":2}'
+    assert result["isError"] is False
+
+
+def test_pretty_tool_result_text_is_opt_in(monkeypatch):
+    from src import server
+
+    monkeypatch.setattr(server, "_PRETTY_JSON", True)
+    result = MCPServer._tool_result({"status": "success"})
+    assert result["content"][0]["text"] == '{\n  "status": "success"\n}'
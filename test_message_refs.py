@@ -0,0 +1,25 @@
+import time
+
+from src.message_refs import MessageRefs
+
+
+def test_refs_are_bounded_and_expire():
+    refs = MessageRefs(max_entries=2, ttl=0.05)
+    refs.put("a", "telegram_bot", 1)
+    refs.put("b", "telegram_bot", 2)
+    refs.put("c", "telegram_bot", 3)
+    assert refs.get("a", "telegram_bot") is None
+    assert refs.get("c", "telegram_bot") == 3
+    assert len(refs) == 2
+
+    time.sleep(0.1)
+    assert refs.get("c", "telegram_bot") is None
+    refs.put("d", "telegram_bot", 4)
+    assert len(refs) == 1
+
+
+def test_discard_forgets_thread():
+    refs = MessageRefs()
+    refs.put("run", "telegram_bot", 7)
+    refs.discard("run")
+    assert refs.get("run", "telegram_bot") is None
@@ -0,0 +1,83 @@
+import json
+import threading
+import urllib.request
+
+from src import metrics
+from src.server import MCPServer
+
+
+def test_sharded_counters_and_histograms_merge_across_threads():
+    registry = metrics.Registry()
+    sends = registry.counter("sends_total", "sends", ("channel",))
+    inflight = registry.gauge("inflight", "in flight")
+    latency = registry.histogram("latency_ms", "latency", ("channel",), buckets=(10, 100))
+
+    def work():
+        for value in range(100):
+            sends.inc(("bark",))
+            latency.observe(value, ("bark",))
+        inflight.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    inflight.dec(amount=3)
+    # 线程已退出，分片并入汇总值后结果不变
+    for _ in range(2):
+        snapshot = registry.snapshot()["metrics"]
+        assert snapshot["sends_total"]["values"] == {"bark": 400}
+        assert snapshot["inflight"]["value"] == 1
+        summary = snapshot["latency_ms"]["values"]["bark"]
+        assert summary["count"] == 400 and summary["sum_ms"] == 4 * sum(range(100))
+        assert 45 <= summary["p50_ms"] <= 55 and summary["p99_ms"] <= 100
+
+
+def test_shards_of_exited_threads_are_retired_without_a_scrape():
+    counter = metrics.Counter("calls_total", "calls")
+    for _ in range(2000):
+        thread = threading.Thread(target=counter.inc)
+        thread.start()
+        thread.join()
+    # 每个新线程登记分片时回收已退出线程的分片，不依赖 collect()
+    assert len(counter._shards) <= 1
+    assert counter.values() == {(): 2000}
+
+
+def test_prometheus_text_format():
+    registry = metrics.Registry()
+    registry.counter("requests_total", "requests", ("method",)).inc(('tools/"call"',), 2)
+    registry.gauge("queue_depth", "depth", fn=lambda: 3)
+    hist = registry.histogram("latency_ms", "latency", buckets=(1, 5))
+    for value in (0.5, 2, 9):
+        hist.observe(value)
+    text = registry.render_prometheus()
+    assert '# TYPE requests_total counter\nrequests_total{method="tools/\\"call\\""} 2\n' in text
+    assert "queue_depth 3\n" in text
+    assert 'latency_ms_bucket{le="1"} 1\nlatency_ms_bucket{le="5"} 2\nlatency_ms_bucket{le="+Inf"} 3\n' in text
+    assert "latency_ms_sum 11.5\nlatency_ms_count 3\n" in text
+
+    endpoint = metrics.serve("127.0.0.1:0", registry)
+    try:
+        url = f"http://127.0.0.1:{endpoint.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.read().decode("utf-8") == registry.render_prometheus()
+    finally:
+        endpoint.shutdown()
+        endpoint.server_close()
+
+
+def test_notify_metrics_tool_reports_requests_and_tool_calls():
+    server = MCPServer()
+    server.process({"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+    server.handle_tools_call({"name": "notify_status", "arguments": {}})
+    result = server.handle_tools_call({"name": "notify_metrics", "arguments": {}})
+    snapshot = json.loads(result["content"][0]["text"])["metrics"]
+    assert snapshot["mcp_push_requests_total"]["values"]["tools/list"] >= 1
+    assert snapshot["mcp_push_tool_call_latency_ms"]["values"]["notify_status"]["count"] >= 1
+    assert snapshot["mcp_push_tool_errors_total"]["values"]["notify_status"] >= 1
+
+    text = server.handle_tools_call({"name": "notify_metrics", "arguments": {"format": "prometheus"}})
+    assert "# TYPE mcp_push_requests_total counter" in text["content"][0]["text"]
+    assert server.handle_tools_call({"name": "notify_metrics", "arguments": {"format": "xml"}})["isError"]
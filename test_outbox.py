@@ -0,0 +1,83 @@
+import os
+
+from src.outbox import Outbox, replay
+
+
+def test_unacked_channels_survive_replay(tmp_path):
+    outbox = Outbox(str(tmp_path), commit_interval=0)
+    first = outbox.add("title", "content", ["console", "bark"])
+    second = outbox.add("other", "content", ["console"])
+    outbox.ack(first, "console", "success")
+    outbox.ack(second, "console", "error")
+    outbox.close()
+
+    entries = replay(outbox.path)
+    assert list(entries) == [first]
+    assert entries[first]["channels"] == ["bark"]
+
+
+def test_recover_adopts_journal_of_exited_process(tmp_path):
+    crashed = Outbox(str(tmp_path), commit_interval=0)
+    entry_id = crashed.add("title", "content", ["console", "bark"])
+    crashed.ack(entry_id, "console", "success")
+    # 模拟进程被杀：不调用 close()，只释放文件锁
+    crashed._closing = True
+    with crashed._cond:
+        crashed._cond.notify_all()
+    crashed._writer.join()
+    crashed._handle.close()
+
+    outbox = Outbox(str(tmp_path), commit_interval=0)
+    recovered = outbox.recover()
+    assert [entry["id"] for entry in recovered] == [entry_id]
+    assert recovered[0]["channels"] == ["bark"]
+    assert not os.path.exists(crashed.path)
+
+    outbox.ack(entry_id, "bark", "success")
+    outbox.close()
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_compaction_keeps_only_pending_entries(tmp_path):
+    outbox = Outbox(str(tmp_path), commit_interval=0, compact_bytes=4096)
+    for _ in range(40):
+        outbox.ack(outbox.add("title", "x" * 200, ["console"]), "console", "success")
+    pending = outbox.add("title", "content", ["console"])
+    outbox.close()
+
+    assert os.path.getsize(outbox.path) < 4096
+    assert list(replay(outbox.path)) == [pending]
+
+
+def test_async_send_is_journaled_before_it_is_accepted(tmp_path, monkeypatch):
+    import threading
+
+    monkeypatch.setenv("MCP_PUSH_SHELL_ENV", "0")
+    from src import notify
+    from src.server import MCPServer
+
+    release = threading.Event()
+
+    def blocked_channel(title, content):
+        release.wait(5)
+
+    outbox = Outbox(str(tmp_path), commit_interval=0)
+    monkeypatch.setattr(notify, "_outbox_instance", outbox)
+    monkeypatch.setattr(notify, "_outbox_checked", True)
+    monkeypatch.setitem(notify.push_config, "HITOKOTO", "false")
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [blocked_channel])
+    server = MCPServer()
+    try:
+        result = server.handle_tools_call(
+            {"name": "notify_send", "arguments": {"title": "t", "content": "c", "async": True}}
+        )
+        assert result["structuredContent"]["status"] == "accepted"
+        # 渠道尚未执行，条目已落盘：此时进程崩溃，下次启动会重新投递
+        entries = list(replay(outbox.path).values())
+        assert [entry["channels"] for entry in entries] == [["blocked_channel"]]
+    finally:
+        release.set()
+        server.drain_deliveries()
+    # 投递完成后 ack，不会重复登记
+    outbox.close()
+    assert list(replay(outbox.path)) == []
@@ -0,0 +1,70 @@
+import threading
+import types
+
+from src.server import MCPServer
+
+
+def _fake_loader(monkeypatch, outcomes, gate=None):
+    """替换 _load_notify：按 outcomes 依次成功或失败，gate 用于让加载停在半途"""
+    loads = []
+    module = types.SimpleNamespace(warm_up=lambda: None)
+
+    def load(self):
+        loads.append(threading.current_thread().name)
+        if gate is not None:
+            gate.wait(5)
+        if outcomes.pop(0) == "fail":
+            self._notify_error = ImportError("broken dependency")
+        else:
+            self._notify = module
+
+    monkeypatch.setattr(MCPServer, "_load_notify", load)
+    return loads, module
+
+
+def test_preload_runs_once(monkeypatch):
+    loads, module = _fake_loader(monkeypatch, ["ok"])
+    server = MCPServer()
+    server.preload_notify()
+    thread = server._preload_thread
+    server.preload_notify()
+    assert server._preload_thread is thread
+    thread.join(5)
+    assert server._get_notify() is module
+    server.preload_notify()
+    assert loads == ["notify-preload"]
+
+
+def test_tool_call_during_preload_waits_instead_of_importing_again(monkeypatch):
+    gate = threading.Event()
+    loads, module = _fake_loader(monkeypatch, ["ok"], gate)
+    server = MCPServer()
+    server.preload_notify()
+    got = []
+    caller = threading.Thread(target=lambda: got.append(server._get_notify()))
+    caller.start()
+    caller.join(0.2)
+    assert caller.is_alive() and got == []  # 在锁上等待预加载完成
+    gate.set()
+    caller.join(5)
+    server._preload_thread.join(5)
+    assert got == [module]
+    assert loads == ["notify-preload"]
+
+
+def test_failed_preload_falls_back_to_import_on_tool_call(monkeypatch):
+    loads, module = _fake_loader(monkeypatch, ["fail", "ok"])
+    server = MCPServer()
+    server.preload_notify()
+    server._preload_thread.join(5)
+    assert server._notify is None and server._notify_error is None
+    assert server._get_notify() is module
+    assert len(loads) == 2
+
+
+def test_failed_import_on_tool_call_is_reported(monkeypatch):
+    _fake_loader(monkeypatch, ["fail"])
+    server = MCPServer()
+    result = server.handle_tools_call({"name": "notify_send", "arguments": {"title": "t", "content": "c"}})
+    assert result["isError"]
+    assert "broken dependency" in result["content"][0]["text"]
@@ -0,0 +1,72 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from src.profiling import RequestProfiler
+from src.server import MCPServer
+
+
+def _slow_worker_call():
+    """处理线程等待另一个线程中的慢操作，模拟渠道在分发线程中执行"""
+
+    def channel_worker():
+        time.sleep(0.05)
+
+    worker = threading.Thread(target=channel_worker, name="notify-worker-test")
+    worker.start()
+    worker.join()
+
+
+def test_profiles_are_written_per_request_with_retention(tmp_path):
+    profiler = RequestProfiler("all", str(tmp_path), keep=2, interval=0.002)
+    for request_id in ("req/1", "req-2", "req-3"):
+        with profiler.profile(request_id, {"method": "tools/call", "tool": "notify_send"}):
+            _slow_worker_call()
+        profiler.flush()
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 6 and not any("req_1" in name for name in names)
+    meta_file = next(name for name in names if name.endswith("req-3.json"))
+    meta = json.loads((tmp_path / meta_file).read_text(encoding="utf-8"))
+    assert meta["id"] == "req-3" and meta["tool"] == "notify_send"
+    assert meta["duration_ms"] >= 50 and meta["samples"] > 0
+    stacks = (tmp_path / meta_file.replace(".json", ".stacks.txt")).read_text(encoding="utf-8")
+    assert "notify-worker-test;" in stacks and "channel_worker" in stacks
+    assert (tmp_path / meta_file.replace(".json", ".prof")).stat().st_size > 0
+
+
+def test_selection_modes(tmp_path):
+    every = RequestProfiler("every:3", str(tmp_path / "every"))
+    for index in range(6):
+        with every.profile(index):
+            pass
+    every.flush()
+    assert len(os.listdir(tmp_path / "every")) == 2 * 3
+
+    slow = RequestProfiler("slow:30", str(tmp_path / "slow"))
+    with slow.profile("fast"):
+        pass
+    with slow.profile("slow"):
+        time.sleep(0.04)
+    slow.flush()
+    assert sorted(name.split("-")[-1] for name in os.listdir(tmp_path / "slow")) == [
+        "slow.json", "slow.prof", "slow.stacks.txt",
+    ]
+
+    for invalid in ("every:0", "slow:-1", "sometimes"):
+        with pytest.raises(ValueError):
+            RequestProfiler(invalid)
+
+
+def test_server_profiles_tool_calls_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("MCP_PUSH_PROFILE", "all")
+    monkeypatch.setenv("MCP_PUSH_PROFILE_DIR", str(tmp_path))
+    server = MCPServer()
+    server.process({"jsonrpc": "2.0", "id": 7, "method": "tools/call", "params": {"name": "notify_metrics"}})
+    server.profiler.flush()
+    meta_file = next(name for name in os.listdir(tmp_path) if name.endswith(".json"))
+    meta = json.loads((tmp_path / meta_file).read_text(encoding="utf-8"))
+    assert meta["id"] == 7 and meta["method"] == "tools/call" and meta["tool"] == "notify_metrics"
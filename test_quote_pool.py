@@ -0,0 +1,39 @@
+import threading
+import time
+
+from src.quote_pool import QuotePool
+
+
+def test_take_never_waits_for_slow_source():
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        return "quote"
+
+    pool = QuotePool(fetch, size=3, refill_at=1)
+    started = time.monotonic()
+    assert pool.take() is None
+    assert time.monotonic() - started < 0.1
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while pool.stats()["available"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [pool.take() for _ in range(3)] == ["quote"] * 3
+
+
+def test_failed_fetch_backs_off():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        raise OSError("unreachable")
+
+    pool = QuotePool(fetch, size=2, retry_delay=60)
+    pool.take()
+    time.sleep(0.1)
+    assert pool.take() is None
+    time.sleep(0.1)
+    assert len(calls) == 1
+    assert pool.stats()["failures"] == 1
@@ -0,0 +1,128 @@
+import os
+import time
+
+os.environ.setdefault("MCP_PUSH_SHELL_ENV", "0")
+
+from src import notify  # noqa: E402
+from src.ratelimit import RateLimiters, TokenBucket, parse_rate  # noqa: E402
+
+
+class _Clock:
+    """sleep 推进时间的假时钟"""
+
+    def __init__(self, advance=True):
+        self.now = 1000.0
+        self.advance = advance
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        if self.advance:
+            self.now += seconds
+
+
+def test_bucket_paces_requests_after_burst():
+    clock = _Clock()
+    bucket = TokenBucket(2.0, 2.0, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.0, 0.5, 0.5]
+    assert clock.now == 1001.0
+    clock.now += 10  # 空闲后令牌回满，但不超过容量
+    assert bucket.snapshot()["tokens"] == 2.0
+
+
+def test_concurrent_waiters_reserve_consecutive_slots():
+    # sleep 不推进时间，相当于多个线程同时排队：每个请求预订下一个令牌，等待时间依次递增
+    clock = _Clock(advance=False)
+    bucket = TokenBucket(1.0, 1.0, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 1.0, 2.0, 3.0]
+    assert bucket.snapshot()["throttled"] == 3
+
+
+def test_wait_beyond_max_wait_does_not_reserve_a_token():
+    clock = _Clock()
+    bucket = TokenBucket(2.0, 1.0, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire(max_wait=0.1) is None
+    assert bucket.snapshot()["granted"] == 1 and clock.sleeps == []
+    # 放弃的请求没有占用令牌，下一个请求的等待时间不受影响
+    assert bucket.acquire(max_wait=1.0) == 0.5
+
+
+def test_penalize_delays_following_requests():
+    clock = _Clock()
+    bucket = TokenBucket(1.0, 5.0, clock=clock, sleep=clock.sleep)
+    bucket.penalize(3.0)
+    assert bucket.acquire() == 3.0
+
+
+def test_channel_defaults_and_overrides(monkeypatch):
+    assert parse_rate("19/min:1") == (19 / 60, 1.0)
+    assert parse_rate("off") is None
+    monkeypatch.setattr(notify, "_rate_limiters_instance", None)
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RATE_LIMITS", "telegram_bot=off,bark=2/s")
+    limiters = notify._rate_limiters()
+    assert limiters.get("dingding_bot").rate == 19 / 60
+    assert limiters.get("feishu_bot").capacity == 4
+    assert limiters.get("telegram_bot") is None
+    assert limiters.get("bark").rate == 2
+    assert limiters.get("gotify") is None
+
+    # 配置错误时退回内置默认值
+    monkeypatch.setattr(notify, "_rate_limiters_instance", None)
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RATE_LIMITS", "bark=fast")
+    limiters = notify._rate_limiters()
+    assert limiters.get("bark") is None and limiters.get("telegram_bot").rate == 1
+    assert isinstance(limiters, RateLimiters)
+
+
+def test_rate_limited_channel_gives_up_at_the_deadline(monkeypatch):
+    calls = []
+
+    def limited_channel(title, content):
+        calls.append(title)
+
+    monkeypatch.setattr(notify, "_rate_limiters_instance", None)
+    monkeypatch.setattr(notify, "_breakers_instance", None)
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RATE_LIMITS", "limited_channel=1/min:1")
+    monkeypatch.setitem(notify.push_config, "HITOKOTO", "false")
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [limited_channel])
+
+    assert notify.send("first", "content", timeout=5)["errors"] == {}
+    started = time.monotonic()
+    result = notify.send("second", "content", timeout=0.5)
+    assert time.monotonic() - started < 0.5
+    assert "截止时间前无法发出" in result["errors"]["limited_channel"]
+    assert calls == ["first"]
+    # 未发出的请求不计入熔断，也不占用令牌
+    assert result["breakers"]["limited_channel"] == "closed"
+    assert notify._rate_limiters().get("limited_channel").snapshot()["granted"] == 1
+
+
+def test_burst_beyond_the_default_deadline_is_paced_not_dropped(monkeypatch):
+    sent = []
+
+    def burst_channel(title, content):
+        sent.append(title)
+
+    # sleep 不推进时间：15 条消息依次预订令牌，最后一条需排队约 44 秒，超过默认截止时间 30 秒
+    clock = _Clock(advance=False)
+    limiters = RateLimiters({})
+    limiters._buckets["burst_channel"] = TokenBucket(19 / 60, 1, clock=clock, sleep=clock.sleep)
+    monkeypatch.setattr(notify, "_rate_limiters_instance", limiters)
+    monkeypatch.setattr(notify, "_breakers_instance", None)
+    monkeypatch.setitem(notify.push_config, "HITOKOTO", "false")
+    monkeypatch.setitem(notify.push_config, "NOTIFY_DEADLINE", "30")
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [burst_channel])
+
+    for index in range(15):
+        result = notify.send(f"msg {index}", "content")
+        assert result["errors"] == {}, result["errors"]
+    assert sent == [f"msg {index}" for index in range(15)]
+    assert max(clock.sleeps) > 30
+
+    # 显式给出 timeout 时，排队仍受截止时间限制
+    result = notify.send("explicit", "content", timeout=5)
+    assert "截止时间前无法发出" in result["errors"]["burst_channel"]
@@ -0,0 +1,135 @@
+import json
+import os
+import socket
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+os.environ.setdefault("MCP_PUSH_SHELL_ENV", "0")
+
+from src import notify, resilience  # noqa: E402
+from src.resilience import CircuitBreaker, RetryPolicy, parse_retry_after  # noqa: E402
+
+
+def test_backoff_grows_exponentially_with_jitter_and_honors_retry_after():
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=3.0)
+    for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 3.0), (4, 3.0)):
+        for _ in range(20):
+            assert ceiling / 2 <= policy.delay(attempt) <= ceiling
+    assert policy.delay(1, retry_after=2.5) == 2.5
+    # 服务端要求的等待超过上限时放弃重试
+    assert policy.delay(1, retry_after=10) is None
+
+    assert parse_retry_after("7") == 7.0
+    assert 55 <= parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
+    assert parse_retry_after("soon") is None
+
+
+def test_breaker_opens_half_opens_and_closes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()  # 只放行一个探测请求
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.snapshot()["failures"] == 0
+
+
+def _gotify(monkeypatch, origin):
+    monkeypatch.setitem(notify.push_config, "GOTIFY_URL", origin)
+    monkeypatch.setitem(notify.push_config, "GOTIFY_TOKEN", "token")
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RETRY_MAX", "3")
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RETRY_BASE_MS", "10")
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RATE_LIMITS", "gotify=off")
+    monkeypatch.setattr(notify, "_rate_limiters_instance", None)
+    monkeypatch.setattr(notify, "_breakers_instance", None)
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [notify.gotify])
+
+
+def test_post_is_not_retried_after_the_request_was_sent(monkeypatch):
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    received = []
+
+    def read_then_hang_up():
+        while True:
+            try:
+                conn = server.accept()[0]
+            except OSError:
+                return
+            with conn:
+                received.append(conn.recv(65536))
+
+    threading.Thread(target=read_then_hang_up, daemon=True).start()
+    _gotify(monkeypatch, f"http://127.0.0.1:{server.getsockname()[1]}")
+    try:
+        result = notify.send("title", "content", timeout=5)
+    finally:
+        server.close()
+    # 服务商可能已经收到消息：不重试，避免重复推送
+    assert result["results"]["gotify"]["attempts"] == 1
+    assert len(received) == 1
+
+
+def test_connection_refused_is_retried(monkeypatch):
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    _gotify(monkeypatch, f"http://127.0.0.1:{port}")
+    result = notify.send("title", "content", timeout=5)
+    assert result["results"]["gotify"]["attempts"] == 3
+    assert not result["results"]["gotify"]["success"]
+
+
+class _ThrottleOnce(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        type(self).hits += 1
+        if type(self).hits == 1:
+            status, body, headers = 429, {"error": "Too Many Requests"}, {"Retry-After": "0.3"}
+        else:
+            status, body, headers = 200, {"id": 1}, {}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_429_is_retried_after_retry_after(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), _ThrottleOnce)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _gotify(monkeypatch, f"http://127.0.0.1:{server.server_address[1]}")
+    try:
+        started = time.monotonic()
+        result = notify.send("title", "content", timeout=5)
+        elapsed = time.monotonic() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+    gotify = result["results"]["gotify"]
+    assert gotify["success"] and gotify["attempts"] == 2
+    assert elapsed >= 0.3
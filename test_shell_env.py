@@ -0,0 +1,65 @@
+import os
+import threading
+
+from src import shell_env
+
+
+def test_cached_snapshot_is_reused_until_rc_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("SHELL", "/bin/sh")
+    profile = tmp_path / ".profile"
+    profile.write_text("export A=1\n")
+    captures = []
+    monkeypatch.setattr(shell_env, "capture", lambda cmd, timeout=10.0: captures.append(cmd) or {"A": str(len(captures))})
+    cache = str(tmp_path / "cache" / "shell_env.json")
+
+    assert shell_env.snapshot(cache) == {"A": "1"}
+    assert shell_env.snapshot(cache) == {"A": "1"}
+    assert len(captures) == 1
+    assert oct(os.stat(cache).st_mode & 0o777) == "0o600"
+
+    # rc 文件变化：先返回旧快照，后台刷新缓存
+    os.utime(profile, ns=(0, 0))
+    assert shell_env.snapshot(cache) == {"A": "1"}
+    for thread in [t for t in threading.enumerate() if t.name == "shell-env-refresh"]:
+        thread.join()
+    assert shell_env.snapshot(cache) == {"A": "2"}
+
+
+def test_inherited_variables_are_not_captured_or_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("SHELL", "/bin/sh")
+    (tmp_path / ".profile").write_text("export BARK_PUSH=from-profile\n")
+    # 只在本次调用方进程中设置的变量不应进入快照，也不应写入缓存供之后的进程使用
+    monkeypatch.setenv("CONSOLE", "true")
+    cache = tmp_path / "cache" / "shell_env.json"
+
+    env = shell_env.snapshot(str(cache), keys={"BARK_PUSH", "CONSOLE"})
+    assert env == {"BARK_PUSH": "from-profile"}
+    assert "CONSOLE" not in cache.read_text() and "PATH" not in cache.read_text()
+
+    monkeypatch.delenv("CONSOLE")
+    assert shell_env.snapshot(str(cache), keys={"BARK_PUSH", "CONSOLE"}) == {"BARK_PUSH": "from-profile"}
+
+
+def test_proxy_exported_in_login_shell_reaches_os_environ(tmp_path, monkeypatch):
+    from src import notify
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("SHELL", "/bin/sh")
+    monkeypatch.setenv("MCP_PUSH_SHELL_ENV", "1")
+    monkeypatch.setenv("MCP_PUSH_SHELL_ENV_CACHE", "off")
+    (tmp_path / ".profile").write_text(
+        "export https_proxy=http://127.0.0.1:7890\n"
+        "export REQUESTS_CA_BUNDLE=/etc/ssl/corp.pem\n"
+        "export UNRELATED_SECRET=x\n"
+    )
+    for key in ("https_proxy", "REQUESTS_CA_BUNDLE", "UNRELATED_SECRET"):
+        monkeypatch.delenv(key, raising=False)
+    # 测试结束后由 monkeypatch 还原 os.environ
+    monkeypatch.setattr(os, "environ", os.environ.copy())
+
+    notify._load_shell_env()
+    assert os.environ["https_proxy"] == "http://127.0.0.1:7890"
+    assert os.environ["REQUESTS_CA_BUNDLE"] == "/etc/ssl/corp.pem"
+    assert "UNRELATED_SECRET" not in os.environ
@@ -0,0 +1,104 @@
+import json
+import os
+import sys
+import threading
+import time
+import types
+
+from src.server import MCPServer
+
+
+class _Stdio:
+    """通过管道向 run_stdio 输入请求，收集写出的响应"""
+
+    def __init__(self, monkeypatch, server, handler):
+        read_fd, self._write_fd = os.pipe()
+        monkeypatch.setattr(sys, "stdin", types.SimpleNamespace(buffer=os.fdopen(read_fd, "rb")))
+        self.responses = []
+        self._cond = threading.Condition()
+
+        def write_payload(payload, framed):
+            with self._cond:
+                self.responses.append(json.loads(payload))
+                self._cond.notify_all()
+
+        monkeypatch.setattr(server, "_write_payload", write_payload)
+        monkeypatch.setattr(server, "handle_tools_call", handler)
+        self._thread = threading.Thread(target=server.run_stdio, daemon=True)
+        self._thread.start()
+
+    def send(self, request_id, method="tools/call", **params):
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        os.write(self._write_fd, json.dumps(message).encode() + b"\n")
+
+    def wait_for(self, count, timeout=5.0):
+        with self._cond:
+            assert self._cond.wait_for(lambda: len(self.responses) >= count, timeout), self.responses
+            return [response["id"] for response in self.responses]
+
+    def close(self):
+        os.close(self._write_fd)
+        self._thread.join(5)
+
+
+def _event(run_id, event):
+    return {"name": "notify_event", "arguments": {"run_id": run_id, "event": event, "message": event}}
+
+
+def test_tool_calls_run_concurrently(monkeypatch):
+    barrier = threading.Barrier(2, timeout=2)
+
+    def handler(params):
+        barrier.wait()  # 两个调用同时在执行才能通过
+        return {"content": [], "isError": False}
+
+    stdio = _Stdio(monkeypatch, MCPServer(max_inflight=4), handler)
+    stdio.send(1, name="notify_send")
+    stdio.send(2, name="notify_send")
+    assert sorted(stdio.wait_for(2)) == [1, 2]
+    stdio.close()
+
+
+def test_events_of_one_run_are_executed_and_answered_in_order(monkeypatch):
+    executed = []
+
+    def handler(params):
+        arguments = params["arguments"]
+        if arguments["run_id"] == "a" and arguments["event"] == "start":
+            time.sleep(0.2)  # 不按 run_id 排队时 update / end 会先完成
+        executed.append((arguments["run_id"], arguments["event"]))
+        return {"content": [], "isError": False}
+
+    stdio = _Stdio(monkeypatch, MCPServer(max_inflight=4), handler)
+    stdio.send(1, **_event("a", "start"))
+    stdio.send(2, **_event("a", "update"))
+    stdio.send(3, **_event("b", "start"))
+    stdio.send(4, **_event("a", "end"))
+    ids = stdio.wait_for(4)
+    stdio.close()
+
+    assert [event for run_id, event in executed if run_id == "a"] == ["start", "update", "end"]
+    assert [i for i in ids if i in (1, 2, 4)] == [1, 2, 4]
+    # 其它 run_id 不被 a 的慢调用阻塞
+    assert ids.index(3) < ids.index(1)
+
+
+def test_reading_pauses_at_inflight_limit(monkeypatch):
+    release = threading.Event()
+    started = []
+
+    def handler(params):
+        started.append(params["name"])
+        release.wait(5)
+        return {"content": [], "isError": False}
+
+    stdio = _Stdio(monkeypatch, MCPServer(max_inflight=2), handler)
+    for request_id in (1, 2, 3):
+        stdio.send(request_id, name="notify_send")
+    stdio.send(4, method="tools/list")
+    time.sleep(0.3)
+    # 两个调用在途，读取循环停在第三个调用上，后面的 tools/list 还未被读取
+    assert len(started) == 2 and stdio.responses == []
+    release.set()
+    assert sorted(stdio.wait_for(4)) == [1, 2, 3, 4]
+    stdio.close()
@@ -0,0 +1,71 @@
+import os
+import sys
+
+os.environ.setdefault("MCP_PUSH_SHELL_ENV", "0")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from src import notify  # noqa: E402
+from stubs import CHANNELS, Behavior, StubProviders, parse_latency  # noqa: E402
+
+
+def _point_at(monkeypatch, stubs):
+    for key, value in stubs.config().items():
+        monkeypatch.setitem(notify.push_config, key, value)
+    monkeypatch.setitem(notify.push_config, "HITOKOTO", "false")
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RETRY_MAX", "1")
+    monkeypatch.setitem(notify.push_config, "NOTIFY_RATE_LIMITS", ",".join(f"{c}=off" for c in CHANNELS))
+    # 限速、熔断与 token 缓存按新配置重新创建，测试结束后恢复
+    for name in ("_rate_limiters_instance", "_breakers_instance", "_wecom_tokens_instance"):
+        monkeypatch.setattr(notify, name, None)
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [getattr(notify, c) for c in CHANNELS])
+
+
+def test_every_channel_succeeds_against_stubs(monkeypatch):
+    with StubProviders() as stubs:
+        _point_at(monkeypatch, stubs)
+        result = notify.send("title", "content", timeout=10)
+
+    assert result["errors"] == {}
+    assert sorted(result["results"]) == sorted(CHANNELS)
+    assert all(entry["success"] for entry in result["results"].values())
+    assert result["results"]["wecom_app"]["provider_code"] == 0
+    # 钉钉、飞书、pushplus 的固定地址经 NOTIFY_HTTP_ROUTES 改写到桩上
+    for provider in ("dingtalk", "feishu", "pushplus", "smtp"):
+        assert stubs.counts[(provider, "ok")] == 1
+
+
+def test_provider_errors_are_reported_per_channel(monkeypatch):
+    with StubProviders(Behavior(error_rate=1.0)) as stubs:
+        _point_at(monkeypatch, stubs)
+        result = notify.send("title", "content", timeout=10)
+
+    assert sorted(result["errors"]) == sorted(CHANNELS)
+    assert not any(entry["success"] for entry in result["results"].values())
+    assert result["results"]["dingding_bot"]["provider_code"] == 310000
+    assert result["results"]["pushplus_bot"]["provider_code"] == 903
+    wecom_app = result["results"]["wecom_app"]
+    assert wecom_app["provider_code"] == 81013
+    assert wecom_app["provider_msg"] == "user & party & tag all invalid"
+
+
+def test_route_rewrite_matches_whole_origin(monkeypatch):
+    monkeypatch.setitem(notify.push_config, "NOTIFY_HTTP_ROUTES", "https://oapi.dingtalk.com=http://127.0.0.1:9001/")
+    assert notify._rewrite_url("https://oapi.dingtalk.com/robot/send?a=1") == "http://127.0.0.1:9001/robot/send?a=1"
+    assert notify._rewrite_url("https://oapi.dingtalk.com.evil/robot") == "https://oapi.dingtalk.com.evil/robot"
+    assert notify._rewrite_url("https://open.feishu.cn/hook") == "https://open.feishu.cn/hook"
+
+
+def test_latency_specs():
+    import random
+
+    rng = random.Random(1)
+    assert parse_latency("const:5")(rng) == 5
+    assert 2 <= parse_latency("uniform:2,20")(rng) <= 20
+    assert parse_latency("lognormal:20,0.5")(rng) > 0
+    for bad in ("const", "uniform:1", "gamma:1,2", "exp:x"):
+        try:
+            parse_latency(bad)
+        except ValueError:
+            continue
+        raise AssertionError(bad)
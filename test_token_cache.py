@@ -0,0 +1,34 @@
+import threading
+import time
+
+from src.token_cache import TokenCache
+
+
+def test_concurrent_callers_share_one_fetch():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return f"token-{len(calls)}", 7200
+
+    cache = TokenCache()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", fetch))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["token-1"] * 8
+    assert len(calls) == 1
+
+    cache.invalidate("k", "stale")  # 只作废仍是该值的令牌
+    assert cache.get("k", fetch) == "token-1"
+    cache.invalidate("k", "token-1")
+    assert cache.get("k", fetch) == "token-2"
+
+
+def test_token_persists_across_instances(tmp_path):
+    path = str(tmp_path / "tokens.json")
+    TokenCache(path).get("k", lambda: ("persisted", 7200))
+    assert TokenCache(path).get("k", lambda: ("fresh", 7200)) == "persisted"
@@ -0,0 +1,75 @@
+import json
+import os
+
+os.environ.setdefault("MCP_PUSH_SHELL_ENV", "0")
+
+from src import notify, tracing  # noqa: E402
+from src.server import MCPServer  # noqa: E402
+
+
+def _spans(path):
+    with open(path, "r", encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+def _attributes(span):
+    return {item["key"]: next(iter(item["value"].values())) for item in span["attributes"]}
+
+
+def test_tool_call_spans_form_one_trace(tmp_path, monkeypatch):
+    def ok_channel(title, content):
+        return None
+
+    def failing_channel(title, content):
+        raise ValueError("boom")
+
+    monkeypatch.setattr(notify, "add_notify_function", lambda: [ok_channel, failing_channel])
+    monkeypatch.setitem(notify.push_config, "HITOKOTO", "false")
+    path = tmp_path / "trace.jsonl"
+    exporter = tracing.configure(str(path), sample=1.0)
+    try:
+        MCPServer().handle_tools_call(
+            {"name": "notify_event", "arguments": {"run_id": "run-1", "event": "end", "message": "done"}}
+        )
+        exporter.flush()
+    finally:
+        tracing.configure("")
+
+    spans = {span["name"] + _attributes(span).get("notify.channel", ""): span for span in _spans(path)}
+    root = spans["tools/call"]
+    assert "parentSpanId" not in root and root["kind"] == "SPAN_KIND_SERVER"
+    assert _attributes(root) == {"mcp.tool": "notify_event", "run_id": "run-1"}
+    assert {span["traceId"] for span in spans.values()} == {root["traceId"]}
+    send = spans["notify.send"]
+    assert send["parentSpanId"] == root["spanId"] and _attributes(send)["run_id"] == "run-1"
+    assert spans["notify.render"]["parentSpanId"] == root["spanId"]
+    # 渠道在分发线程中执行，仍挂在 notify.send 之下
+    assert spans["notify.channelok_channel"]["parentSpanId"] == send["spanId"]
+    failed = spans["notify.channelfailing_channel"]
+    assert failed["status"] == {"code": "STATUS_CODE_ERROR", "message": "boom"}
+    assert _attributes(root["resource"]) == {"service.name": "mcp-push", "process.pid": str(os.getpid())}
+    assert root["startTimeUnixNano"] <= send["startTimeUnixNano"] <= send["endTimeUnixNano"] <= root["endTimeUnixNano"]
+
+
+def test_sampling_and_rotation(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    exporter = tracing.configure(str(path), sample=0.0)
+    try:
+        with tracing.span("root") as root:
+            with tracing.span("child") as child:
+                assert not root.sampled and not child.sampled
+        exporter.flush()
+        assert not path.exists()
+
+        exporter = tracing.configure(str(path), sample=1.0, max_bytes=600, backups=2)
+        for index in range(20):
+            with tracing.span("root", {"index": index}):
+                pass
+            exporter.flush()
+    finally:
+        tracing.configure("")
+    assert tracing.span("idle") is tracing.span("idle")
+    files = sorted(os.listdir(tmp_path))
+    assert files == ["trace.jsonl", "trace.jsonl.1", "trace.jsonl.2"]
+    assert all(os.path.getsize(tmp_path / name) <= 600 for name in files)
+    assert _attributes(_spans(path)[-1])["index"] == "19"